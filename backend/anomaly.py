@@ -0,0 +1,345 @@
+"""
+Streaming spike detection over analyzed complaints, in fixed memory.
+
+Every recorded complaint increments sliding-window counters for the overall volume,
+its category, severity and cluster, and for high-cardinality keys (train, station,
+cluster on a train, category at a station). Counts live in a ring of time buckets.
+Small dimensions get one exact counter per key; large ones share a count-min sketch
+(`depth` hashed counters per key, the estimate is the smallest of them), so memory
+does not grow with the number of trains or stations.
+
+For each key touched by a complaint, the count in the recent window (the last few
+buckets) is compared with the rate over the older part of the ring. Counts are
+treated as Poisson: z = 2 * (sqrt(observed) - sqrt(expected)) is approximately
+standard normal under the baseline rate, and an alert opens when z and the observed
+count clear their thresholds. Alerts resolve when the key falls back (z below half
+the threshold), checked whenever the ring advances. Near-duplicates are counted too:
+many passengers reporting the same incident is itself a spike.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# key extractors over store rows (ROW_FIELDS order): ts, text, category, severity,
+# cluster_id, station, train_number, model_version, incident_id, is_duplicate
+EXACT_DIMENSIONS: Dict[str, Callable[[tuple], Optional[str]]] = {
+    "total": lambda r: "all",
+    "category": lambda r: r[2],
+    "severity": lambda r: r[3],
+    "cluster": lambda r: str(r[4]),
+}
+SKETCH_DIMENSIONS: Dict[str, Callable[[tuple], Optional[str]]] = {
+    "train": lambda r: r[6] or None,
+    "station": lambda r: r[5] or None,
+    "cluster@train": lambda r: f"{r[4]}@{r[6]}" if r[6] else None,
+    "category@station": lambda r: f"{r[2]}@{r[5]}" if r[5] else None,
+}
+EXACT_MAX_KEYS = 256  # per exact dimension (categories, severities, clusters)
+_PRIOR_COUNT = 0.5  # added to every baseline so keys unseen in the baseline get a finite expectation
+_MASK64 = (1 << 64) - 1
+
+
+class _WindowCounts:
+    """
+    Counters of all dimensions side by side in one ring of time buckets, plus running
+    sums of the recent and the older window (kept up to date as the ring advances), so
+    adding and estimating a batch of keys costs a handful of vectorized operations.
+    Every key maps to `depth` cells; an exact key repeats its single cell.
+    """
+
+    def __init__(self, n_buckets: int, recent_buckets: int, sketch_width: int, sketch_depth: int):
+        self.n_buckets = n_buckets
+        self.recent_buckets = recent_buckets
+        self.width = sketch_width
+        self.depth = sketch_depth
+        self._offsets: Dict[str, int] = {}
+        self._exact_index: Dict[str, Dict[str, int]] = {}
+        n_cells = 0
+        for dim in EXACT_DIMENSIONS:
+            self._offsets[dim] = n_cells
+            self._exact_index[dim] = {}
+            n_cells += EXACT_MAX_KEYS
+        for dim in SKETCH_DIMENSIONS:
+            self._offsets[dim] = n_cells
+            n_cells += sketch_width * sketch_depth
+        self._rows = np.arange(sketch_depth, dtype=np.uint64)
+        self._row_offsets = np.arange(sketch_depth, dtype=np.int64) * sketch_width
+        self.ring = np.zeros((n_buckets, n_cells), dtype=np.int32)
+        self.recent = np.zeros(n_cells, dtype=np.int64)
+        self.older = np.zeros(n_cells, dtype=np.int64)
+
+    @property
+    def nbytes(self) -> int:
+        return self.ring.nbytes + self.recent.nbytes + self.older.nbytes
+
+    def cells(self, pairs: List[Tuple[str, str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (n_pairs, depth) cell indices of (dimension, key) pairs, and a mask of the pairs
+        that have cells (False when an exact dimension already holds EXACT_MAX_KEYS keys).
+        """
+        out = np.zeros((len(pairs), self.depth), dtype=np.int64)
+        valid = np.ones(len(pairs), dtype=bool)
+        exact_rows, exact_cells, sketch_rows, hashes, offsets = [], [], [], [], []
+        for i, (dim, key) in enumerate(pairs):
+            index = self._exact_index.get(dim)
+            if index is None:
+                sketch_rows.append(i)
+                hashes.append(hash(key) & _MASK64)
+                offsets.append(self._offsets[dim])
+                continue
+            j = index.get(key)
+            if j is None:
+                if len(index) >= EXACT_MAX_KEYS:
+                    valid[i] = False
+                    continue
+                j = index[key] = len(index)
+            exact_rows.append(i)
+            exact_cells.append(self._offsets[dim] + j)
+        if exact_rows:
+            out[exact_rows] = np.asarray(exact_cells, dtype=np.int64)[:, None]
+        if sketch_rows:
+            # double hashing: column d = h1 + d * h2 (mod width), from one 64-bit hash per key
+            h = np.asarray(hashes, dtype=np.uint64)
+            h1, h2 = h & np.uint64(0xFFFFFFFF), (h >> np.uint64(32)) | np.uint64(1)
+            cols = (h1[:, None] + self._rows[None, :] * h2[:, None]) % np.uint64(self.width)
+            out[sketch_rows] = cols.astype(np.int64) + self._row_offsets + np.asarray(offsets, dtype=np.int64)[:, None]
+        return out, valid
+
+    def add(self, bucket: int, cells: np.ndarray, counts: np.ndarray, exact: np.ndarray) -> None:
+        """Add counts[i] to the cells of key i (exact keys: once, not once per sketch row)."""
+        weights = np.broadcast_to(counts[:, None], cells.shape)
+        flat, w = cells[~exact].ravel(), weights[~exact].ravel()
+        flat = np.concatenate([flat, cells[exact, 0]])
+        w = np.concatenate([w, counts[exact]])
+        np.add.at(self.ring[bucket % self.n_buckets], flat, w)
+        np.add.at(self.recent, flat, w)
+
+    def estimate(self, cells: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return self.recent[cells].min(axis=1), self.older[cells].min(axis=1)
+
+    def advance(self, old_bucket: int, new_bucket: int) -> bool:
+        """Move the ring forward to new_bucket. Returns True if it had to be cleared."""
+        if new_bucket - old_bucket >= self.n_buckets:  # idle longer than the ring: start over
+            self.ring[:] = 0
+            self.recent[:] = 0
+            self.older[:] = 0
+            return True
+        for b in range(old_bucket + 1, new_bucket + 1):
+            leaving = self.ring[(b - self.recent_buckets) % self.n_buckets]  # recent -> older
+            self.recent -= leaving
+            self.older += leaving
+            expired = (b - self.n_buckets) % self.n_buckets  # older -> gone; the slot is reused by b
+            self.older -= self.ring[expired]
+            self.ring[expired] = 0
+        return False
+
+
+class SpikeDetector:
+    """Thread-safe; observe() is called with every batch of recorded complaints."""
+
+    def __init__(
+        self,
+        bucket_seconds: float = 60.0,
+        n_buckets: int = 60,
+        recent_buckets: int = 5,
+        z_threshold: float = 4.0,
+        min_count: int = 5,
+        min_baseline_seconds: float = 600.0,
+        sketch_width: int = 2048,
+        sketch_depth: int = 4,
+        max_active: int = 500,
+        max_history: int = 200,
+        on_alert: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    ):
+        if not 0 < recent_buckets < n_buckets:
+            raise ValueError("recent_buckets must be between 1 and n_buckets - 1")
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = n_buckets
+        self.recent_buckets = recent_buckets
+        self.z_threshold = z_threshold
+        self.min_count = min_count
+        self.min_baseline_seconds = min_baseline_seconds
+        self.max_active = max_active
+        self.on_alert = on_alert
+        self._lock = threading.Lock()
+        self._counts = _WindowCounts(n_buckets, recent_buckets, sketch_width, sketch_depth)
+        self._extractors = {**EXACT_DIMENSIONS, **SKETCH_DIMENSIONS}
+        self._bucket: Optional[int] = None
+        self._started: Optional[float] = None
+        self._now = 0.0
+        self._active: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._history: deque = deque(maxlen=max_history)
+        self._next_id = 1
+        self.stats = {
+            "observed": 0, "alerts_opened": 0, "alerts_resolved": 0, "alerts_suppressed": 0,
+            "keys_overflowed": 0, "last_observe_ms": None,
+        }
+
+    # ---- ingestion ----
+
+    def observe(self, rows: List[tuple], notify: bool = True) -> None:
+        """Count rows (store ROW_FIELDS tuples) and open alerts for keys that spiked."""
+        if not rows:
+            return
+        t0 = time.perf_counter()
+        with self._lock:
+            # rows arrive in near real time; late ones are counted in the current bucket
+            events = self._advance(max(max(r[0] for r in rows), self._now))
+            pairs, counts = [], []
+            for dim, extract in self._extractors.items():
+                per_key: Dict[str, int] = {}
+                for r in rows:
+                    key = extract(r)
+                    if key is not None:
+                        per_key[key] = per_key.get(key, 0) + 1
+                pairs += [(dim, key) for key in per_key]
+                counts += per_key.values()
+            cells, valid = self._counts.cells(pairs)
+            if not valid.all():
+                self.stats["keys_overflowed"] += int((~valid).sum())
+                pairs = [p for p, ok in zip(pairs, valid) if ok]
+                cells, counts = cells[valid], np.asarray(counts)[valid]
+            if pairs:
+                exact = np.fromiter((d in EXACT_DIMENSIONS for d, _ in pairs), dtype=bool, count=len(pairs))
+                self._counts.add(self._bucket, cells, np.asarray(counts, dtype=np.int64), exact)
+                events += self._evaluate(pairs, cells)
+            self.stats["observed"] += len(rows)
+            self.stats["last_observe_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+        if notify:
+            self._notify(events)
+
+    def replay(self, batches: Iterable[List[tuple]]) -> int:
+        """
+        Rebuild the windows from stored complaints (in time order, e.g. at startup),
+        without notifying. Rows are fed one time bucket at a time so each lands in its own.
+        """
+        n = 0
+        for rows in batches:
+            start = 0
+            for i in range(1, len(rows) + 1):
+                if i == len(rows) or int(rows[i][0] // self.bucket_seconds) != int(rows[start][0] // self.bucket_seconds):
+                    self.observe(rows[start:i], notify=False)
+                    start = i
+            n += len(rows)
+        return n
+
+    def tick(self, now: Optional[float] = None) -> None:
+        """Advance the clock without new complaints, so alerts of quiet keys can resolve."""
+        with self._lock:
+            events = self._advance(now or time.time()) if self._bucket is not None else []
+        self._notify(events)
+
+    def _notify(self, events: List[Tuple[str, Dict[str, Any]]]) -> None:
+        if self.on_alert is not None:
+            for kind, alert in events:
+                self.on_alert(kind, dict(alert))
+
+    def _advance(self, now: float) -> List[Tuple[str, Dict[str, Any]]]:
+        bucket = int(now // self.bucket_seconds)
+        if self._started is None:
+            self._started, self._bucket = now, bucket
+        self._now = max(self._now, now)
+        if bucket <= self._bucket:
+            return []
+        if self._counts.advance(self._bucket, bucket):
+            self._started = bucket * self.bucket_seconds  # the ring was cleared: warm up again
+        self._bucket = bucket
+        return self._sweep()
+
+    # ---- scoring ----
+
+    def _spans(self) -> Tuple[float, float]:
+        """Seconds covered by the recent window (its newest bucket is partial) and by the baseline."""
+        elapsed = self._now - self._bucket * self.bucket_seconds
+        recent = (self.recent_buckets - 1) * self.bucket_seconds + max(elapsed, 1.0)
+        history = self._now - self._started - recent
+        baseline = min(max(history, 0.0), (self.n_buckets - self.recent_buckets) * self.bucket_seconds)
+        return recent, baseline
+
+    def _score(self, cells: np.ndarray):
+        """(observed, expected, z) per key, or None while there is no trustworthy baseline."""
+        recent_span, baseline_span = self._spans()
+        if baseline_span <= 0 or baseline_span < self.min_baseline_seconds:
+            return None
+        observed, older = self._counts.estimate(cells)
+        expected = (older + _PRIOR_COUNT) * (recent_span / baseline_span)
+        return observed, expected, 2.0 * (np.sqrt(observed) - np.sqrt(expected))
+
+    def _evaluate(self, pairs: List[Tuple[str, str]], cells: np.ndarray) -> List[Tuple[str, Dict[str, Any]]]:
+        scored = self._score(cells)
+        if scored is None:
+            return []
+        observed, expected, z = scored
+        events = []
+        for i in np.flatnonzero((z >= self.z_threshold) & (observed >= self.min_count)).tolist():
+            alert = self._active.get(pairs[i])
+            if alert is None:
+                if len(self._active) >= self.max_active:
+                    self.stats["alerts_suppressed"] += 1
+                    continue
+                alert = self._active[pairs[i]] = {
+                    "id": self._next_id,
+                    "dimension": pairs[i][0],
+                    "key": pairs[i][1],
+                    "status": "active",
+                    "opened_at": self._now,
+                    "peak_z": 0.0,
+                }
+                self._next_id += 1
+                self._history.appendleft(alert)
+                self.stats["alerts_opened"] += 1
+                events.append(("opened", alert))
+            alert["observed"] = int(observed[i])
+            alert["expected"] = round(float(expected[i]), 3)
+            alert["z"] = round(float(z[i]), 2)
+            alert["peak_z"] = max(alert["peak_z"], alert["z"])
+            alert["updated_at"] = self._now
+        return events
+
+    def _sweep(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Re-score active alerts after the ring advanced; resolve the ones that calmed down."""
+        if not self._active:
+            return []
+        pairs = list(self._active)
+        cells, _ = self._counts.cells(pairs)  # active keys always have cells
+        scored = self._score(cells)
+        events = []
+        for i, pair in enumerate(pairs):
+            alert = self._active[pair]
+            if scored is not None:
+                alert["observed"] = int(scored[0][i])
+                alert["expected"] = round(float(scored[1][i]), 3)
+                alert["z"] = round(float(scored[2][i]), 2)
+            if scored is None or alert["z"] < self.z_threshold / 2:
+                alert["status"] = "resolved"
+                alert["resolved_at"] = self._now
+                del self._active[pair]
+                self.stats["alerts_resolved"] += 1
+                events.append(("resolved", alert))
+        return events
+
+    # ---- reporting ----
+
+    def alerts(self, include_resolved: bool = False, limit: int = 50) -> List[Dict[str, Any]]:
+        """Newest first."""
+        with self._lock:
+            items = [a for a in self._history if include_resolved or a["status"] == "active"]
+            return [dict(a) for a in items[:limit]]
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            recent_span, baseline_span = self._spans() if self._bucket is not None else (0.0, 0.0)
+            return {
+                "active_alerts": len(self._active),
+                "warming_up": baseline_span < self.min_baseline_seconds,
+                "recent_window_s": round(recent_span, 1),
+                "baseline_window_s": round(baseline_span, 1),
+                "bucket_seconds": self.bucket_seconds,
+                "z_threshold": self.z_threshold,
+                "min_count": self.min_count,
+                "memory_bytes": self._counts.nbytes,
+                **self.stats,
+            }
@@ -0,0 +1,148 @@
+"""
+Async micro-batching: coalesces concurrent single-complaint requests into one batched
+transform/predict call. Requests wait at most `max_wait_ms` (or until `max_batch_size`
+items are queued); a bounded queue gives backpressure under overload.
+"""
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Overloaded(Exception):
+    """Raised by submit() when the queue is full; callers should shed load (HTTP 503)."""
+
+
+# Upper bounds of the batch-size histogram buckets
+_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class MicroBatcher:
+    """
+    `process_batch(items) -> results` is a blocking function run in a worker thread,
+    one batch at a time; the next batch accumulates while the current one runs.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 3.0,
+        max_queue: int = 2000,
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._submitted = 0
+        self._rejected = 0
+        self._batches = 0
+        self._items = 0
+        self._max_batch_seen = 0
+        self._max_depth_seen = 0
+        self._wait_total = 0.0
+        self._process_total = 0.0
+        self._size_hist = [0] * (len(_SIZE_BUCKETS) + 1)
+
+    def start(self) -> None:
+        """Start the batching task on the running event loop."""
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._queue is not None and not self._queue.empty():
+            _, fut, _ = self._queue.get_nowait()
+            if not fut.done():
+                fut.set_exception(Overloaded("Batcher stopped"))
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result."""
+        if self._task is None:
+            self.start()
+        fut = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((item, fut, time.perf_counter()))
+        except asyncio.QueueFull:
+            self._rejected += 1
+            raise Overloaded(f"Queue full ({self.max_queue} pending)")
+        self._submitted += 1
+        self._max_depth_seen = max(self._max_depth_seen, self._queue.qsize())
+        return await fut
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            items = [item for item, _, _ in batch]
+            try:
+                results = await asyncio.to_thread(self.process_batch, items)
+            except Exception as e:
+                for _, fut, _ in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            finally:
+                self._record(batch, started)
+            for (_, fut, _), result in zip(batch, results):
+                if not fut.done():  # the client may have gone away
+                    fut.set_result(result)
+
+    def _record(self, batch: list, started: float) -> None:
+        n = len(batch)
+        self._batches += 1
+        self._items += n
+        self._max_batch_seen = max(self._max_batch_seen, n)
+        self._wait_total += sum(started - queued_at for _, _, queued_at in batch)
+        self._process_total += time.perf_counter() - started
+        for i, bound in enumerate(_SIZE_BUCKETS):
+            if n <= bound:
+                self._size_hist[i] += 1
+                break
+        else:
+            self._size_hist[-1] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        batches = self._batches or 1
+        labels = [f"<={b}" for b in _SIZE_BUCKETS] + [f">{_SIZE_BUCKETS[-1]}"]
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_queue": self.max_queue,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth_seen": self._max_depth_seen,
+            "submitted": self._submitted,
+            "rejected": self._rejected,
+            "batches": self._batches,
+            "avg_batch_size": round(self._items / batches, 2),
+            "max_batch_size_seen": self._max_batch_seen,
+            "batch_size_histogram": dict(zip(labels, self._size_hist)),
+            "avg_queue_wait_ms": round(self._wait_total / max(self._items, 1) * 1000, 3),
+            "avg_batch_process_ms": round(self._process_total / batches * 1000, 3),
+        }
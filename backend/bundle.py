@@ -0,0 +1,270 @@
+"""
+Compact model bundle: the fitted TF-IDF, NB, SGD, KMeans and projection parameters
+as plain .npy arrays plus a JSON manifest, loaded with np.load(mmap_mode="r").
+
+Every API worker that maps the same bundle shares its pages through the OS page
+cache instead of unpickling a private copy. The vocabulary is a sorted fixed-width
+byte-string table looked up with np.searchsorted (vectorized binary search), so no
+per-process dict is built. Weight matrices are stored feature-major (n_features x k)
+so a sparse product only touches the rows of the terms that occur.
+
+The classes below mirror the parts of the scikit-learn interface the API uses
+(transform, predict, predict_proba, classes_, n_clusters) and need only numpy/scipy.
+
+Export an existing artifact directory (e.g. the legacy flat layout):
+    python backend/bundle.py backend/models
+"""
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+
+# ---- export ----
+
+def _check_vectorizer(vectorizer) -> Dict[str, Any]:
+    p = vectorizer.get_params()
+    unsupported = [
+        name for name, ok in (
+            ("analyzer", p["analyzer"] == "word"),
+            ("tokenizer", p["tokenizer"] is None),
+            ("preprocessor", p["preprocessor"] is None),
+            ("stop_words", not p["stop_words"]),
+            ("strip_accents", p["strip_accents"] is None),
+            ("norm", p["norm"] in ("l2", None)),
+        ) if not ok
+    ]
+    if unsupported:
+        raise ValueError(f"Vectorizer settings not supported by the bundle format: {unsupported}")
+    return {
+        "lowercase": bool(p["lowercase"]),
+        "token_pattern": p["token_pattern"],
+        "ngram_range": list(p["ngram_range"]),
+        "binary": bool(p["binary"]),
+        "sublinear_tf": bool(p["sublinear_tf"]),
+        "norm": p["norm"],
+        "use_idf": bool(p["use_idf"]),
+    }
+
+
+def _save(out_dir: Path, name: str, arr: np.ndarray) -> str:
+    np.save(out_dir / name, np.ascontiguousarray(arr))
+    return name
+
+
+def export_bundle(out_dir, vectorizer, classifier, severity_model, cluster_model, projection=None) -> Path:
+    """Write the bundle for one fitted model set into out_dir. Returns the manifest path."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    vec_params = _check_vectorizer(vectorizer)
+
+    terms = sorted(vectorizer.vocabulary_, key=lambda t: t.encode("utf-8"))
+    encoded = [t.encode("utf-8") for t in terms]
+    width = max((len(b) for b in encoded), default=1)
+    columns = np.fromiter((vectorizer.vocabulary_[t] for t in terms), dtype=np.int32, count=len(terms))
+
+    files = {
+        "terms": _save(out_dir, "vocab_terms.npy", np.array(encoded, dtype=f"S{width}")),
+        "columns": _save(out_dir, "vocab_columns.npy", columns),
+        "cat_log_prob": _save(out_dir, "category_log_prob.npy", classifier.feature_log_prob_.T),
+        "cat_log_prior": _save(out_dir, "category_log_prior.npy", classifier.class_log_prior_),
+        "sev_coef": _save(out_dir, "severity_coef.npy", severity_model.coef_.T),
+        "sev_intercept": _save(out_dir, "severity_intercept.npy", severity_model.intercept_),
+        "centroids": _save(out_dir, "cluster_centroids.npy", cluster_model.cluster_centers_.T),
+    }
+    if vec_params["use_idf"]:
+        files["idf"] = _save(out_dir, "idf.npy", vectorizer.idf_)
+    if projection is not None:
+        files["projection"] = _save(out_dir, "projection_components.npy", projection.components_.T)
+
+    manifest = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "n_features": len(vectorizer.vocabulary_),
+        "vectorizer": vec_params,
+        "category_classes": [str(c) for c in classifier.classes_],
+        "severity_classes": [int(c) for c in severity_model.classes_],
+        "n_clusters": int(cluster_model.n_clusters),
+        "files": files,
+    }
+    path = out_dir / MANIFEST_FILE
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return path
+
+
+# ---- inference ----
+
+class BundleVectorizer:
+    """TfidfVectorizer.transform over a memory-mapped sorted vocabulary."""
+
+    def __init__(self, params: Dict[str, Any], terms: np.ndarray, columns: np.ndarray, idf: Optional[np.ndarray]):
+        self.params = params
+        self.lowercase = params["lowercase"]
+        self.ngram_range = tuple(params["ngram_range"])
+        self._token_re = re.compile(params["token_pattern"])
+        self._terms = terms
+        self._width = terms.dtype.itemsize
+        self._columns = columns
+        self.idf_ = idf
+        self.n_features = len(terms)
+
+    def _analyze(self, doc: str) -> List[str]:
+        tokens = self._token_re.findall(doc.lower() if self.lowercase else doc)
+        min_n, max_n = self.ngram_range
+        grams = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), max_n + 1):
+            grams.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return grams
+
+    def lookup(self, grams: List[str]) -> np.ndarray:
+        """Column index of every n-gram, -1 when it is not in the vocabulary."""
+        if not grams or not self.n_features:
+            return np.full(len(grams), -1, dtype=np.int64)
+        encoded = [g.encode("utf-8") for g in grams]
+        keys = np.array(encoded, dtype=f"S{self._width}")  # longer keys are truncated; masked below
+        too_long = np.fromiter((len(b) > self._width for b in encoded), dtype=bool, count=len(encoded))
+        pos = np.minimum(np.searchsorted(self._terms, keys), self.n_features - 1)
+        found = (self._terms[pos] == keys) & ~too_long
+        return np.where(found, self._columns[pos], -1)
+
+    def transform(self, docs) -> sp.csr_matrix:
+        docs = list(docs)
+        n_docs = len(docs)
+        grams, rows = [], []
+        for i, doc in enumerate(docs):
+            g = self._analyze(doc)
+            grams.extend(g)
+            rows.extend([i] * len(g))
+        cols = self.lookup(grams)
+        keep = cols >= 0
+        X = sp.csr_matrix(
+            (np.ones(int(keep.sum())), (np.asarray(rows, dtype=np.int64)[keep], cols[keep])),
+            shape=(n_docs, self.n_features),
+        )  # duplicate (row, col) entries are summed into term counts
+        X.sort_indices()
+        if self.params["binary"]:
+            X.data[:] = 1.0
+        elif self.params["sublinear_tf"]:
+            np.log(X.data, X.data)
+            X.data += 1.0
+        if self.idf_ is not None:
+            X.data *= self.idf_[X.indices]
+        if self.params["norm"] == "l2" and X.nnz:
+            row_nnz = np.diff(X.indptr)
+            norms = np.sqrt(np.bincount(np.repeat(np.arange(n_docs), row_nnz), weights=X.data ** 2, minlength=n_docs))
+            norms[norms == 0] = 1.0
+            X.data /= np.repeat(norms, row_nnz)
+        return X
+
+
+class BundleNB:
+    """MultinomialNB.predict_proba / predict from feature log-probabilities."""
+
+    def __init__(self, log_prob: np.ndarray, log_prior: np.ndarray, classes: List[str]):
+        self._log_prob = log_prob  # (n_features, n_classes)
+        self._log_prior = log_prior
+        self.classes_ = np.array(classes)
+
+    def predict_log_proba(self, X) -> np.ndarray:
+        jll = np.asarray(X @ self._log_prob) + self._log_prior
+        top = jll.max(axis=1, keepdims=True)
+        return jll - (top + np.log(np.exp(jll - top).sum(axis=1, keepdims=True)))
+
+    def predict_proba(self, X) -> np.ndarray:
+        return np.exp(self.predict_log_proba(X))
+
+    def predict(self, X) -> np.ndarray:
+        # the normalizer is the same for every class, so the joint log-likelihood suffices
+        return self.classes_[np.argmax(np.asarray(X @ self._log_prob) + self._log_prior, axis=1)]
+
+
+class BundleLinear:
+    """SGDClassifier.predict from coefficients (one-vs-rest, or a single binary column)."""
+
+    def __init__(self, coef: np.ndarray, intercept: np.ndarray, classes: List[int]):
+        self._coef = coef  # (n_features, n_classes) or (n_features, 1) when binary
+        self._intercept = intercept
+        self.classes_ = np.array(classes)
+
+    def decision_function(self, X) -> np.ndarray:
+        scores = np.asarray(X @ self._coef) + self._intercept
+        return scores.ravel() if scores.shape[1] == 1 else scores
+
+    def predict(self, X) -> np.ndarray:
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            return self.classes_[(scores > 0).astype(int)]
+        return self.classes_[np.argmax(scores, axis=1)]
+
+
+class BundleKMeans:
+    """KMeans.predict: nearest centroid by squared Euclidean distance."""
+
+    def __init__(self, centroids: np.ndarray):
+        self._centroids = centroids  # (n_features, n_clusters)
+        self._sq_norms = np.einsum("ij,ij->j", centroids, centroids)
+        self.n_clusters = centroids.shape[1]
+
+    def predict(self, X) -> np.ndarray:
+        # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2; ||x||^2 is the same for every centroid
+        return np.argmin(self._sq_norms - 2 * np.asarray(X @ self._centroids), axis=1)
+
+
+class BundleProjection:
+    """TruncatedSVD.transform: X @ components.T."""
+
+    def __init__(self, components: np.ndarray):
+        self._components = components  # (n_features, 2)
+
+    def transform(self, X) -> np.ndarray:
+        return np.asarray(X @ self._components)
+
+
+def has_bundle(path) -> bool:
+    return (Path(path) / MANIFEST_FILE).exists()
+
+
+def load_bundle(path, mmap: bool = True) -> Dict[str, Any]:
+    """
+    Load a bundle directory. Returns {'vectorizer', 'classifier', 'severity_model',
+    'cluster_model', 'projection', 'manifest'} with sklearn-compatible predictors.
+    """
+    path = Path(path)
+    with open(path / MANIFEST_FILE) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle format {manifest.get('format_version')!r} in {path}")
+    files = manifest["files"]
+    mode = "r" if mmap else None
+
+    def arr(key):
+        return np.load(path / files[key], mmap_mode=mode) if key in files else None
+
+    return {
+        "vectorizer": BundleVectorizer(manifest["vectorizer"], arr("terms"), arr("columns"), arr("idf")),
+        "classifier": BundleNB(arr("cat_log_prob"), arr("cat_log_prior"), manifest["category_classes"]),
+        "severity_model": BundleLinear(arr("sev_coef"), arr("sev_intercept"), manifest["severity_classes"]),
+        "cluster_model": BundleKMeans(arr("centroids")),
+        "projection": BundleProjection(arr("projection")) if "projection" in files else None,
+        "manifest": manifest,
+    }
+
+
+if __name__ == "__main__":
+    import joblib
+
+    if len(sys.argv) != 2:
+        raise SystemExit("Usage: python bundle.py <artifact dir with the *.joblib files>")
+    src = Path(sys.argv[1])
+    names = ("tfidf_vectorizer", "category_classifier", "severity_model", "cluster_model")
+    models = [joblib.load(src / f"{n}.joblib") for n in names]
+    proj_path = src / "projection_model.joblib"
+    projection = joblib.load(proj_path) if proj_path.exists() else None
+    print("Bundle written:", export_bundle(src / "bundle", *models, projection=projection))
@@ -0,0 +1,131 @@
+"""
+Recurring-issue clustering: mini-batch k-means on the sparse TF-IDF matrix, with k
+chosen automatically and each cluster labelled by its top terms.
+
+k is picked by the silhouette score of candidate fits on a row sample, so choosing it
+costs the same however large the corpus is. The final MiniBatchKMeans then sees the
+full matrix in mini-batches: memory stays at one batch plus the centroids, and no
+dense copy of X is made. TF-IDF rows are L2-normalised, so Euclidean k-means here
+ranks points the same way cosine similarity would.
+
+Imported by train.py (run from backend/), so no relative imports.
+"""
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+K_MIN = 2
+K_MAX = 15
+SELECTION_SAMPLE = 5000  # rows fitted per candidate k
+SILHOUETTE_SAMPLE = 2000  # rows scored per silhouette (pairwise distances: quadratic)
+BATCH_SIZE = 1024
+TOP_TERMS = 8
+
+
+def _sample_rows(n: int, size: int, rng: np.random.RandomState) -> np.ndarray:
+    if n <= size:
+        return np.arange(n)
+    return np.sort(rng.choice(n, size, replace=False))
+
+
+def _minibatch_kmeans(k: int, batch_size: int, random_state: int):
+    from sklearn.cluster import MiniBatchKMeans
+
+    return MiniBatchKMeans(n_clusters=k, batch_size=batch_size, n_init=3, random_state=random_state)
+
+
+def _silhouette(X, labels, sample_size: int, random_state: int) -> Optional[float]:
+    from sklearn.metrics import silhouette_score
+
+    if not 2 <= len(np.unique(labels)) <= X.shape[0] - 1:
+        return None
+    size = sample_size if X.shape[0] > sample_size else None
+    return float(silhouette_score(X, labels, sample_size=size, random_state=random_state))
+
+
+def choose_k(
+    X,
+    k_min: int = K_MIN,
+    k_max: int = K_MAX,
+    sample_size: int = SELECTION_SAMPLE,
+    batch_size: int = BATCH_SIZE,
+    random_state: int = 42,
+) -> Tuple[int, Dict[str, Any]]:
+    """
+    Best k in [k_min, k_max] by silhouette score on a row sample (ties go to the
+    smaller k). k_max is also capped at sqrt(n/2), so a small corpus is not split into
+    clusters of a few complaints on silhouette noise. Returns (k, selection details:
+    per-k silhouette and inertia).
+    """
+    rng = np.random.RandomState(random_state)
+    sample = X[_sample_rows(X.shape[0], sample_size, rng)]
+    k_max = min(k_max, sample.shape[0] - 1, max(k_min, int(np.sqrt(X.shape[0] / 2))))
+    k_min = min(k_min, k_max)
+    t0 = time.perf_counter()
+    silhouettes, inertias = {}, {}
+    best_k, best_score = k_min, -np.inf
+    for k in range(k_min, k_max + 1):
+        km = _minibatch_kmeans(k, batch_size, random_state).fit(sample)
+        score = _silhouette(sample, km.labels_, SILHOUETTE_SAMPLE, random_state)
+        inertias[str(k)] = round(float(km.inertia_), 4)
+        silhouettes[str(k)] = round(score, 4) if score is not None else None
+        if score is not None and score > best_score:
+            best_k, best_score = k, score
+    return best_k, {
+        "method": "silhouette",
+        "candidates": [k_min, k_max],
+        "sample_size": int(sample.shape[0]),
+        "silhouette": silhouettes,
+        "inertia": inertias,
+        "seconds": round(time.perf_counter() - t0, 4),
+    }
+
+
+def top_terms(centroids: np.ndarray, feature_names: Sequence[str], n: int = TOP_TERMS) -> List[List[str]]:
+    """Highest-weighted TF-IDF terms of each centroid (rows of `centroids`)."""
+    names = np.asarray(feature_names)
+    n = min(n, centroids.shape[1])
+    top = np.argsort(-centroids, axis=1)[:, :n]
+    return [[str(names[j]) for j in row if centroids[i, j] > 0] for i, row in enumerate(top)]
+
+
+def fit_clusters(
+    X,
+    feature_names: Sequence[str],
+    n_clusters: Optional[int] = None,
+    k_min: int = K_MIN,
+    k_max: int = K_MAX,
+    batch_size: int = BATCH_SIZE,
+    random_state: int = 42,
+):
+    """
+    Fit MiniBatchKMeans on sparse X (k chosen with choose_k unless n_clusters is given).
+    Returns (model, metrics): k, selection details, silhouette, inertia, cluster sizes,
+    top terms per cluster and timings.
+    """
+    t0 = time.perf_counter()
+    selection = None
+    if n_clusters is None:
+        n_clusters, selection = choose_k(X, k_min, k_max, batch_size=batch_size, random_state=random_state)
+    n_clusters = max(1, min(n_clusters, X.shape[0]))
+    t1 = time.perf_counter()
+    km = _minibatch_kmeans(n_clusters, batch_size, random_state).fit(X)
+    t2 = time.perf_counter()
+    silhouette = _silhouette(X, km.labels_, SILHOUETTE_SAMPLE, random_state)
+    sizes = np.bincount(km.labels_, minlength=n_clusters)
+    terms = top_terms(km.cluster_centers_, feature_names)
+    metrics = {
+        "n_clusters": int(n_clusters),
+        "algorithm": "MiniBatchKMeans",
+        "k_selection": selection or {"method": "fixed"},
+        "silhouette": round(silhouette, 4) if silhouette is not None else None,
+        "inertia": round(float(km.inertia_), 4),
+        "cluster_sizes": sizes.tolist(),
+        "labels": [
+            {"cluster": i, "size": int(sizes[i]), "terms": terms[i]} for i in range(n_clusters)
+        ],
+        "fit_seconds": round(t2 - t1, 4),
+        "total_seconds": round(time.perf_counter() - t0, 4),
+    }
+    return km, metrics
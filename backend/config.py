@@ -24,19 +24,116 @@ CATEGORIES = [
 # Severity levels
 SEVERITY_LEVELS = ["low", "medium", "high", "critical"]
 
-# High-priority keywords for severity tagging
+# High-priority keywords for severity tagging. Matched as whole words/phrases,
+# so inflected forms are listed explicitly.
 CRITICAL_KEYWORDS = [
-    "accident", "safety", "emergency", "fire", "theft", "assault",
-    "derailment", "collapse", "critical", "urgent", "life", "death",
+    "accident", "accidents", "safety", "emergency", "fire", "theft", "assault",
+    "derailment", "derailed", "collapse", "critical", "urgent", "life", "death",
+    # Hindi (transliterated)
+    "durghatna", "aag", "chori", "khatra",
 ]
 HIGH_KEYWORDS = [
-    "delay", "cancelled", "stranded", "stuck", "hours", "no water",
-    "no food", "harassment", "abuse", "discrimination", "refund",
+    "delay", "delayed", "delays", "cancelled", "canceled", "cancellation",
+    "stranded", "stuck", "for hours", "no water", "no food", "harassment", "harassed",
+    "abuse", "discrimination", "refund",
+    # Hindi (transliterated)
+    "paani nahi", "khana nahi", "der se", "ghanton se",
 ]
+# Optional JSON file {"critical": [...], "high": [...]} with extra (e.g. regional) keywords
+SEVERITY_KEYWORDS_PATH = DATA_DIR / "severity_keywords.json"
 
-# Model paths
-VECTORIZER_PATH = MODELS_DIR / "tfidf_vectorizer.joblib"
-CLASSIFIER_PATH = MODELS_DIR / "category_classifier.joblib"
-CLUSTER_MODEL_PATH = MODELS_DIR / "cluster_model.joblib"
-SEVERITY_MODEL_PATH = MODELS_DIR / "severity_model.joblib"
-METRICS_PATH = MODELS_DIR / "evaluation_metrics.json"
+# Model artifact file names (inside a version directory)
+VECTORIZER_FILE = "tfidf_vectorizer.joblib"
+CLASSIFIER_FILE = "category_classifier.joblib"
+CLUSTER_MODEL_FILE = "cluster_model.joblib"
+SEVERITY_MODEL_FILE = "severity_model.joblib"
+METRICS_FILE = "evaluation_metrics.json"
+PROJECTION_FILE = "projection_model.joblib"  # TruncatedSVD to 2D (clustering viz)
+CLUSTER_VIZ_FILE = "cluster_viz.json"  # precomputed 2D points of the training corpus
+BUNDLE_DIR = "bundle"  # memory-mappable .npy export of the fitted models (see bundle.py)
+
+# Versioned artifact sets: models/versions/<version>/, active one named in models/CURRENT
+VERSIONS_DIR = MODELS_DIR / "versions"
+CURRENT_VERSION_PATH = MODELS_DIR / "CURRENT"
+
+# Model paths (pre-versioning flat layout, served as version "legacy")
+VECTORIZER_PATH = MODELS_DIR / VECTORIZER_FILE
+CLASSIFIER_PATH = MODELS_DIR / CLASSIFIER_FILE
+CLUSTER_MODEL_PATH = MODELS_DIR / CLUSTER_MODEL_FILE
+SEVERITY_MODEL_PATH = MODELS_DIR / SEVERITY_MODEL_FILE
+METRICS_PATH = MODELS_DIR / METRICS_FILE
+
+# Artifact format served by the API: "auto" (bundle when a version has one, else joblib),
+# "bundle" (require it) or "joblib"
+MODEL_FORMAT = os.environ.get("RAIL_SAARTHI_MODEL_FORMAT", "auto")
+
+# API limits
+MAX_BATCH_SIZE = 10000
+VIZ_MAX_POINTS = 2000  # default downsampling target for /api/clustering-viz
+
+# Complaint store (SQLite, WAL) for analyzed complaints and trend aggregates
+STORE_PATH = Path(os.environ.get("RAIL_SAARTHI_DB", DATA_DIR / "complaints.db"))
+STORE_BATCH_SIZE = 500  # buffered rows per insert batch
+STORE_FLUSH_INTERVAL = 1.0  # seconds; max time a record stays buffered
+
+# Worker processes serving this app (set by backend/serve.py). With more than one, live
+# alerts and feed totals follow the shared store, and /metrics series carry a worker label
+SERVE_WORKERS = int(os.environ.get("RAIL_SAARTHI_WORKERS", 1))
+
+# Online learning mode (feedback -> partial_fit -> periodic snapshots swapped into serving)
+ONLINE_LEARNING = os.environ.get("RAIL_SAARTHI_ONLINE", "0") == "1"
+ONLINE_N_FEATURES = 2**18  # HashingVectorizer width
+ONLINE_BATCH_SIZE = 64  # feedback items per partial_fit micro-batch
+ONLINE_BATCH_WAIT = 0.5  # seconds to wait for a micro-batch to fill
+ONLINE_SNAPSHOT_INTERVAL = 30.0  # seconds between snapshots swapped into serving
+ONLINE_KEEP_SNAPSHOTS = 3  # online-* version directories kept on disk
+ONLINE_MIN_FEEDBACK = int(os.environ.get("RAIL_SAARTHI_ONLINE_MIN_FEEDBACK", 200))  # before snapshots are served
+ONLINE_BOOTSTRAP_MAX_RECORDS = 200_000  # training-corpus records fitted before feedback is applied
+
+# Micro-batching of single-complaint requests (/api/classify, /api/severity, /api/analyze)
+MICRO_BATCHING = os.environ.get("RAIL_SAARTHI_MICRO_BATCHING", "1") == "1"
+BATCH_MAX_SIZE = int(os.environ.get("RAIL_SAARTHI_BATCH_MAX_SIZE", 64))  # flush when this many are queued
+BATCH_MAX_WAIT_MS = float(os.environ.get("RAIL_SAARTHI_BATCH_MAX_WAIT_MS", 3))  # ...or after this long
+BATCH_MAX_QUEUE = int(os.environ.get("RAIL_SAARTHI_BATCH_MAX_QUEUE", 2000))  # backpressure limit (HTTP 503 beyond)
+
+# Near-duplicate detection (MinHash + LSH) grouping repeat complaints into incidents
+DEDUP_ENABLED = os.environ.get("RAIL_SAARTHI_DEDUP", "1") == "1"
+DEDUP_NUM_PERM = 64  # MinHash signature length
+DEDUP_BANDS = 16  # LSH bands (4 rows each); ~0.5 Jaccard is the 50% candidate point
+DEDUP_THRESHOLD = 0.6  # estimated Jaccard needed to join an incident
+DEDUP_MAX_INCIDENTS = int(os.environ.get("RAIL_SAARTHI_DEDUP_MAX_INCIDENTS", 20000))  # memory bound
+DEDUP_TTL_SECONDS = float(os.environ.get("RAIL_SAARTHI_DEDUP_TTL", 6 * 3600))  # idle incidents are evicted
+
+# Similar-complaint search (inverted index over TF-IDF vectors of stored complaints)
+SIMILAR_ENABLED = os.environ.get("RAIL_SAARTHI_SIMILAR", "1") == "1"
+SIMILAR_MAX_DOCS = int(os.environ.get("RAIL_SAARTHI_SIMILAR_MAX_DOCS", 1_000_000))  # newest complaints indexed
+SIMILAR_MAX_K = 50
+
+# Streaming spike detection (sliding-window counts -> /api/alerts and its SSE stream)
+ALERTS_ENABLED = os.environ.get("RAIL_SAARTHI_ALERTS", "1") == "1"
+ALERT_BUCKET_SECONDS = float(os.environ.get("RAIL_SAARTHI_ALERT_BUCKET_SECONDS", 60))  # ring granularity
+ALERT_BUCKETS = 60  # ring length: recent window + baseline (~1 h with 60 s buckets)
+ALERT_RECENT_BUCKETS = 5  # recent window compared against the rest of the ring
+ALERT_MIN_BASELINE_BUCKETS = 10  # no alerts until this much history exists
+ALERT_Z_THRESHOLD = float(os.environ.get("RAIL_SAARTHI_ALERT_Z", 4.0))  # Poisson z-score to open an alert
+ALERT_MIN_COUNT = 5  # complaints in the recent window needed to open an alert
+ALERT_SKETCH_WIDTH = 2048  # count-min sketch for train/station keys: width x depth counters per bucket
+ALERT_SKETCH_DEPTH = 4
+
+# Live dashboard feed (SSE deltas instead of polling full payloads)
+LIVE_INTERVAL = float(os.environ.get("RAIL_SAARTHI_LIVE_INTERVAL", 0.5))  # seconds between coalesced deltas
+LIVE_MAX_POINTS = 200  # newest 2D points per delta (older ones in a burst are dropped)
+GZIP_MIN_BYTES = 1000  # JSON responses at least this large are gzipped when the client accepts it
+
+# Instrumentation: Prometheus metrics at /metrics and sampled request traces at /api/traces
+METRICS_ENABLED = os.environ.get("RAIL_SAARTHI_METRICS", "1") == "1"  # switchable at runtime too
+TRACE_SAMPLE_RATE = float(os.environ.get("RAIL_SAARTHI_TRACE_SAMPLE", 0.0))  # fraction of requests traced
+MAX_TRACES = 200  # newest sampled traces kept
+
+# Prediction result cache keyed on the preprocessed text + model version (see result_cache.py)
+RESULT_CACHE_ENABLED = os.environ.get("RAIL_SAARTHI_RESULT_CACHE", "1") == "1"
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RAIL_SAARTHI_RESULT_CACHE_SIZE", 50000))  # per process
+RESULT_CACHE_TTL_SECONDS = float(os.environ.get("RAIL_SAARTHI_RESULT_CACHE_TTL", 24 * 3600))
+# Optional SQLite file shared by the workers of a host (unset: per-process cache only)
+RESULT_CACHE_DB = os.environ.get("RAIL_SAARTHI_RESULT_CACHE_DB") or None
+RESULT_CACHE_DB_MAX_ROWS = 1_000_000
@@ -0,0 +1,44 @@
+"""
+Streaming readers for complaint archives (CSV / JSONL).
+Records are yielded one at a time so callers can process arbitrarily large files in chunks.
+"""
+import csv
+import json
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List
+
+SUPPORTED_SUFFIXES = (".csv", ".jsonl", ".ndjson", ".json")
+
+
+def iter_records(path) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one dict per complaint from a .csv (header row required) or .jsonl/.ndjson file.
+    A .json file holding a list of objects is also accepted (loaded whole).
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+    elif suffix in (".jsonl", ".ndjson"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    elif suffix == ".json":
+        with open(path, encoding="utf-8") as f:
+            yield from json.load(f)
+    else:
+        raise ValueError(f"Unsupported corpus format {suffix!r}; expected one of {SUPPORTED_SUFFIXES}")
+
+
+def chunked(records: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most `size` items."""
+    it = iter(records)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,169 @@
+"""
+Near-duplicate complaint detection: MinHash signatures + LSH banding.
+
+Complaints whose token shingles (unigrams + bigrams from preprocessing.tokenize) have an
+estimated Jaccard similarity above the threshold are grouped into one incident. Lookups
+touch only the LSH buckets of the new complaint, so cost does not grow with index size.
+Memory is bounded by a maximum incident count and a time-to-live since last activity.
+"""
+import heapq
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+_PRIME = np.uint64(4294967291)  # largest prime below 2**32; keeps a*h + b inside uint64
+
+
+class Incident:
+    __slots__ = ("id", "signature", "band_keys", "count", "first_seen", "last_seen",
+                 "sample_text", "result", "model_version")
+
+    def __init__(self, signature: np.ndarray, band_keys: List[int], text: str, now: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.signature = signature
+        self.band_keys = band_keys
+        self.count = 1
+        self.first_seen = now
+        self.last_seen = now
+        self.sample_text = text[:120]
+        self.result: Optional[Dict[str, Any]] = None  # cached analysis of the first complaint (with ml_severity)
+        self.model_version: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "incident_id": self.id,
+            "count": self.count,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "sample_text": self.sample_text,
+            "category": self.result["category"] if self.result else None,
+            "severity": self.result["severity"] if self.result else None,
+        }
+
+
+def shingles(tokens: List[str]) -> set:
+    return set(tokens) | {a + " " + b for a, b in zip(tokens, tokens[1:])}
+
+
+class NearDuplicateIndex:
+    def __init__(
+        self,
+        num_perm: int = 64,
+        bands: int = 16,
+        threshold: float = 0.6,
+        max_incidents: int = 20000,
+        ttl_seconds: float = 6 * 3600,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.max_incidents = max_incidents
+        self.ttl = ttl_seconds
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, int(_PRIME), size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.randint(0, int(_PRIME), size=(num_perm, 1), dtype=np.uint64)
+        self._buckets: List[Dict[int, set]] = [{} for _ in range(bands)]
+        self._incidents: "OrderedDict[str, Incident]" = OrderedDict()  # least recently active first
+        self._lock = threading.Lock()
+        self._lookups = 0
+        self._duplicates = 0
+        self._evicted = 0
+
+    def signature(self, tokens: List[str]) -> Optional[np.ndarray]:
+        sh = shingles(tokens)
+        if not sh:
+            return None
+        hv = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in sh), dtype=np.uint64, count=len(sh))
+        return ((self._a * hv + self._b) % _PRIME).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, sig: np.ndarray) -> List[int]:
+        r = self.rows
+        return [hash(sig[i * r:(i + 1) * r].tobytes()) for i in range(self.bands)]
+
+    def match_or_add(self, tokens: List[str], text: str, now: Optional[float] = None) -> Tuple[Optional[Incident], bool, float]:
+        """
+        Find the incident this complaint duplicates, or open a new one.
+        Returns (incident, is_duplicate, similarity); incident is None for token-less text.
+        """
+        sig = self.signature(tokens)
+        if sig is None:
+            return None, False, 0.0
+        now = now or time.time()
+        keys = self._band_keys(sig)
+        with self._lock:
+            self._lookups += 1
+            self._evict(now)
+            candidates = set()
+            for band, key in zip(self._buckets, keys):
+                ids = band.get(key)
+                if ids:
+                    candidates.update(ids)
+            best, best_sim = None, 0.0
+            for inc_id in candidates:
+                inc = self._incidents[inc_id]
+                sim = float(np.count_nonzero(inc.signature == sig)) / self.num_perm
+                if sim > best_sim:
+                    best, best_sim = inc, sim
+            if best is not None and best_sim >= self.threshold:
+                best.count += 1
+                best.last_seen = now
+                self._incidents.move_to_end(best.id)
+                self._duplicates += 1
+                return best, True, best_sim
+            inc = Incident(sig, keys, text, now)
+            self._incidents[inc.id] = inc
+            for band, key in zip(self._buckets, keys):
+                band.setdefault(key, set()).add(inc.id)
+            return inc, False, 1.0
+
+    def remember_result(self, incident: Incident, result: Dict[str, Any], model_version: str) -> None:
+        with self._lock:
+            incident.result = result
+            incident.model_version = model_version
+
+    def _evict(self, now: float) -> None:
+        """Drop incidents idle longer than the TTL, then the least recently active beyond capacity."""
+        while self._incidents:
+            inc = next(iter(self._incidents.values()))
+            if inc.last_seen >= now - self.ttl and len(self._incidents) < self.max_incidents:
+                break
+            self._remove(inc)
+            self._evicted += 1
+
+    def _remove(self, inc: Incident) -> None:
+        del self._incidents[inc.id]
+        for band, key in zip(self._buckets, inc.band_keys):
+            ids = band.get(key)
+            if ids is not None:
+                ids.discard(inc.id)
+                if not ids:
+                    del band[key]
+
+    def top(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most-reported active incidents."""
+        with self._lock:
+            incs = heapq.nlargest(limit, self._incidents.values(), key=lambda i: i.count)
+            return [i.to_dict() for i in incs]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "incidents": len(self._incidents),
+                "max_incidents": self.max_incidents,
+                "ttl_seconds": self.ttl,
+                "threshold": self.threshold,
+                "num_perm": self.num_perm,
+                "bands": self.bands,
+                "lookups": self._lookups,
+                "duplicates": self._duplicates,
+                "evicted": self._evicted,
+            }
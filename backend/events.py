@@ -0,0 +1,113 @@
+"""
+In-process publish/subscribe for server-sent events (SSE).
+
+Producers run in worker threads (request handlers, the store flusher) and call
+publish(); each SSE connection holds a bounded asyncio queue on the event loop and is
+fed with loop.call_soon_threadsafe, so publishing never blocks on slow clients. A
+client that falls behind loses its oldest queued events, not the server's memory.
+Events are encoded once per publish, not once per subscriber.
+
+A stream ends after STREAM_MAX_SECONDS; browsers' EventSource reconnects on its own
+and receives a fresh snapshot. Without that, a server shutting down gracefully would
+wait for every open dashboard to disconnect.
+"""
+import asyncio
+import json
+import threading
+import time
+import zlib
+from typing import Any, AsyncIterator, Callable, Dict, FrozenSet, Iterable, Optional, Set, Tuple
+
+KEEPALIVE_SECONDS = 15.0  # comment line so proxies do not close idle streams
+STREAM_MAX_SECONDS = 300.0  # streams end after this and EventSource reconnects (bounds graceful shutdown)
+RECONNECT_MS = 2000
+
+
+def format_sse(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, separators=(",", ":")))
+    return "\n".join(lines) + "\n\n"
+
+
+async def gzip_stream(chunks: AsyncIterator[str], level: int = 6) -> AsyncIterator[bytes]:
+    """
+    Gzip an event stream for Content-Encoding: gzip. One compressor per connection,
+    sync-flushed after every event so nothing waits in its buffer, while the shared
+    window still lets repeated JSON keys across events compress to a few bytes.
+    """
+    z = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        yield z.compress(chunk.encode("utf-8")) + z.flush(zlib.Z_SYNC_FLUSH)
+    yield z.flush()
+
+
+class EventHub:
+    """Fan-out of (event, data) messages to SSE subscribers. Thread-safe."""
+
+    def __init__(self, max_queue: int = 256):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue, Optional[FrozenSet[str]]]] = set()
+        self._next_id = 1
+        self.stats = {"published": 0, "dropped": 0}
+
+    def publish(self, event: str, data: Any) -> None:
+        with self._lock:
+            event_id = self._next_id
+            self._next_id += 1
+            subscribers = [s for s in self._subscribers if s[2] is None or event in s[2]]
+            self.stats["published"] += 1
+        if not subscribers:
+            return
+        text = format_sse(event, data, event_id)
+        for loop, q, _ in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._put, q, text)
+            except RuntimeError:  # loop closed; the subscriber is going away
+                pass
+
+    def _put(self, q: asyncio.Queue, text: str) -> None:
+        if q.full():
+            q.get_nowait()
+            self.stats["dropped"] += 1
+        q.put_nowait(text)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    async def stream(
+        self,
+        events: Optional[Iterable[str]] = None,
+        initial: Optional[Callable[[], Dict[str, Any]]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        SSE text for one client: the events returned by initial() (e.g. a snapshot),
+        then the published ones (all, or only `events`). initial() runs after the
+        client is subscribed, so nothing published in between is lost.
+        """
+        q: asyncio.Queue = asyncio.Queue(self.max_queue)
+        sub = (asyncio.get_running_loop(), q, frozenset(events) if events is not None else None)
+        with self._lock:
+            self._subscribers.add(sub)
+        deadline = time.monotonic() + STREAM_MAX_SECONDS
+        try:
+            yield f"retry: {RECONNECT_MS}\n\n"
+            for event, data in (initial() if initial is not None else {}).items():
+                yield format_sse(event, data)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    text = await asyncio.wait_for(q.get(), min(KEEPALIVE_SECONDS, remaining))
+                except asyncio.TimeoutError:
+                    yield f": keepalive {int(time.time())}\n\n"
+                    continue
+                yield text
+        finally:
+            with self._lock:
+                self._subscribers.discard(sub)
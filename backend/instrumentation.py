@@ -0,0 +1,379 @@
+"""
+Prometheus-style metrics and sampled per-request traces, without extra dependencies.
+
+Counters, gauges and histograms live in process and are rendered in the Prometheus
+text exposition format (0.0.4) for /metrics. Recording costs a lock and a dict update
+(plus a bisect for histograms), around a microsecond against milliseconds per request.
+Values owned by other components (queue depths, cache counters) are read by collector
+callbacks at scrape time, so they cost nothing on the request path.
+
+A sampled fraction of requests also records a trace: the request's timed spans
+(dedup lookup, prediction, pipeline stages, store), kept in a bounded ring.
+
+Both can be switched at runtime; switched off, recording returns immediately and the
+metrics keep the values they had.
+
+Metrics are per process. Behind a pre-forked server a scrape reaches one worker, so
+with worker_label every series carries worker="<pid>": each worker's counters stay
+monotonic series of their own (aggregate with sum without (worker)) instead of
+looking like resets whenever the scrape lands on another worker.
+"""
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 10000)
+
+# (name, type, help, labels, value) yielded by collector callbacks at scrape time
+Sample = Tuple[str, str, str, Dict[str, str], float]
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("rail_saarthi_trace", default=None)
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[Any], *extra: str) -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    parts += [e for e in extra if e]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, owner: "Instrumentation", name: str, help: str, labels: Sequence[str] = ()):
+        self._owner = owner
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values: Dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+
+    def _lines(self, const: str = "") -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, k, const)} {_fmt(v)}" for k, v in items]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels: Any, amount: float = 1) -> None:
+        if not self._owner.enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: Any) -> None:
+        if not self._owner.enabled:
+            return
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels: Any, amount: float = 1) -> None:
+        if not self._owner.enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: Any, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, owner, name, help, labels=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(owner, name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: Any) -> None:
+        if not self._owner.enabled:
+            return
+        i = bisect_left(self.buckets, value)  # first bucket with value <= le
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                # per-bucket counts (last one is +Inf), then the sum
+                counts = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[i] += 1
+            counts[-1] += value
+
+    def _lines(self, const: str = "") -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in sorted(self._values.items())]
+        lines = []
+        bounds = self.buckets + (float("inf"),)
+        for key, counts in items:
+            total = 0
+            for le, c in zip(bounds, counts):
+                total += c
+                le_label = 'le="' + _fmt(le) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, const, le_label)} {total}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key, const)} {_fmt(counts[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key, const)} {total}")
+        return lines
+
+
+class Trace:
+    """Timed spans of one sampled request (offsets relative to the request start)."""
+
+    __slots__ = ("id", "method", "path", "started_at", "_t0", "spans", "route", "status", "duration_ms")
+
+    def __init__(self, trace_id: int, method: str, path: str):
+        self.id = trace_id
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.route = None
+        self.status = None
+        self.duration_ms = None
+
+    def add_span(self, name: str, start: float, duration: float, **attrs: Any) -> None:
+        """`start` is a time.perf_counter() value, `duration` in seconds."""
+        span = {"name": name, "offset_ms": round((start - self._t0) * 1000, 3), "duration_ms": round(duration * 1000, 3)}
+        if attrs:
+            span["attrs"] = attrs
+        self.spans.append(span)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "spans": list(self.spans),
+        }
+
+
+class span:
+    """
+    Context manager timing one stage of the current request into its trace.
+    A no-op (one context variable lookup) when the request is not sampled.
+    """
+
+    __slots__ = ("name", "attrs", "_trace", "_t0")
+
+    def __init__(self, name: str, **attrs: Any):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self) -> "span":
+        self._trace = _current_trace.get()
+        if self._trace is not None:
+            self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._trace is not None:
+            self._trace.add_span(self.name, self._t0, time.perf_counter() - self._t0, **self.attrs)
+
+
+def trace_stages(timings_ms: Optional[Dict[str, float]], **attrs: Any) -> None:
+    """
+    Add pipeline stage timings (as returned with a batch, in ms, ending now) to the
+    current trace as consecutive spans. For a micro-batched request they are the
+    stages of the batch it was scored in.
+    """
+    trace = _current_trace.get()
+    if trace is None or not timings_ms:
+        return
+    stages = [(k[:-3], v / 1000) for k, v in timings_ms.items() if k.endswith("_ms") and k != "total_ms"]
+    start = time.perf_counter() - sum(d for _, d in stages)
+    for name, duration in stages:
+        trace.add_span(name, start, duration, **attrs)
+        start += duration
+
+
+class Instrumentation:
+    """Metric registry, trace sampler and the switches for both."""
+
+    def __init__(self, enabled: bool = True, trace_sample_rate: float = 0.0, max_traces: int = 200,
+                 worker_label: bool = False):
+        self.enabled = enabled
+        self.trace_sample_rate = trace_sample_rate
+        self.worker_label = worker_label
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._failing: set = set()  # collectors whose last call raised (logged once, not per scrape)
+        self._lock = threading.Lock()
+        self._traces: deque = deque(maxlen=max_traces)
+        self._next_trace_id = 1
+        self._sampled = 0
+
+    def _register(self, cls, name: str, help: str, labels: Sequence[str], **kwargs) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(self, name, help, labels, **kwargs)
+            elif not isinstance(metric, cls) or metric.label_names != tuple(labels):
+                raise ValueError(f"Metric {name} already registered with another type or labels")
+            return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help, labels, buckets=buckets)
+
+    def collector(self, fn: Callable[[], Iterable[Sample]]) -> None:
+        """Register fn() -> (name, type, help, labels, value) samples, read at scrape time."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        out = []
+        # read at render time: a pre-forked worker inherits this object from the launcher
+        const = f'worker="{os.getpid()}"' if self.worker_label else ""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for m in metrics:
+            out.append(f"# HELP {m.name} {m.help}")
+            out.append(f"# TYPE {m.name} {m.kind}")
+            out.extend(m._lines(const))
+        families: Dict[str, Tuple[str, str, List[str]]] = {}
+        for fn in self._collectors:
+            try:
+                samples = list(fn())
+            except Exception as e:  # a failing collector must not break the scrape
+                if fn not in self._failing:
+                    self._failing.add(fn)
+                    print(f"Metrics collector {getattr(fn, '__name__', fn)} failed (logged again after it recovers):", e)
+                continue
+            self._failing.discard(fn)
+            for name, kind, help, labels, value in samples:
+                lines = families.setdefault(name, (kind, help, []))[2]
+                lines.append(f"{name}{_labels(list(labels), list(labels.values()), const)} {_fmt(value)}")
+        for name, (kind, help, lines) in families.items():
+            out.append(f"# HELP {name} {help}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(lines)
+        return "\n".join(out) + "\n"
+
+    def configure(self, enabled: Optional[bool] = None, trace_sample_rate: Optional[float] = None) -> None:
+        if trace_sample_rate is not None and not 0.0 <= trace_sample_rate <= 1.0:
+            raise ValueError("trace_sample_rate must be between 0 and 1")
+        if enabled is not None:
+            self.enabled = enabled
+        if trace_sample_rate is not None:
+            self.trace_sample_rate = trace_sample_rate
+
+    def start_trace(self, method: str, path: str) -> Optional[Trace]:
+        """A new trace for a sampled request, else None."""
+        rate = self.trace_sample_rate
+        if rate <= 0.0 or (rate < 1.0 and random.random() >= rate):
+            return None
+        with self._lock:
+            trace_id = self._next_trace_id
+            self._next_trace_id += 1
+            self._sampled += 1
+        return Trace(trace_id, method, path)
+
+    def finish_trace(self, trace: Trace, route: Optional[str], status: int) -> None:
+        trace.route = route
+        trace.status = status
+        trace.duration_ms = round((time.perf_counter() - trace._t0) * 1000, 3)
+        self._traces.append(trace)
+
+    def traces(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent sampled traces, newest first."""
+        items = list(self._traces)[-limit:]
+        return [t.to_dict() for t in reversed(items)]
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "trace_sample_rate": self.trace_sample_rate,
+            "metrics": len(self._metrics),
+            "collectors": len(self._collectors),
+            "traces_sampled": self._sampled,
+            "traces_kept": len(self._traces),
+            "max_traces": self._traces.maxlen,
+        }
+
+
+class InstrumentationMiddleware:
+    """
+    ASGI middleware: request counts, latency (to the response headers, so event
+    streams count their setup, not their lifetime) and in-flight requests per route
+    template, and the trace context of sampled requests.
+    """
+
+    def __init__(self, app, instrumentation: Instrumentation, prefix: str = "rail_saarthi_"):
+        self.app = app
+        self.instrumentation = inst = instrumentation
+        self.requests = inst.counter(f"{prefix}http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+        self.latency = inst.histogram(
+            f"{prefix}http_request_duration_seconds", "Time to response headers by route", ("method", "route")
+        )
+        # a plain count (not a Gauge) so switching recording off mid-request cannot leave it skewed
+        self.in_flight = 0
+        in_flight = (f"{prefix}http_requests_in_flight", "gauge", "Requests being handled", {})
+        inst.collector(lambda: [in_flight + (self.in_flight,)])
+
+    async def __call__(self, scope, receive, send):
+        inst = self.instrumentation
+        if scope["type"] != "http" or not inst.enabled:
+            await self.app(scope, receive, send)
+            return
+        t0 = time.perf_counter()
+        trace = inst.start_trace(scope["method"], scope["path"])
+        token = _current_trace.set(trace) if trace is not None else None
+        status = None
+
+        async def send_timed(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                self._record(scope, status, time.perf_counter() - t0)
+            await send(message)
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            self.in_flight -= 1
+            if status is None:  # failed before responding
+                self._record(scope, 500, time.perf_counter() - t0)
+            if trace is not None:
+                _current_trace.reset(token)
+                inst.finish_trace(trace, self._route(scope), status or 500)
+
+    @staticmethod
+    def _route(scope) -> str:
+        # the route template, not the raw path, so labels stay few (static files: "other")
+        route = scope.get("route")
+        return getattr(route, "path", None) or "other"
+
+    def _record(self, scope, status: int, seconds: float) -> None:
+        route = self._route(scope)
+        self.requests.inc(scope["method"], route, status)
+        self.latency.observe(seconds, scope["method"], route)
@@ -0,0 +1,119 @@
+"""
+Multi-pattern keyword matching for severity rules.
+Aho-Corasick automaton over normalized text: one pass per complaint regardless of
+how many keywords are configured, with whole-word / whole-phrase semantics.
+"""
+import re
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+_NON_WORD_RE = re.compile(r"[^\w]+")
+
+
+class KeywordMatch(NamedTuple):
+    keyword: str
+    tier: str
+    start: int
+    end: int
+
+
+def normalize(text: str) -> str:
+    """Lowercase and reduce every non-word run to one space (so phrases match across punctuation)."""
+    if not text:
+        return ""
+    return _NON_WORD_RE.sub(" ", text.lower()).strip()
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton mapping keywords/phrases to a tier name.
+    `tiers` is ordered from most to least severe; it decides which tier wins
+    when a text matches keywords from several tiers.
+    """
+
+    def __init__(self, keywords: Dict[str, str], tiers: Sequence[str]):
+        self.tiers = list(tiers)
+        self._rank = {t: i for i, t in enumerate(self.tiers)}
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self._patterns: List[tuple] = []  # (keyword, tier, length)
+        for kw, tier in keywords.items():
+            self._add(normalize(kw), tier)
+        self._build()
+
+    @classmethod
+    def from_tiers(cls, tier_keywords: Dict[str, Iterable[str]]) -> "KeywordMatcher":
+        """Build from {tier: [keywords]}; dict order is the tier precedence."""
+        keywords: Dict[str, str] = {}
+        for tier in reversed(list(tier_keywords)):
+            for kw in tier_keywords[tier]:
+                keywords[kw] = tier  # higher tiers overwrite duplicates
+        return cls(keywords, list(tier_keywords))
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def _add(self, kw: str, tier: str) -> None:
+        if not kw:
+            return
+        node = 0
+        for ch in kw:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(len(self._patterns))
+        self._patterns.append((kw, tier, len(kw)))
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> List[KeywordMatch]:
+        """All whole-word keyword/phrase matches in `text`, in order of position."""
+        t = normalize(text)
+        n = len(t)
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self._patterns
+        matches = []
+        node = 0
+        for i, ch in enumerate(t):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            end = i + 1
+            if end < n and t[end] != " ":
+                continue
+            for p in out[node]:
+                kw, tier, length = patterns[p]
+                start = end - length
+                if start == 0 or t[start - 1] == " ":
+                    matches.append(KeywordMatch(kw, tier, start, end))
+        matches.sort(key=lambda m: (m.start, m.end))
+        return matches
+
+    def top_tier(self, text: str) -> Optional[str]:
+        """Most severe tier matched in `text`, or None."""
+        return self.best_tier(self.find(text))
+
+    def best_tier(self, matches: List[KeywordMatch]) -> Optional[str]:
+        if not matches:
+            return None
+        return min((m.tier for m in matches), key=self._rank.__getitem__)
+
+    def find_batch(self, texts: Iterable[str]) -> List[List[KeywordMatch]]:
+        return [self.find(t) for t in texts]
@@ -0,0 +1,90 @@
+"""
+Live dashboard feed: analyzed complaints coalesced into small periodic deltas.
+
+Instead of every open dashboard re-downloading trends and the cluster plot, the API
+keeps running totals here and publishes, on every flush() (a short timer), one
+"delta" event: count increments per category/severity/cluster (+ duplicates) and the
+2D points of newly analyzed complaints. Deltas carry a sequence number; a client
+starts from snapshot() and ignores deltas it already has (seq <= snapshot seq).
+Counting follows the complaint store: near-duplicates only count under "duplicates".
+"""
+import threading
+from collections import Counter, deque
+from typing import Any, Dict, List
+
+DIMENSIONS = ("category", "severity", "cluster", "duplicates")
+_TEXT_CHARS = 80  # same truncation as the cluster viz points
+
+
+class LiveFeed:
+    """Thread-safe; record() is a store on_add (or follow) listener, flush() runs on a timer."""
+
+    def __init__(self, publish, max_points: int = 200):
+        self.publish = publish
+        self.max_points = max_points
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Counter] = {d: Counter() for d in DIMENSIONS}
+        self._pending: Dict[str, Counter] = {d: Counter() for d in DIMENSIONS}
+        self._points: deque = deque(maxlen=max_points)  # newest points win when a burst overflows
+        self._dirty = False
+        self.seq = 0
+        self.stats = {"deltas": 0, "points_dropped": 0}
+
+    def load(self, counts: Dict[str, Dict[str, int]]) -> None:
+        """Start the totals from the store's all-time counters."""
+        with self._lock:
+            self._totals = {d: Counter(counts.get(d, {})) for d in DIMENSIONS}
+
+    def record(self, rows: List[tuple]) -> None:
+        """Count store rows (ROW_FIELDS order) into the pending delta."""
+        with self._lock:
+            for row in rows:
+                if row[9]:
+                    self._pending["duplicates"]["all"] += 1
+                    continue
+                self._pending["category"][row[2]] += 1
+                self._pending["severity"][row[3]] += 1
+                self._pending["cluster"][str(row[4])] += 1
+            self._dirty = True
+
+    def add_points(self, texts: List[str], results: List[Dict[str, Any]]) -> None:
+        """2D points of newly analyzed complaints (results carry 'coords' when a projection exists)."""
+        points = [
+            [r["coords"]["x"], r["coords"]["y"], r["cluster_id"], t[:_TEXT_CHARS]]
+            for t, r in zip(texts, results) if "coords" in r
+        ]
+        if not points:
+            return
+        with self._lock:
+            overflow = len(self._points) + len(points) - self.max_points
+            if overflow > 0:
+                self.stats["points_dropped"] += overflow
+            self._points.extend(points)
+            self._dirty = True
+
+    def flush(self) -> bool:
+        """Publish the pending delta, if any. Returns True when one was sent."""
+        with self._lock:
+            if not self._dirty:
+                return False
+            counts = {d: dict(c) for d, c in self._pending.items() if c}
+            for d, c in self._pending.items():
+                self._totals[d].update(c)
+                c.clear()
+            points = list(self._points)
+            self._points.clear()
+            self._dirty = False
+            self.seq += 1
+            delta = {"seq": self.seq, "counts": counts, "points": points}
+            self.stats["deltas"] += 1
+        self.publish("delta", delta)
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Totals as of the last published delta, with its sequence number."""
+        with self._lock:
+            return {"seq": self.seq, "counts": {d: dict(c) for d, c in self._totals.items()}}
+
+    def total(self) -> int:
+        with self._lock:
+            return sum(self._totals["category"].values()) + self._totals["duplicates"]["all"]
@@ -2,34 +2,245 @@
 Rail Saarthi - Indian Railways Complaint Intelligence API.
 Endpoints: classify, severity, cluster, trends, metrics, clustering visualization.
 """
+import asyncio
 import json
-import joblib
+import os
+import queue
+import signal
+import time
 import numpy as np
+from collections import Counter
+from contextlib import asynccontextmanager
 from typing import List, Optional
 from pathlib import Path
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from sklearn.decomposition import PCA
 
 from .config import (
     CATEGORIES,
     SEVERITY_LEVELS,
-    VECTORIZER_PATH,
-    CLASSIFIER_PATH,
-    CLUSTER_MODEL_PATH,
-    SEVERITY_MODEL_PATH,
-    METRICS_PATH,
+    MAX_BATCH_SIZE,
+    VIZ_MAX_POINTS,
+    STORE_PATH,
+    STORE_BATCH_SIZE,
+    STORE_FLUSH_INTERVAL,
+    SERVE_WORKERS,
+    ONLINE_LEARNING,
+    ONLINE_N_FEATURES,
+    ONLINE_BATCH_SIZE,
+    ONLINE_BATCH_WAIT,
+    ONLINE_SNAPSHOT_INTERVAL,
+    ONLINE_KEEP_SNAPSHOTS,
+    ONLINE_MIN_FEEDBACK,
+    ONLINE_BOOTSTRAP_MAX_RECORDS,
+    MICRO_BATCHING,
+    BATCH_MAX_SIZE,
+    BATCH_MAX_WAIT_MS,
+    BATCH_MAX_QUEUE,
+    DEDUP_ENABLED,
+    DEDUP_NUM_PERM,
+    DEDUP_BANDS,
+    DEDUP_THRESHOLD,
+    DEDUP_MAX_INCIDENTS,
+    DEDUP_TTL_SECONDS,
+    SIMILAR_ENABLED,
+    SIMILAR_MAX_DOCS,
+    SIMILAR_MAX_K,
+    ALERTS_ENABLED,
+    ALERT_BUCKET_SECONDS,
+    ALERT_BUCKETS,
+    ALERT_RECENT_BUCKETS,
+    ALERT_MIN_BASELINE_BUCKETS,
+    ALERT_Z_THRESHOLD,
+    ALERT_MIN_COUNT,
+    ALERT_SKETCH_WIDTH,
+    ALERT_SKETCH_DEPTH,
+    LIVE_INTERVAL,
+    LIVE_MAX_POINTS,
+    GZIP_MIN_BYTES,
+    METRICS_ENABLED,
+    TRACE_SAMPLE_RATE,
+    MAX_TRACES,
+    RESULT_CACHE_ENABLED,
+    RESULT_CACHE_MAX_ENTRIES,
+    RESULT_CACHE_TTL_SECONDS,
+    RESULT_CACHE_DB,
+    RESULT_CACHE_DB_MAX_ROWS,
 )
-from .preprocessing import preprocess_for_model, preprocess_batch
-from .severity import resolve_severity
+from .preprocessing import preprocess_batch, tokenize, cache_info as preprocess_cache_info
+from .severity import (
+    resolve_severity,
+    resolve_severity_batch,
+    get_severity_keyword_matches,
+    matches_to_dicts,
+)
+from .registry import LEGACY_VERSION, ModelRegistry, ModelNotAvailable, ModelSet, current_version
+from .viz import VizCache, build_points, downsample, etag_for, fit_projection, project
+from .store import ComplaintStore, WINDOWS
+from .batching import MicroBatcher, Overloaded
+from .dedup import NearDuplicateIndex
+from .similar import SimilarComplaints
+from .anomaly import SpikeDetector
+from .events import EventHub, gzip_stream
+from .live import LiveFeed
+from .result_cache import PredictionCache
+from .instrumentation import Instrumentation, InstrumentationMiddleware, SIZE_BUCKETS, span, trace_stages
+
+registry = ModelRegistry()
+_viz_cache = VizCache()
+store = ComplaintStore(STORE_PATH, batch_size=STORE_BATCH_SIZE, flush_interval=STORE_FLUSH_INTERVAL)
+online_learner = None  # OnlineLearner when RAIL_SAARTHI_ONLINE=1
+batcher = None  # MicroBatcher for single-complaint endpoints (set up in lifespan)
+supervisor_pid = None  # launcher PID when running as a pre-forked worker (serve.py)
+dedup_index = NearDuplicateIndex(
+    num_perm=DEDUP_NUM_PERM,
+    bands=DEDUP_BANDS,
+    threshold=DEDUP_THRESHOLD,
+    max_incidents=DEDUP_MAX_INCIDENTS,
+    ttl_seconds=DEDUP_TTL_SECONDS,
+) if DEDUP_ENABLED else None
+result_cache = PredictionCache(
+    max_entries=RESULT_CACHE_MAX_ENTRIES,
+    ttl_seconds=RESULT_CACHE_TTL_SECONDS,
+    shared_path=RESULT_CACHE_DB,
+    shared_max_rows=RESULT_CACHE_DB_MAX_ROWS,
+) if RESULT_CACHE_ENABLED else None
+if result_cache is not None:
+    # keys carry the model version; the swap only frees what the old version cached
+    registry.on_swap(lambda m: result_cache.invalidate(keep_version=m.version))
+similar = SimilarComplaints(store, preprocess_batch, max_docs=SIMILAR_MAX_DOCS) if SIMILAR_ENABLED else None
+if similar is not None:
+    # index follows the served model and every batch of stored complaints
+    registry.on_swap(lambda m: similar.attach(m.vectorizer, m.version))
+    store.on_flush(similar.catch_up)
+live_events = EventHub()  # server-sent events fan-out
+spike_detector = SpikeDetector(
+    bucket_seconds=ALERT_BUCKET_SECONDS,
+    n_buckets=ALERT_BUCKETS,
+    recent_buckets=ALERT_RECENT_BUCKETS,
+    z_threshold=ALERT_Z_THRESHOLD,
+    min_count=ALERT_MIN_COUNT,
+    min_baseline_seconds=ALERT_MIN_BASELINE_BUCKETS * ALERT_BUCKET_SECONDS,
+    sketch_width=ALERT_SKETCH_WIDTH,
+    sketch_depth=ALERT_SKETCH_DEPTH,
+    on_alert=lambda kind, alert: live_events.publish("alert", dict(alert, event=kind)),
+) if ALERTS_ENABLED else None
+# One process: every recorded complaint is counted as soon as it is analyzed (not on the
+# store flush). Several workers: each counts what all of them committed to the shared
+# store, so alerts and feed totals cover the whole traffic (up to a flush interval late)
+_observe = store.follow if SERVE_WORKERS > 1 else store.on_add
+if spike_detector is not None:
+    _observe(spike_detector.observe)
+live_feed = LiveFeed(live_events.publish, max_points=LIVE_MAX_POINTS)
+_observe(live_feed.record)
+registry.on_swap(lambda m: live_events.publish("model", _model_payload(m)))
+# versions without a stored viz get it computed off the request path
+registry.on_swap(lambda m: _viz_cache.warm(m, _compute_viz))
+instrumentation = Instrumentation(
+    enabled=METRICS_ENABLED, trace_sample_rate=TRACE_SAMPLE_RATE, max_traces=MAX_TRACES,
+    worker_label=SERVE_WORKERS > 1,
+)
+_stage_seconds = instrumentation.histogram(
+    "rail_saarthi_stage_duration_seconds", "Inference pipeline stage time per call", ("stage",)
+)
+_batch_items = instrumentation.histogram(
+    "rail_saarthi_inference_batch_size", "Complaints per inference pipeline call", buckets=SIZE_BUCKETS
+)
+_predictions = instrumentation.counter(
+    "rail_saarthi_predictions_total", "Predictions served (model, result cache or near-duplicate reuse), by category and severity",
+    ("category", "severity"),
+)
+_model_load_seconds = instrumentation.histogram(
+    "rail_saarthi_model_load_seconds", "Time to load a model version", ("artifact_format",),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+registry.on_swap(lambda m: _model_load_seconds.observe(m.load_seconds, m.artifact_format))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global batcher
+    # Load models eagerly so the first request does not pay for it
+    try:
+        registry.load()
+    except ModelNotAvailable as e:
+        print("Model registry:", e)
+    # totals and the follow position come from one snapshot, so with several workers no
+    # complaint is both in the loaded totals and delivered again by the store follower
+    live_feed.load(store.begin_following())
+    store.start()
+    live_publisher = asyncio.create_task(_publish_live_deltas())
+    alert_clock = None
+    if spike_detector is not None:
+        # resume the sliding windows from the complaints recorded before the restart
+        since = time.time() - ALERT_BUCKETS * ALERT_BUCKET_SECONDS
+        # (up to where the store follower starts, so no complaint is counted twice)
+        await run_in_threadpool(spike_detector.replay, store.iter_since(since, until_id=store.followed_id))
+        alert_clock = asyncio.create_task(_advance_alert_clock())
+    if ONLINE_LEARNING:
+        _start_online_learning()
+    if MICRO_BATCHING:
+        batcher = MicroBatcher(
+            _predict_batch,
+            max_batch_size=BATCH_MAX_SIZE,
+            max_wait_ms=BATCH_MAX_WAIT_MS,
+            max_queue=BATCH_MAX_QUEUE,
+        )
+        batcher.start()
+    yield
+    if batcher is not None:
+        await batcher.stop()
+        batcher = None
+    live_publisher.cancel()
+    if alert_clock is not None:
+        alert_clock.cancel()
+    if online_learner is not None:
+        online_learner.stop()
+    store.close()
+    if result_cache is not None:
+        result_cache.close()
+
+
+async def _publish_live_deltas():
+    """Coalesce analyzed complaints into one dashboard delta per interval."""
+    while True:
+        await asyncio.sleep(LIVE_INTERVAL)
+        live_feed.flush()
+
+
+async def _advance_alert_clock():
+    """Move the detector's windows forward while no complaints arrive, so quiet spikes resolve."""
+    while True:
+        await asyncio.sleep(min(5.0, ALERT_BUCKET_SECONDS / 4))
+        spike_detector.tick()
+
+
+def _start_online_learning():
+    global online_learner
+    from .online import OnlineLearner
+    online_learner = OnlineLearner(
+        registry,
+        n_features=ONLINE_N_FEATURES,
+        batch_size=ONLINE_BATCH_SIZE,
+        batch_wait=ONLINE_BATCH_WAIT,
+        snapshot_interval=ONLINE_SNAPSHOT_INTERVAL,
+        keep_snapshots=ONLINE_KEEP_SNAPSHOTS,
+        min_feedback=ONLINE_MIN_FEEDBACK,
+        bootstrap_max_records=ONLINE_BOOTSTRAP_MAX_RECORDS,
+    )
+    online_learner.start()  # bootstraps from the served version's training corpus on its own thread
+
 
 app = FastAPI(
     title="Rail Saarthi API",
     description="AI-driven complaint categorization & pattern detection for Indian Railways",
     version="1.0.0",
+    lifespan=lifespan,
 )
 app.add_middleware(
     CORSMiddleware,
@@ -38,143 +249,675 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# event streams compress themselves (see _event_stream); this covers the JSON payloads
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_BYTES)
+# outermost, so request latency includes compression
+app.add_middleware(InstrumentationMiddleware, instrumentation=instrumentation)
 
-# Lazy load models
-_vectorizer = _classifier = _cluster_model = _severity_model = _metrics = None
-
-
-def _load_models():
-    global _vectorizer, _classifier, _cluster_model, _severity_model, _metrics
-    if _vectorizer is None:
-        if not VECTORIZER_PATH.exists():
-            raise HTTPException(status_code=503, detail="Models not trained. Run: python backend/train.py")
-        _vectorizer = joblib.load(VECTORIZER_PATH)
-        _classifier = joblib.load(CLASSIFIER_PATH)
-        _cluster_model = joblib.load(CLUSTER_MODEL_PATH)
-        _severity_model = joblib.load(SEVERITY_MODEL_PATH)
-        if METRICS_PATH.exists():
-            with open(METRICS_PATH) as f:
-                _metrics = json.load(f)
-        else:
-            _metrics = {}
-    return _vectorizer, _classifier, _cluster_model, _severity_model, _metrics
+
+def _load_models() -> ModelSet:
+    """Snapshot of the active model set (one per request, so a hot-swap never mixes versions)."""
+    try:
+        return registry.get()
+    except ModelNotAvailable:
+        raise HTTPException(status_code=503, detail="Models not trained. Run: python backend/train.py")
 
 
 class ComplaintInput(BaseModel):
     text: str
+    station: Optional[str] = None
+    train_number: Optional[str] = None
 
 
 class BatchComplaintInput(BaseModel):
     texts: List[str]
+    # Optional per-text metadata, aligned with `texts`
+    stations: Optional[List[Optional[str]]] = None
+    train_numbers: Optional[List[Optional[str]]] = None
+
+
+def _predict_batch(texts: List[str]) -> List[dict]:
+    """Batch function behind the micro-batcher: one model snapshot for the whole batch."""
+    m = _load_models()
+    results, timings = _analyze_texts(texts, m)
+    batch = (timings, len(texts))  # for the traces of the requests in this batch
+    for r in results:
+        r["model_version"] = m.version
+        r["_batch"] = batch
+    return results
+
+
+async def _predict_one(text: str) -> dict:
+    """Prediction for one complaint, coalesced with concurrent requests when batching is on."""
+    with span("predict", micro_batched=batcher is not None):
+        if batcher is None:
+            r = (await run_in_threadpool(_predict_batch, [text]))[0]
+        else:
+            try:
+                r = await batcher.submit(text)
+            except Overloaded as e:
+                raise HTTPException(status_code=503, detail=f"Server busy: {e}", headers={"Retry-After": "1"})
+    timings, batch_size = r.pop("_batch")
+    trace_stages(timings, batch_size=batch_size)
+    return r
 
 
 @app.post("/api/classify", response_model=dict)
-def classify_complaint(body: ComplaintInput):
+async def classify_complaint(body: ComplaintInput):
     """Automatic complaint categorization."""
-    vec, clf, _, _, _ = _load_models()
     text = (body.text or "").strip()
     if not text:
         raise HTTPException(status_code=400, detail="Empty complaint text")
-    processed = preprocess_for_model(text)
-    X = vec.transform([processed])
-    pred = clf.predict(X)[0]
-    proba = getattr(clf, "predict_proba", None)
-    conf = float(np.max(proba(X)[0])) if proba else 1.0
-    return {"category": pred, "confidence": round(conf, 4), "all_categories": list(CATEGORIES)}
+    r = await _predict_one(text)
+    return {
+        "category": r["category"],
+        "confidence": r["confidence"],
+        "all_categories": list(CATEGORIES),
+        "model_version": r["model_version"],
+    }
 
 
 @app.post("/api/severity", response_model=dict)
-def get_severity(body: ComplaintInput):
+async def get_severity(body: ComplaintInput):
     """Severity tagging (low/medium/high/critical)."""
-    vec, _, _, sev_clf, _ = _load_models()
     text = (body.text or "").strip()
     if not text:
         raise HTTPException(status_code=400, detail="Empty complaint text")
-    processed = preprocess_for_model(text)
-    X = vec.transform([processed])
-    pred_idx = sev_clf.predict(X)[0]
-    pred_sev = SEVERITY_LEVELS[int(pred_idx)]
-    final = resolve_severity(pred_sev, text)
-    return {"severity": final, "levels": SEVERITY_LEVELS}
+    r = await _predict_one(text)
+    matched = matches_to_dicts(get_severity_keyword_matches(text))
+    return {
+        "severity": r["severity"],
+        "matched_keywords": matched,
+        "levels": SEVERITY_LEVELS,
+        "model_version": r["model_version"],
+    }
 
 
 @app.post("/api/analyze", response_model=dict)
-def analyze_complaint(body: ComplaintInput):
-    """Single endpoint: category + severity for one complaint."""
-    vec, clf, km, sev_clf, _ = _load_models()
+async def analyze_complaint(body: ComplaintInput):
+    """
+    Single endpoint: category + severity for one complaint.
+    Near-duplicates of an open incident reuse its cached prediction (same model version);
+    the model's severity is resolved against the severity keywords of the new text.
+    """
+    text = (body.text or "").strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="Empty complaint text")
+    incident, is_duplicate = None, False
+    if dedup_index is not None:
+        # tokenizing + MinHash is CPU work; keep it off the event loop
+        incident, is_duplicate, _ = await run_in_threadpool(_dedup_match, text)
+    cached = incident.result if is_duplicate else None
+    if cached is not None and incident.model_version == _load_models().version:
+        with span("severity_rules", cached_prediction=True):
+            # from the model's severity: the first complaint's keywords must not carry over
+            r = dict(cached, severity=resolve_severity(cached["ml_severity"], text))
+        _predictions.inc(r["category"], r["severity"])  # _analyze_texts counts the others
+    else:
+        r = await _predict_one(text)
+        if incident is not None and incident.result is None:
+            dedup_index.remember_result(incident, r, r["model_version"])
+    result = {
+        "category": r["category"],
+        "severity": r["severity"],
+        "cluster_id": r["cluster_id"],
+        "model_version": r["model_version"],
+    }
+    if "coords" in r:
+        result["coords"] = r["coords"]
+        live_feed.add_points([text], [r])
+    if incident is not None:
+        result["incident_id"] = incident.id
+        result["duplicate_count"] = incident.count - 1
+        result["is_duplicate"] = is_duplicate
+    with span("store"):  # buffered; the store's flusher thread writes it
+        store.add(
+            text, r["category"], r["severity"], r["cluster_id"],
+            station=body.station, train_number=body.train_number, model_version=r["model_version"],
+            incident_id=incident.id if incident is not None else None, is_duplicate=is_duplicate,
+        )
+    return result
+
+
+def _dedup_match(text: str):
+    with span("dedup"):
+        return dedup_index.match_or_add(tokenize(text), text)
+
+
+def _analyze_texts(texts: List[str], m: ModelSet):
+    """
+    Vectorized analysis for many complaints: one preprocessing pass, then one sparse
+    transform and one predict per model for the texts whose preprocessed form is not
+    in the result cache. Returns (results, stage timings in ms). Results also carry
+    "ml_severity", the model's severity before the keyword rules (not returned by the API).
+    """
+    timings = {}
+
+    t0 = time.perf_counter()
+    processed = preprocess_batch(texts)
+    t1 = time.perf_counter()
+    timings["preprocess_ms"] = (t1 - t0) * 1000
+
+    if result_cache is not None:
+        keys, entries = result_cache.get_many(processed, m.version)
+        timings["cache_ms"] = (time.perf_counter() - t1) * 1000
+    else:
+        keys, entries = None, [None] * len(texts)
+    # texts to score, one per distinct preprocessed form
+    todo = {}
+    for i, (p, e) in enumerate(zip(processed, entries)):
+        if e is None:
+            todo.setdefault(p, []).append(i)
+    if todo:
+        viz = _viz_cache.peek(m)  # None while the background viz computation runs: no coords yet
+        fresh = _run_models(list(todo), m, viz, timings)
+        for rows, e in zip(todo.values(), fresh):
+            for i in rows:
+                entries[i] = e
+        if result_cache is not None and viz is not None:
+            result_cache.put_many([keys[rows[0]] for rows in todo.values()], m.version, fresh)
+
+    t2 = time.perf_counter()
+    sevs = resolve_severity_batch([e[2] for e in entries], texts)
+    t3 = time.perf_counter()
+    timings["severity_rules_ms"] = (t3 - t2) * 1000
+    timings["total_ms"] = (t3 - t0) * 1000
+    _record_pipeline(timings, [e[0] for e in entries], sevs)
+
+    results = []
+    for e, sev in zip(entries, sevs):
+        r = {"category": e[0], "confidence": e[1], "severity": sev, "ml_severity": e[2], "cluster_id": e[3]}
+        if e[4] is not None:
+            r["coords"] = {"x": e[4], "y": e[5]}
+        results.append(r)
+    return results, {k: round(v, 3) for k, v in timings.items()}
+
+
+def _run_models(processed: List[str], m: ModelSet, viz: Optional[dict], timings: dict) -> list:
+    """
+    Model outputs for preprocessed texts, as result-cache entries (stage timings added in ms).
+    2D coordinates are None unless the version's viz payload (`viz`) is ready.
+    """
+    vec, clf, km, sev_clf = m.vectorizer, m.classifier, m.cluster_model, m.severity_model
+
+    t0 = time.perf_counter()
+    X = vec.transform(processed)
+    t1 = time.perf_counter()
+    timings["vectorize_ms"] = (t1 - t0) * 1000
+
+    # argmax of predict_proba is what predict() returns for NB, so one pass gives both
+    proba = clf.predict_proba(X)
+    best = np.argmax(proba, axis=1)
+    cats = clf.classes_[best]
+    confs = proba[np.arange(len(processed)), best]
+    t2 = time.perf_counter()
+    timings["category_ms"] = (t2 - t1) * 1000
+
+    sev_idx = sev_clf.predict(X)
+    t3 = time.perf_counter()
+    timings["severity_model_ms"] = (t3 - t2) * 1000
+
+    clusters = km.predict(X)
+    t4 = time.perf_counter()
+    timings["cluster_ms"] = (t4 - t3) * 1000
+
+    # 2D dashboard coordinates from the stored projection (no refit)
+    coords = project(viz["projection"], X) if viz is not None else None
+    t5 = time.perf_counter()
+    timings["projection_ms"] = (t5 - t4) * 1000
+
+    xy = coords[:, :2].tolist() if coords is not None else [(None, None)] * len(processed)
+    return [
+        (
+            str(cats[i]),
+            round(float(confs[i]), 4),
+            SEVERITY_LEVELS[int(sev_idx[i])],
+            int(clusters[i]),
+            round(x, 6) if x is not None else None,
+            round(y, 6) if y is not None else None,
+        )
+        for i, (x, y) in enumerate(xy)
+    ]
+
+
+def _record_pipeline(timings: dict, categories, severities) -> None:
+    """Stage histograms and prediction counts for one _analyze_texts call (timings in ms)."""
+    if not instrumentation.enabled:
+        return
+    for name, ms in timings.items():
+        if name != "total_ms":
+            _stage_seconds.observe(ms / 1000, name[:-3])
+    _batch_items.observe(len(severities))
+    for (category, severity), n in Counter(zip(categories, severities)).items():
+        _predictions.inc(category, severity, amount=n)
+
+
+@app.post("/api/analyze-batch", response_model=dict)
+def analyze_batch(body: BatchComplaintInput):
+    """Category, confidence, severity and cluster for many complaints in one call."""
+    if len(body.texts) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {MAX_BATCH_SIZE} texts)")
+    texts = [(t or "").strip() for t in body.texts]
+    for i, t in enumerate(texts):
+        if not t:
+            raise HTTPException(status_code=400, detail=f"Empty complaint text at index {i}")
+    for name in ("stations", "train_numbers"):
+        values = getattr(body, name)
+        if values is not None and len(values) != len(texts):
+            raise HTTPException(status_code=400, detail=f"'{name}' must have one entry per text")
+    m = _load_models()
+    if not texts:
+        return {"results": [], "count": 0, "timings": {}, "model_version": m.version}
+    results, timings = _analyze_texts(texts, m)
+    trace_stages(timings, batch_size=len(texts))
+    now = time.time()
+    incidents = [(None, False)] * len(texts)
+    if dedup_index is not None:
+        incidents = []
+        with span("dedup"):
+            for t, r in zip(texts, results):
+                incident, is_duplicate, _ = dedup_index.match_or_add(tokenize(t), t, now)
+                if incident is not None:
+                    if incident.result is None:
+                        dedup_index.remember_result(incident, dict(r, model_version=m.version), m.version)
+                    r["incident_id"] = incident.id
+                    r["is_duplicate"] = is_duplicate
+                incidents.append((incident.id if incident is not None else None, is_duplicate))
+    for r in results:
+        del r["ml_severity"]
+    live_feed.add_points(texts, results)
+    stations = body.stations or [None] * len(texts)
+    trains = body.train_numbers or [None] * len(texts)
+    with span("store"):
+        store.add_many([
+            (now, t, r["category"], r["severity"], r["cluster_id"], st, tr, m.version, inc_id, int(dup))
+            for t, r, st, tr, (inc_id, dup) in zip(texts, results, stations, trains, incidents)
+        ])
+    return {"results": results, "count": len(results), "timings": timings, "model_version": m.version}
+
+
+class SimilarInput(BaseModel):
+    text: str
+    k: int = 10
+
+
+@app.post("/api/similar", response_model=dict)
+def similar_complaints(body: SimilarInput):
+    """
+    Top-k most similar past complaints (cosine similarity of TF-IDF vectors), served
+    from an inverted index that grows as complaints are analyzed.
+    """
+    if similar is None:
+        raise HTTPException(status_code=503, detail="Similar-complaint search is disabled (RAIL_SAARTHI_SIMILAR=0)")
     text = (body.text or "").strip()
     if not text:
         raise HTTPException(status_code=400, detail="Empty complaint text")
-    processed = preprocess_for_model(text)
-    X = vec.transform([processed])
-    cat = clf.predict(X)[0]
-    sev_idx = sev_clf.predict(X)[0]
-    sev = resolve_severity(SEVERITY_LEVELS[int(sev_idx)], text)
-    cluster = int(km.predict(X)[0])
-    return {"category": cat, "severity": sev, "cluster_id": cluster}
+    if not 1 <= body.k <= SIMILAR_MAX_K:
+        raise HTTPException(status_code=400, detail=f"k must be between 1 and {SIMILAR_MAX_K}")
+    return similar.query(text, body.k)
+
+
+@app.get("/api/similar/status", response_model=dict)
+def similar_status():
+    """Similar-complaint index: size, rebuild state and query timings."""
+    if similar is None:
+        return {"enabled": False}
+    return {"enabled": True, **similar.status()}
 
 
 @app.post("/api/cluster-batch", response_model=dict)
 def cluster_batch(body: BatchComplaintInput):
     """Return cluster IDs for a list of complaints (for visualization)."""
-    vec, _, km, _, _ = _load_models()
+    m = _load_models()
+    km = m.cluster_model
     if not body.texts:
-        return {"labels": [], "n_clusters": km.n_clusters}
+        return {"labels": [], "n_clusters": km.n_clusters, "model_version": m.version}
     processed = preprocess_batch(body.texts)
-    X = vec.transform(processed)
+    X = m.vectorizer.transform(processed)
     labels = km.predict(X).tolist()
-    return {"labels": labels, "n_clusters": int(km.n_clusters)}
+    return {"labels": labels, "n_clusters": int(km.n_clusters), "model_version": m.version}
+
+
+def _compute_viz(m: ModelSet) -> dict:
+    """Viz payload for a model set: the one stored at train time, else computed once from training data."""
+    # top terms per cluster, stored by train.py (older versions and online snapshots have none)
+    labels = [c["terms"] for c in ((m.metrics or {}).get("clustering") or {}).get("labels", [])]
+    if m.viz is not None:
+        return {
+            "points": m.viz["points"], "n_clusters": int(m.cluster_model.n_clusters), "projection": m.projection,
+            "cluster_terms": labels,
+        }
+    from .data.sample_complaints import get_training_data
+    texts = [d["text"] for d in get_training_data()]
+    X = m.vectorizer.transform(preprocess_batch(texts))
+    projection, coords = fit_projection(X)
+    points = build_points(texts, coords, m.cluster_model.predict(X)) if projection is not None else []
+    return {
+        "points": points, "n_clusters": int(m.cluster_model.n_clusters), "projection": projection,
+        "cluster_terms": labels,
+    }
 
 
 @app.get("/api/clustering-viz", response_model=dict)
-def clustering_visualization():
+def clustering_visualization(
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    max_points: int = Query(VIZ_MAX_POINTS, ge=0, description="Downsample target (0 = all points)"),
+):
     """
     2D projection of complaint embeddings + cluster labels for dashboard.
-    Uses stored training data and current vectorizer/cluster model.
+    Served from the projection stored at train time; supports downsampling,
+    pagination and ETag revalidation (If-None-Match -> 304).
     """
-    from .data.sample_complaints import get_training_data
-    vec, _, km, _, _ = _load_models()
-    data = get_training_data()
-    texts = [d["text"] for d in data]
-    processed = preprocess_batch(texts)
-    X = vec.transform(processed)
-    labels = km.predict(X)
-    # PCA to 2D for scatter plot
-    n_components = min(2, X.shape[1], X.shape[0] - 1)
-    if n_components < 2:
-        return {"points": [], "n_clusters": int(km.n_clusters)}
-    pca = PCA(n_components=2, random_state=42)
-    coords = pca.fit_transform(X.toarray())
-    points = [
-        {"x": float(coords[i, 0]), "y": float(coords[i, 1]), "cluster": int(labels[i]), "text": texts[i][:80]}
-        for i in range(len(texts))
-    ]
-    return {"points": points, "n_clusters": int(km.n_clusters)}
+    m = _load_models()
+    etag = etag_for(m.version, offset, limit, max_points)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    viz = _viz_cache.get(m, _compute_viz)
+    points = downsample(viz["points"], max_points)
+    page = points[offset:offset + limit] if limit else points[offset:]
+    return JSONResponse(
+        {
+            "points": page,
+            "n_clusters": viz["n_clusters"],
+            "cluster_terms": viz["cluster_terms"],
+            "total_points": len(viz["points"]),
+            "sampled_points": len(points),
+            "offset": offset,
+            "model_version": m.version,
+        },
+        headers=headers,
+    )
 
 
 @app.get("/api/trends", response_model=dict)
-def complaint_trends():
-    """Aggregate counts by category and severity for dashboard trends."""
+def complaint_trends(
+    window: str = Query("all", description="hour | day | week | all"),
+    station: Optional[str] = None,
+    train_number: Optional[str] = None,
+):
+    """
+    Aggregate counts by category, severity and cluster for dashboard trends.
+    Served from incrementally maintained counters of analyzed complaints; falls
+    back to the sample data until any complaint has been recorded. Near-duplicates
+    of an open incident count once, under "duplicates", not in the breakdowns.
+    """
+    if window not in WINDOWS:
+        raise HTTPException(status_code=400, detail=f"window must be one of {list(WINDOWS)}")
+    if station and train_number:
+        raise HTTPException(status_code=400, detail="Filter by station or by train_number, not both")
+    if store.count() == 0 and not (station or train_number):
+        return _trends_payload(_sample_counts(), window, "sample")
+    return _trends_payload(store.trends(window, station=station, train_number=train_number), window, "store")
+
+
+def _sample_counts() -> dict:
+    """Trend counts of the bundled sample data (shown until the first complaint is analyzed)."""
     from .data.sample_complaints import get_training_data
-    data = get_training_data()
-    by_cat = {}
-    by_sev = {}
-    for d in data:
+    by_cat, by_sev = {}, {}
+    for d in get_training_data():
         by_cat[d["category"]] = by_cat.get(d["category"], 0) + 1
         by_sev[d["severity"]] = by_sev.get(d["severity"], 0) + 1
+    return {"category": by_cat, "severity": by_sev, "cluster": {}, "duplicates": {}}
+
+
+def _trends_payload(counts: dict, window: str, source: str) -> dict:
+    return {
+        "by_category": [{"category": k, "count": v} for k, v in sorted(counts["category"].items())],
+        "by_severity": [{"severity": k, "count": v} for k, v in sorted(counts["severity"].items())],
+        "by_cluster": [{"cluster": int(k), "count": v} for k, v in sorted(counts["cluster"].items(), key=lambda kv: int(kv[0]))],
+        "total": sum(counts["category"].values()),
+        "duplicates": counts["duplicates"].get("all", 0),
+        "window": window,
+        "source": source,
+    }
+
+
+def _model_payload(m: ModelSet) -> dict:
     return {
-        "by_category": [{"category": k, "count": v} for k, v in sorted(by_cat.items())],
-        "by_severity": [{"severity": k, "count": v} for k, v in sorted(by_sev.items())],
+        "model_version": m.version,
+        "metrics": m.metrics or {"category": {}, "severity": {}, "clustering": {}},
+        "n_clusters": int(m.cluster_model.n_clusters),
     }
 
 
+def _event_stream(request: Request, stream) -> StreamingResponse:
+    """SSE response, gzipped per event when the client accepts it (GZipMiddleware would buffer)."""
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        stream = gzip_stream(stream)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(stream, media_type="text/event-stream", headers=headers)
+
+
+def _live_snapshot() -> dict:
+    """Everything a dashboard shows, except the cluster points (fetched once, ETag-cached)."""
+    snapshot = live_feed.snapshot()
+    counts = snapshot["counts"]
+    source = "store"
+    if live_feed.total() == 0:
+        counts, source = _sample_counts(), "sample"
+    try:
+        model = _model_payload(registry.get())
+    except ModelNotAvailable:
+        model = {"model_version": None, "metrics": {"category": {}, "severity": {}, "clustering": {}}, "n_clusters": 0}
+    return {
+        "seq": snapshot["seq"],
+        "trends": _trends_payload(counts, "all", source),
+        **model,
+        "alerts": spike_detector.alerts() if spike_detector is not None else [],
+    }
+
+
+@app.get("/api/live")
+async def live_feed_stream(request: Request):
+    """
+    Server-sent events for dashboards: a "snapshot", then "delta" (count increments and
+    new 2D points, coalesced), "alert" and "model" (after a hot-swap) events.
+    """
+    return _event_stream(request, live_events.stream(initial=lambda: {"snapshot": _live_snapshot()}))
+
+
 @app.get("/api/metrics", response_model=dict)
 def evaluation_metrics():
-    """Accuracy and F1 for category and severity models."""
-    _, _, _, _, metrics = _load_models()
+    """Accuracy and F1 for category and severity models; cluster quality, top terms and fit time."""
+    metrics = _load_models().metrics
     return metrics if metrics else {"category": {}, "severity": {}, "clustering": {}}
 
 
+class FeedbackInput(BaseModel):
+    text: str
+    category: str
+    severity: Optional[str] = None
+
+
+@app.post("/api/feedback", response_model=dict)
+def submit_feedback(body: FeedbackInput):
+    """
+    Labelled correction from the complaint desk. Applied to the online models in
+    micro-batches and served after the next snapshot, once ONLINE_MIN_FEEDBACK corrections
+    have been applied (online mode only).
+    """
+    if online_learner is None:
+        raise HTTPException(status_code=503, detail="Online learning is disabled. Start the API with RAIL_SAARTHI_ONLINE=1")
+    text = (body.text or "").strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="Empty complaint text")
+    if body.category not in CATEGORIES:
+        raise HTTPException(status_code=400, detail=f"category must be one of {CATEGORIES}")
+    if body.severity is not None and body.severity not in SEVERITY_LEVELS:
+        raise HTTPException(status_code=400, detail=f"severity must be one of {SEVERITY_LEVELS}")
+    try:
+        queued = online_learner.submit([{"text": text, "category": body.category, "severity": body.severity}])
+    except queue.Full:
+        raise HTTPException(status_code=503, detail="Feedback queue full, retry later")
+    return {"accepted": True, "queued": queued}
+
+
+@app.get("/api/online", response_model=dict)
+def online_status():
+    """Online learning counters: applied feedback, batch/snapshot timings, prequential accuracy."""
+    if online_learner is None:
+        return {"enabled": False}
+    return {"enabled": True, **online_learner.status()}
+
+
+@app.get("/api/batching", response_model=dict)
+def batching_stats():
+    """Micro-batcher metrics: queue depth, batch sizes, wait and processing times."""
+    if batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
+
+
+@app.get("/api/result-cache", response_model=dict)
+def result_cache_stats():
+    """Prediction result cache: hits (local and shared tier), misses, size and evictions."""
+    if result_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **result_cache.status()}
+
+
+@app.get("/api/incidents", response_model=dict)
+def list_incidents(limit: int = Query(20, ge=1, le=500)):
+    """Most-reported open incidents (groups of near-duplicate complaints) and index stats."""
+    if dedup_index is None:
+        return {"enabled": False, "incidents": []}
+    return {"enabled": True, "incidents": dedup_index.top(limit), "index": dedup_index.stats()}
+
+
+@app.get("/api/alerts", response_model=dict)
+def list_alerts(include_resolved: bool = False, limit: int = Query(50, ge=1, le=200)):
+    """
+    Spikes in category, severity, cluster, train or station counts (newest first),
+    flagged by the streaming detector as complaints are analyzed.
+    """
+    if spike_detector is None:
+        return {"enabled": False, "alerts": []}
+    return {
+        "enabled": True,
+        "alerts": spike_detector.alerts(include_resolved=include_resolved, limit=limit),
+        "detector": spike_detector.status(),
+    }
+
+
+@app.get("/api/alerts/stream")
+async def stream_alerts(request: Request):
+    """Server-sent events: the active alerts first, then every alert as it opens or resolves."""
+    if spike_detector is None:
+        raise HTTPException(status_code=503, detail="Alerts are disabled (RAIL_SAARTHI_ALERTS=0)")
+    stream = live_events.stream(events=["alert"], initial=lambda: {"alerts": spike_detector.alerts()})
+    return _event_stream(request, stream)
+
+
+class ReloadInput(BaseModel):
+    version: Optional[str] = None
+
+
+@app.get("/api/models", response_model=dict)
+def model_status():
+    """Active model version, available versions and load times."""
+    return registry.status()
+
+
+@app.post("/api/models/reload", response_model=dict)
+def reload_models(body: ReloadInput):
+    """
+    Hot-swap to a model version (default: the one named in models/CURRENT).
+    In-flight requests finish on the previous set; new requests see the new one.
+    Under the pre-fork launcher, the launcher loads CURRENT once and replaces every
+    worker, so other versions must be named in CURRENT first.
+    """
+    if supervisor_pid is not None:
+        target = current_version() or LEGACY_VERSION
+        if body.version not in (None, target):
+            raise HTTPException(
+                status_code=409,
+                detail=f"Workers serve models/CURRENT ({target}); write {body.version!r} to it, then reload",
+            )
+        os.kill(supervisor_pid, signal.SIGHUP)
+        return {"version": target, "rolling_restart": True}
+    try:
+        new = registry.load(body.version)
+    except ModelNotAvailable as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"version": new.version, "load_seconds": round(new.load_seconds, 4)}
+
+
+def _collect_metrics():
+    """Gauges and counters owned by other components, read at scrape time."""
+    yield ("rail_saarthi_instrumentation_enabled", "gauge", "1 while request metrics are recorded", {}, int(instrumentation.enabled))
+    status = registry.status()["active"]
+    if status is not None:
+        yield ("rail_saarthi_model_info", "gauge", "Active model version", {"version": status["version"], "artifact_format": status["artifact_format"]}, 1)
+        yield ("rail_saarthi_model_loaded_timestamp_seconds", "gauge", "When the active model version was loaded", {}, status["loaded_at"])
+    cache = preprocess_cache_info()
+    yield ("rail_saarthi_preprocess_cache_hits_total", "counter", "Preprocessing cache hits", {}, cache["hits"])
+    yield ("rail_saarthi_preprocess_cache_misses_total", "counter", "Preprocessing cache misses", {}, cache["misses"])
+    yield ("rail_saarthi_preprocess_cache_entries", "gauge", "Texts in the preprocessing cache", {}, cache["size"])
+    if batcher is not None:
+        b = batcher.stats()
+        yield ("rail_saarthi_batcher_queue_depth", "gauge", "Requests waiting for a micro-batch", {}, b["queue_depth"])
+        yield ("rail_saarthi_batcher_batches_total", "counter", "Micro-batches run", {}, b["batches"])
+        yield ("rail_saarthi_batcher_rejected_total", "counter", "Requests shed with HTTP 503 (queue full)", {}, b["rejected"])
+    if result_cache is not None:
+        rc = result_cache.status()
+        yield ("rail_saarthi_result_cache_hits_total", "counter", "Predictions served from the result cache", {"tier": "local"}, rc["hits"])
+        yield ("rail_saarthi_result_cache_hits_total", "counter", "Predictions served from the result cache", {"tier": "shared"}, rc["shared_hits"])
+        yield ("rail_saarthi_result_cache_misses_total", "counter", "Result cache misses (models run)", {}, rc["misses"])
+        yield ("rail_saarthi_result_cache_entries", "gauge", "Predictions in the local result cache", {}, rc["entries"])
+    if dedup_index is not None:
+        d = dedup_index.stats()
+        yield ("rail_saarthi_dedup_lookups_total", "counter", "Near-duplicate index lookups", {}, d["lookups"])
+        yield ("rail_saarthi_dedup_duplicates_total", "counter", "Complaints that joined an open incident", {}, d["duplicates"])
+        yield ("rail_saarthi_dedup_incidents", "gauge", "Open incidents in the near-duplicate index", {}, d["incidents"])
+    if similar is not None:
+        yield ("rail_saarthi_similar_indexed", "gauge", "Complaints in the similar-complaint index", {}, similar.status()["indexed"])
+    if spike_detector is not None:
+        yield ("rail_saarthi_alerts_active", "gauge", "Open spike alerts", {}, spike_detector.status()["active_alerts"])
+    yield ("rail_saarthi_sse_subscribers", "gauge", "Open server-sent event streams", {}, live_events.subscribers)
+    yield ("rail_saarthi_sse_dropped_total", "counter", "Events dropped for slow stream clients", {}, live_events.stats["dropped"])
+
+
+instrumentation.collector(_collect_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus scrape endpoint (text exposition format)."""
+    return PlainTextResponse(instrumentation.render(), media_type="text/plain; version=0.0.4")
+
+
+class InstrumentationInput(BaseModel):
+    enabled: Optional[bool] = None
+    trace_sample_rate: Optional[float] = None
+
+
+@app.get("/api/instrumentation", response_model=dict)
+def instrumentation_status():
+    """Whether metrics are recorded, the trace sampling rate and trace counts."""
+    return instrumentation.status()
+
+
+@app.post("/api/instrumentation", response_model=dict)
+def configure_instrumentation(body: InstrumentationInput):
+    """Switch metrics recording on/off and set the trace sampling rate (0-1) without a restart."""
+    try:
+        instrumentation.configure(enabled=body.enabled, trace_sample_rate=body.trace_sample_rate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return instrumentation.status()
+
+
+@app.get("/api/traces", response_model=dict)
+def recent_traces(limit: int = Query(50, ge=1, le=200)):
+    """Most recent sampled request traces (newest first) with their timed spans."""
+    return {"traces": instrumentation.traces(limit), **instrumentation.status()}
+
+
 @app.get("/api/categories")
 def list_categories():
     return {"categories": CATEGORIES}
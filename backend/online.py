@@ -0,0 +1,326 @@
+"""
+Online (incremental) learning mode.
+
+A stateless HashingVectorizer plus partial_fit models (MultinomialNB for category,
+SGDClassifier for severity, MiniBatchKMeans for clusters) absorb labelled feedback
+in micro-batches, so corrections from the complaint desk reach production within
+seconds instead of waiting for a full retrain. Periodic snapshots are written as
+model versions named "online-<timestamp>" (with a 2D projection for the cluster viz).
+
+The models are first fitted on the corpus the served batch version was trained on, and
+that batch version keeps serving until min_feedback corrections have been applied;
+only then are snapshots swapped into the registry.
+"""
+import copy
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import deque
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import joblib
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
+
+from .config import (
+    BASE_DIR,
+    CATEGORIES,
+    SEVERITY_LEVELS,
+    VERSIONS_DIR,
+    VECTORIZER_FILE,
+    CLASSIFIER_FILE,
+    CLUSTER_MODEL_FILE,
+    SEVERITY_MODEL_FILE,
+    METRICS_FILE,
+    PROJECTION_FILE,
+    CLUSTER_VIZ_FILE,
+)
+from .preprocessing import preprocess_batch
+from .clustering import choose_k
+from .corpus import chunked, iter_records
+from .registry import ModelNotAvailable, ModelRegistry, ModelSet, load_model_set
+from .viz import build_points, fit_projection
+
+ONLINE_PREFIX = "online-"
+BOOTSTRAP_CHUNK = 5000  # records per partial_fit call while bootstrapping
+VIZ_SAMPLE = 2000  # newest texts kept to fit each snapshot's 2D projection
+
+
+def new_models(n_features: int, n_clusters: int):
+    vectorizer = HashingVectorizer(
+        n_features=n_features,
+        ngram_range=(1, 2),
+        alternate_sign=False,  # MultinomialNB needs non-negative features
+        norm="l2",
+    )
+    classifier = MultinomialNB(alpha=0.1)
+    severity_model = SGDClassifier(loss="log_loss", random_state=42)
+    cluster_model = MiniBatchKMeans(n_clusters=n_clusters, random_state=42, n_init=3)
+    return vectorizer, classifier, severity_model, cluster_model
+
+
+def training_records(models: Optional[ModelSet]) -> Iterator[Dict[str, Any]]:
+    """Labelled records of the corpus a batch version was trained on (the sample data if unknown or missing)."""
+    corpus = ((models.metrics or {}).get("training") or {}).get("corpus") if models is not None else None
+    if corpus and corpus != "sample_complaints":
+        # train.py runs from backend/, so older versions recorded paths relative to it
+        for path in (Path(corpus), BASE_DIR / corpus):
+            if path.exists():
+                return iter_records(path)
+        print(f"Online learning: training corpus {corpus} not found; bootstrapping from the sample data")
+    from .data.sample_complaints import get_training_data
+    return iter(get_training_data())
+
+
+def latest_snapshot() -> Optional[str]:
+    if not VERSIONS_DIR.exists():
+        return None
+    names = sorted(p.name for p in VERSIONS_DIR.iterdir() if p.name.startswith(ONLINE_PREFIX) and (p / VECTORIZER_FILE).exists())
+    return names[-1] if names else None
+
+
+class OnlineLearner:
+    """
+    Owns the mutable online models. Feedback is queued by request handlers and applied
+    by one background thread; serving only ever sees deep-copied snapshots.
+    """
+
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        n_features: int = 2**18,
+        batch_size: int = 64,
+        batch_wait: float = 0.5,
+        snapshot_interval: float = 30.0,
+        keep_snapshots: int = 3,
+        min_feedback: int = 200,
+        bootstrap_max_records: int = 200_000,
+        max_queue: int = 10000,
+    ):
+        self.registry = registry
+        self.n_features = n_features
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.snapshot_interval = snapshot_interval
+        self.keep_snapshots = keep_snapshots
+        self.min_feedback = min_feedback
+        self.bootstrap_max_records = bootstrap_max_records
+        self._viz_texts: "deque[str]" = deque(maxlen=VIZ_SAMPLE)
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()  # guards the mutable models
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._models = None  # (vectorizer, classifier, severity_model, cluster_model)
+        self._dirty = False
+        self._last_snapshot = time.monotonic()
+        self.stats = {
+            "bootstrap_records": 0,
+            "feedback": 0,
+            "serving": False,
+            "applied": 0,
+            "batches": 0,
+            "snapshots": 0,
+            "last_batch_ms": None,
+            "last_snapshot_ms": None,
+            "last_snapshot_version": None,
+            "prequential_correct": 0,
+            "prequential_total": 0,
+        }
+
+    # ---- lifecycle ----
+
+    def bootstrap(self, records: Optional[Iterable[Dict[str, Any]]] = None) -> None:
+        """
+        Resume from the newest online snapshot unless the served batch version is newer,
+        else fit fresh models on `records` (default: the served version's training corpus).
+        """
+        try:
+            active = self.registry.get()
+        except ModelNotAvailable:
+            active = None
+        name = latest_snapshot()
+        if name is not None and (active is None or (VERSIONS_DIR / name).stat().st_mtime >= active.path.stat().st_mtime):
+            m = load_model_set(name)
+            self._models = (m.vectorizer, m.classifier, m.severity_model, m.cluster_model)
+            self.stats["feedback"] = int((m.metrics.get("online") or {}).get("feedback", 0))
+            self.stats["last_snapshot_version"] = name
+            self._viz_texts.extend(p["text"] for p in (m.viz or {}).get("points", []))
+            self._install_if_ready(m)
+            return
+        if records is None:
+            records = training_records(active)
+        # keep the served version's cluster count (no silhouette search without one)
+        n_clusters = int(active.cluster_model.n_clusters) if active is not None else None
+        for chunk in chunked(islice(records, self.bootstrap_max_records), BOOTSTRAP_CHUNK):
+            chunk = [r for r in chunk if r.get("text") and r.get("category") in CATEGORIES]
+            if not chunk:
+                continue
+            if self._models is None:
+                if n_clusters is None:
+                    vectorizer = new_models(self.n_features, 1)[0]  # stateless
+                    n_clusters, _ = choose_k(vectorizer.transform(preprocess_batch([r["text"] for r in chunk])))
+                self._models = new_models(self.n_features, n_clusters)
+            self._apply(chunk, feedback=False)
+            self.stats["bootstrap_records"] += len(chunk)
+        if self._models is None:
+            print("Online learning: no labelled records in the training corpus; bootstrapping from the sample data")
+            from .data.sample_complaints import get_training_data
+            self.bootstrap(get_training_data())
+
+    def start(self, records: Optional[Iterable[Dict[str, Any]]] = None) -> None:
+        """Bootstrap (unless already done) and apply feedback on a background thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(records,), name="online-learner", daemon=True)
+            self._thread.start()
+
+    def _run(self, records) -> None:
+        if self._models is None:
+            t0 = time.perf_counter()
+            self.bootstrap(records)
+            self.stats["bootstrap_seconds"] = round(time.perf_counter() - t0, 3)
+        self._loop()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._dirty:
+            self.snapshot()
+
+    # ---- feedback ----
+
+    def submit(self, items: List[Dict[str, Any]]) -> int:
+        """Queue labelled feedback ({text, category, severity?}); raises queue.Full under overload."""
+        for item in items:
+            self._queue.put_nowait(item)
+        return self._queue.qsize()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            batch = []
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if batch:
+                self._apply(batch)
+            if self._dirty and time.monotonic() - self._last_snapshot >= self.snapshot_interval:
+                self.snapshot()
+
+    def _apply(self, items: List[Dict[str, Any]], feedback: bool = True) -> None:
+        """partial_fit on labelled items; `feedback` items (not bootstrap records) are also scored first."""
+        t0 = time.perf_counter()
+        texts = [it["text"] for it in items]
+        cats = np.array([it["category"] for it in items])
+        sev_rows = [i for i, it in enumerate(items) if it.get("severity") in SEVERITY_LEVELS]
+        with self._lock:
+            vectorizer, classifier, severity_model, cluster_model = self._models
+            X = vectorizer.transform(preprocess_batch(texts))
+            if feedback and hasattr(classifier, "classes_"):
+                # prequential accuracy: score each item before learning from it
+                self.stats["prequential_correct"] += int((classifier.predict(X) == cats).sum())
+                self.stats["prequential_total"] += len(items)
+            classifier.partial_fit(X, cats, classes=CATEGORIES)
+            if sev_rows:
+                y_sev = np.array([SEVERITY_LEVELS.index(items[i]["severity"]) for i in sev_rows])
+                severity_model.partial_fit(X[sev_rows], y_sev, classes=np.arange(len(SEVERITY_LEVELS)))
+            if hasattr(cluster_model, "cluster_centers_") or X.shape[0] >= cluster_model.n_clusters:
+                cluster_model.partial_fit(X)
+            self._viz_texts.extend(texts)
+            self._dirty = True
+        if feedback:
+            self.stats["feedback"] += len(items)
+        self.stats["applied"] += len(items)
+        self.stats["batches"] += 1
+        self.stats["last_batch_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+
+    # ---- snapshots ----
+
+    def snapshot(self) -> str:
+        """
+        Persist a copy of the current models as a new version; it is swapped into serving
+        once min_feedback corrections have been applied.
+        """
+        t0 = time.perf_counter()
+        with self._lock:
+            vectorizer, classifier, severity_model, cluster_model = copy.deepcopy(self._models)
+            viz_texts = list(self._viz_texts)
+            self._dirty = False
+        version = ONLINE_PREFIX + time.strftime("%Y%m%d-%H%M%S") + f"-{self.stats['snapshots']:04d}"
+        out_dir = VERSIONS_DIR / version
+        tmp_dir = VERSIONS_DIR / ("." + version)
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        joblib.dump(vectorizer, tmp_dir / VECTORIZER_FILE)
+        joblib.dump(classifier, tmp_dir / CLASSIFIER_FILE)
+        joblib.dump(severity_model, tmp_dir / SEVERITY_MODEL_FILE)
+        joblib.dump(cluster_model, tmp_dir / CLUSTER_MODEL_FILE)
+        # 2D projection of recent texts, so serving never refits one for this version
+        X = vectorizer.transform(preprocess_batch(viz_texts))
+        projection, coords = fit_projection(X)
+        viz = None
+        if projection is not None:
+            viz = {"points": build_points(viz_texts, coords, cluster_model.predict(X)), "n_clusters": int(cluster_model.n_clusters)}
+            joblib.dump(projection, tmp_dir / PROJECTION_FILE)
+            with open(tmp_dir / CLUSTER_VIZ_FILE, "w") as f:
+                json.dump(viz, f)
+        metrics = {"category": {}, "severity": {}, "clustering": {"n_clusters": int(cluster_model.n_clusters)},
+                   "model_version": version, "online": self.status()}
+        with open(tmp_dir / METRICS_FILE, "w") as f:
+            json.dump(metrics, f, indent=2)
+        os.replace(tmp_dir, out_dir)  # the version appears complete or not at all
+        self._install_if_ready(ModelSet(
+            version=version,
+            vectorizer=vectorizer,
+            classifier=classifier,
+            cluster_model=cluster_model,
+            severity_model=severity_model,
+            metrics=metrics,
+            projection=projection,
+            viz=viz,
+            path=out_dir,
+            loaded_at=time.time(),
+            load_seconds=0.0,
+        ))
+        self._last_snapshot = time.monotonic()
+        self.stats["snapshots"] += 1
+        self.stats["last_snapshot_version"] = version
+        self.stats["last_snapshot_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+        self._prune(keep=version)
+        return version
+
+    def _install_if_ready(self, m: ModelSet) -> None:
+        """Serve an online version only after enough feedback; until then the batch version stays."""
+        if self.stats["feedback"] >= self.min_feedback:
+            self.registry.install(m)
+            self.stats["serving"] = True
+
+    def _prune(self, keep: str) -> None:
+        names = sorted(p.name for p in VERSIONS_DIR.iterdir() if p.name.startswith(ONLINE_PREFIX))
+        for name in names[:-self.keep_snapshots]:
+            if name != keep:
+                shutil.rmtree(VERSIONS_DIR / name, ignore_errors=True)
+
+    def status(self) -> Dict[str, Any]:
+        st = dict(self.stats)
+        total = st.pop("prequential_total")
+        correct = st.pop("prequential_correct")
+        st["queued"] = self._queue.qsize()
+        st["prequential_accuracy"] = round(correct / total, 4) if total else None
+        st["prequential_samples"] = total
+        st["min_feedback"] = self.min_feedback
+        return st
@@ -3,41 +3,51 @@ Text Preprocessing Pipeline for Railway Complaints.
 Handles cleaning, normalization, and vectorization-ready text.
 """
 import re
-import string
-from typing import List, Optional
-
-# Try NLTK; fallback to simple tokenization
-try:
-    import nltk
-    from nltk.corpus import stopwords
-    from nltk.tokenize import word_tokenize
-    try:
-        stopwords.words("english")
-    except LookupError:
-        nltk.download("stopwords", quiet=True)
-        nltk.download("punkt", quiet=True)
-    _HAS_NLTK = True
-except Exception:
-    _HAS_NLTK = False
-
-# Fallback stopwords if NLTK unavailable
-FALLBACK_STOPWORDS = {
-    "i", "me", "my", "myself", "we", "our", "ours", "ourselves",
-    "you", "your", "yours", "yourself", "yourselves", "he", "him",
-    "his", "himself", "she", "her", "hers", "herself", "it", "its",
-    "itself", "they", "them", "their", "theirs", "themselves",
-    "what", "which", "who", "whom", "this", "that", "these", "those",
-    "am", "is", "are", "was", "were", "be", "been", "being", "have",
-    "has", "had", "having", "do", "does", "did", "doing", "a", "an",
-    "the", "and", "but", "if", "or", "because", "as", "until", "while",
-    "of", "at", "by", "for", "with", "about", "against", "between",
-    "into", "through", "during", "before", "after", "above", "below",
-    "to", "from", "up", "down", "in", "out", "on", "off", "over",
-    "again", "further", "then", "once", "here", "there", "when",
-    "where", "why", "how", "all", "each", "few", "more", "most",
-    "other", "some", "such", "no", "nor", "not", "only", "own",
-    "same", "so", "than", "too", "very", "s", "t", "can", "will",
-    "just", "don", "should", "now",
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional
+
+# Max entries in the preprocessing LRU cache (duplicate complaints are common)
+PREPROCESS_CACHE_SIZE = 50000
+
+# NLTK's English stopword list (nltk 3.8), inlined so that preprocessing never imports
+# NLTK or downloads corpora at runtime, and training and serving always agree
+STOPWORDS = frozenset({
+    "i", "me", "my", "myself", "we", "our", "ours", "ourselves", "you", "you're",
+    "you've", "you'll", "you'd", "your", "yours", "yourself", "yourselves", "he",
+    "him", "his", "himself", "she", "she's", "her", "hers", "herself", "it", "it's",
+    "its", "itself", "they", "them", "their", "theirs", "themselves", "what", "which",
+    "who", "whom", "this", "that", "that'll", "these", "those", "am", "is", "are",
+    "was", "were", "be", "been", "being", "have", "has", "had", "having", "do", "does",
+    "did", "doing", "a", "an", "the", "and", "but", "if", "or", "because", "as",
+    "until", "while", "of", "at", "by", "for", "with", "about", "against", "between",
+    "into", "through", "during", "before", "after", "above", "below", "to", "from",
+    "up", "down", "in", "out", "on", "off", "over", "under", "again", "further",
+    "then", "once", "here", "there", "when", "where", "why", "how", "all", "any",
+    "both", "each", "few", "more", "most", "other", "some", "such", "no", "nor", "not",
+    "only", "own", "same", "so", "than", "too", "very", "s", "t", "can", "will",
+    "just", "don", "don't", "should", "should've", "now", "d", "ll", "m", "o", "re",
+    "ve", "y", "ain", "aren", "aren't", "couldn", "couldn't", "didn", "didn't",
+    "doesn", "doesn't", "hadn", "hadn't", "hasn", "hasn't", "haven", "haven't", "isn",
+    "isn't", "ma", "mightn", "mightn't", "mustn", "mustn't", "needn", "needn't",
+    "shan", "shan't", "shouldn", "shouldn't", "wasn", "wasn't", "weren", "weren't",
+    "won", "won't", "wouldn", "wouldn't",
+})
+
+# Precompiled cleaning patterns (applied in this order)
+_URL_RE = re.compile(r"https?://\S+|www\.\S+")
+_EMAIL_RE = re.compile(r"\S+@\S+\.\S+")
+_DIGIT_OR_PUNCT_RE = re.compile(r"\d+|[^\w\s]+")
+
+# After clean_text only word characters and single spaces remain, so NLTK's
+# word_tokenize reduces to a whitespace split plus its MacIntyre contraction rules
+# (applied here without importing NLTK).
+_NLTK_CONTRACTIONS = {
+    "cannot": ("can", "not"),
+    "gimme": ("gim", "me"),
+    "gonna": ("gon", "na"),
+    "gotta": ("got", "ta"),
+    "lemme": ("lem", "me"),
+    "wanna": ("wan", "na"),
 }
 
 
@@ -48,42 +58,73 @@ def clean_text(text: str) -> str:
     # Lowercase
     text = text.lower().strip()
     # Remove URLs
-    text = re.sub(r"https?://\S+|www\.\S+", " ", text)
+    text = _URL_RE.sub(" ", text)
     # Remove email-like patterns (keep context)
-    text = re.sub(r"\S+@\S+\.\S+", " ", text)
-    # Replace numbers with placeholder to retain "train number" etc. sense
-    text = re.sub(r"\d+", " ", text)
-    # Remove extra whitespace and punctuation runs
-    text = re.sub(r"[^\w\s]", " ", text)
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+    text = _EMAIL_RE.sub(" ", text)
+    # Drop numbers and punctuation runs, then collapse whitespace
+    text = _DIGIT_OR_PUNCT_RE.sub(" ", text)
+    return " ".join(text.split())
+
+
+def _split_tokens(text: str) -> List[str]:
+    """Fast tokenizer for cleaned text; same tokens as NLTK's word_tokenize."""
+    out = []
+    for t in text.split():
+        parts = _NLTK_CONTRACTIONS.get(t)
+        if parts:
+            out.extend(parts)
+        else:
+            out.append(t)
+    return out
+
+
+@lru_cache(maxsize=PREPROCESS_CACHE_SIZE)
+def _tokenize_cached(text: str, remove_stopwords: bool) -> tuple:
+    tokens = _split_tokens(clean_text(text))
+    if remove_stopwords:
+        tokens = [t for t in tokens if t not in STOPWORDS and len(t) > 1]
+    return tuple(tokens)
 
 
 def tokenize(text: str, remove_stopwords: bool = True) -> List[str]:
     """Tokenize and optionally remove stopwords."""
-    text = clean_text(text)
-    if not text:
+    if not text or not isinstance(text, str):
         return []
-    if _HAS_NLTK:
-        tokens = word_tokenize(text)
-        stops = set(stopwords.words("english"))
-    else:
-        tokens = text.split()
-        stops = FALLBACK_STOPWORDS
-    if remove_stopwords:
-        tokens = [t for t in tokens if t not in stops and len(t) > 1]
-    return tokens
+    return list(_tokenize_cached(text, remove_stopwords))
+
+
+@lru_cache(maxsize=PREPROCESS_CACHE_SIZE)
+def _preprocess_cached(text: str) -> str:
+    return " ".join(_tokenize_cached(text, True))
 
 
 def preprocess_for_model(text: str) -> str:
     """
     Return a single string suitable for TF-IDF (space-joined tokens).
-    Use this for inference pipeline.
+    Use this for inference pipeline. Results are LRU-cached on the raw text.
     """
-    tokens = tokenize(text, remove_stopwords=True)
-    return " ".join(tokens)
+    if not text or not isinstance(text, str):
+        return ""
+    return _preprocess_cached(text)
 
 
 def preprocess_batch(texts: List[str]) -> List[str]:
     """Preprocess a list of complaint texts."""
     return [preprocess_for_model(t) for t in texts]
+
+
+def iter_preprocess(texts: Iterable[str]) -> Iterator[str]:
+    """Streaming variant of preprocess_batch for large or lazy inputs."""
+    for t in texts:
+        yield preprocess_for_model(t)
+
+
+def cache_info() -> dict:
+    """Hit/miss counters of the preprocessing cache."""
+    info = _preprocess_cached.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize}
+
+
+def clear_cache() -> None:
+    _tokenize_cached.cache_clear()
+    _preprocess_cached.cache_clear()
@@ -0,0 +1,220 @@
+"""
+Model registry: eager, thread-safe loading and atomic hot-swap of versioned artifact sets.
+
+Layout (written by train.py):
+    models/versions/<version>/{tfidf_vectorizer,category_classifier,cluster_model,severity_model}.joblib
+    models/versions/<version>/evaluation_metrics.json
+    models/versions/<version>/{projection_model.joblib,cluster_viz.json}   (optional)
+    models/versions/<version>/bundle/   memory-mappable export of the same models (optional)
+    models/CURRENT            -> name of the version to serve
+Artifacts directly under models/ (pre-versioning layout) are served as version "legacy".
+"""
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .config import (
+    MODELS_DIR,
+    VERSIONS_DIR,
+    CURRENT_VERSION_PATH,
+    VECTORIZER_FILE,
+    CLASSIFIER_FILE,
+    CLUSTER_MODEL_FILE,
+    SEVERITY_MODEL_FILE,
+    METRICS_FILE,
+    PROJECTION_FILE,
+    CLUSTER_VIZ_FILE,
+    BUNDLE_DIR,
+    MODEL_FORMAT,
+)
+from .bundle import has_bundle, load_bundle
+
+LEGACY_VERSION = "legacy"
+
+
+class ModelNotAvailable(Exception):
+    """Raised when no (or an unknown) artifact set can be loaded."""
+
+
+class ModelSet(NamedTuple):
+    version: str
+    vectorizer: Any
+    classifier: Any
+    cluster_model: Any
+    severity_model: Any
+    metrics: Dict[str, Any]
+    projection: Any  # None for versions trained without a stored projection
+    viz: Optional[Dict[str, Any]]
+    path: Path
+    loaded_at: float
+    load_seconds: float
+    artifact_format: str = "joblib"  # "bundle" when served from memory-mapped arrays
+
+
+def current_version() -> Optional[str]:
+    """Version named by the CURRENT pointer, if any."""
+    if CURRENT_VERSION_PATH.exists():
+        name = CURRENT_VERSION_PATH.read_text(encoding="utf-8").strip()
+        return name or None
+    return None
+
+
+def available_versions() -> List[str]:
+    versions = []
+    if VERSIONS_DIR.exists():
+        # dot-prefixed directories are snapshots still being written
+        versions = sorted(
+            p.name for p in VERSIONS_DIR.iterdir() if not p.name.startswith(".") and (p / VECTORIZER_FILE).exists()
+        )
+    if (MODELS_DIR / VECTORIZER_FILE).exists():
+        versions.append(LEGACY_VERSION)
+    return versions
+
+
+def version_dir(version: str) -> Path:
+    if version == LEGACY_VERSION:
+        return MODELS_DIR
+    path = (VERSIONS_DIR / version).resolve()
+    if path.parent != VERSIONS_DIR.resolve():
+        raise ModelNotAvailable(f"Invalid model version: {version!r}")
+    return path
+
+
+def load_model_set(version: str, model_format: str = MODEL_FORMAT) -> ModelSet:
+    """
+    Load one artifact set from disk (no locking; callers swap it in).
+    model_format: "auto" maps the bundle when the version has one, else unpickles the joblib files.
+    """
+    path = version_dir(version)
+    if not (path / VECTORIZER_FILE).exists():
+        raise ModelNotAvailable(f"Model version {version!r} not found in {path}")
+    use_bundle = model_format != "joblib" and has_bundle(path / BUNDLE_DIR)
+    if model_format == "bundle" and not use_bundle:
+        raise ModelNotAvailable(f"Model version {version!r} has no bundle; export it with: python backend/bundle.py {path}")
+    t0 = time.perf_counter()
+    projection = viz = None
+    if use_bundle:
+        b = load_bundle(path / BUNDLE_DIR)
+        vectorizer, classifier = b["vectorizer"], b["classifier"]
+        cluster_model, severity_model, projection = b["cluster_model"], b["severity_model"], b["projection"]
+    else:
+        import joblib  # unpickling pulls in scikit-learn; the bundle path needs neither
+
+        vectorizer = joblib.load(path / VECTORIZER_FILE)
+        classifier = joblib.load(path / CLASSIFIER_FILE)
+        cluster_model = joblib.load(path / CLUSTER_MODEL_FILE)
+        severity_model = joblib.load(path / SEVERITY_MODEL_FILE)
+        if (path / PROJECTION_FILE).exists():
+            projection = joblib.load(path / PROJECTION_FILE)
+    metrics = {}
+    if (path / METRICS_FILE).exists():
+        with open(path / METRICS_FILE) as f:
+            metrics = json.load(f)
+    if (path / CLUSTER_VIZ_FILE).exists():
+        with open(path / CLUSTER_VIZ_FILE) as f:
+            viz = json.load(f)
+    return ModelSet(
+        version=version,
+        vectorizer=vectorizer,
+        classifier=classifier,
+        cluster_model=cluster_model,
+        severity_model=severity_model,
+        metrics=metrics,
+        projection=projection,
+        viz=viz,
+        path=path,
+        loaded_at=time.time(),
+        load_seconds=time.perf_counter() - t0,
+        artifact_format="bundle" if use_bundle else "joblib",
+    )
+
+
+class ModelRegistry:
+    """
+    Holds the active ModelSet. Readers take one snapshot per request via get(), so a
+    hot-swap never mixes artifacts from two versions inside a request; loading happens
+    outside the read path and the swap itself is a single reference assignment.
+    """
+
+    def __init__(self, history_size: int = 20):
+        self._current: Optional[ModelSet] = None
+        self._lock = threading.Lock()  # guards _current / _history
+        self._load_lock = threading.RLock()  # serializes disk loads (no duplicate loads)
+        self._history: List[Dict[str, Any]] = []
+        self._history_size = history_size
+        self._listeners = []
+        self._preloaded: Optional[ModelSet] = None
+
+    def on_swap(self, callback) -> None:
+        """Register callback(new_set) run after every successful swap (e.g. cache invalidation)."""
+        self._listeners.append(callback)
+
+    def preload(self, model_set: ModelSet) -> None:
+        """
+        Hand over a set loaded before this process was forked (see serve.py). The next
+        load() of that version installs it instead of reading the files again, so the
+        workers keep sharing the parent's pages.
+        """
+        self._preloaded = model_set
+
+    def load(self, version: Optional[str] = None) -> ModelSet:
+        """Load `version` (default: CURRENT pointer, else legacy layout) and swap it in."""
+        with self._load_lock:
+            if version is None:
+                version = current_version() or LEGACY_VERSION
+            new, self._preloaded = self._preloaded, None
+            if new is None or new.version != version:
+                new = load_model_set(version)
+            self.install(new)
+        return new
+
+    def install(self, new: ModelSet) -> None:
+        """Swap in an already-built ModelSet (e.g. an online-learning snapshot)."""
+        with self._lock:
+            self._current = new
+            self._history.append({
+                "version": new.version,
+                "loaded_at": new.loaded_at,
+                "load_seconds": round(new.load_seconds, 4),
+            })
+            del self._history[:-self._history_size]
+        for cb in self._listeners:
+            cb(new)
+
+    def get(self) -> ModelSet:
+        """Active model set; loads on first use if startup loading did not succeed."""
+        with self._lock:
+            current = self._current
+        if current is not None:
+            return current
+        with self._load_lock:
+            # double-checked: a concurrent first request may have loaded it meanwhile
+            with self._lock:
+                current = self._current
+            return current if current is not None else self.load()
+
+    @property
+    def loaded(self) -> bool:
+        return self._current is not None
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            current = self._current
+            history = list(self._history)
+        active = None
+        if current is not None:
+            active = {
+                "version": current.version,
+                "path": str(current.path),
+                "loaded_at": current.loaded_at,
+                "load_seconds": round(current.load_seconds, 4),
+                "artifact_format": current.artifact_format,
+            }
+        return {
+            "active": active,
+            "current_pointer": current_version(),
+            "available": available_versions(),
+            "load_history": history,
+        }
@@ -0,0 +1,227 @@
+"""
+Cache of model predictions keyed on the preprocessed complaint text and model version.
+
+Copy-pasted complaints, helpline templates and resubmissions preprocess to the same
+token string, so their vectorize + predict results can be reused. The key is a BLAKE2b
+digest of (model version, preprocessed text). Entries hold the model outputs only:
+category, confidence, model severity, cluster and 2D coordinates. Severity keyword
+rules read the raw text, so they still run for every complaint.
+
+Two tiers:
+- an in-process LRU bounded by entry count and age (TTL);
+- optionally a SQLite file (WAL) shared by all workers of a host. A local miss is
+  looked up there before the models run, and new predictions are written to both.
+  Failures of the shared tier are counted and otherwise ignored (the models run).
+
+A model swap clears the local tier. Shared rows of other versions stay: workers that
+have not swapped yet (e.g. during a rolling restart) still serve them. They age out
+with the TTL, and are the first to go when the shared tier is over its row limit.
+Because the version is part of the key, a stale prediction is never served.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# category, confidence, model severity, cluster id, x, y (None without a projection)
+Entry = Tuple[str, float, str, int, Optional[float], Optional[float]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key BLOB PRIMARY KEY,
+    version TEXT NOT NULL,
+    created REAL NOT NULL,
+    category TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    severity TEXT NOT NULL,
+    cluster_id INTEGER NOT NULL,
+    x REAL,
+    y REAL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_created ON results (created);
+"""
+_SQL_CHUNK = 500  # keys per IN (...) lookup, below SQLite's bound-parameter limit
+_PRUNE_EVERY = 10000  # shared-tier inserts between TTL/size pruning passes
+
+
+class PredictionCache:
+    """Thread-safe. get_many() then put_many() for the misses, once per batch."""
+
+    def __init__(
+        self,
+        max_entries: int = 50000,
+        ttl_seconds: float = 24 * 3600,
+        shared_path: Optional[Path] = None,
+        shared_max_rows: int = 1_000_000,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.shared_path = Path(shared_path) if shared_path else None
+        self.shared_max_rows = shared_max_rows
+        self._entries: "OrderedDict[bytes, Tuple[float, Entry]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._since_prune = 0
+        self.stats = {
+            "hits": 0, "shared_hits": 0, "misses": 0, "evicted": 0, "expired": 0,
+            "invalidations": 0, "shared_errors": 0,
+        }
+
+    @staticmethod
+    def key(processed: str, version: str) -> bytes:
+        return hashlib.blake2b(f"{version}\0{processed}".encode("utf-8"), digest_size=16).digest()
+
+    def get_many(self, processed: Sequence[str], version: str) -> Tuple[List[bytes], List[Optional[Entry]]]:
+        """Keys for all texts and the cached entry of each (None on a miss)."""
+        keys = [self.key(p, version) for p in processed]
+        found: List[Optional[Entry]] = [None] * len(keys)
+        oldest = time.time() - self.ttl
+        missing = []
+        with self._lock:
+            for i, k in enumerate(keys):
+                item = self._entries.get(k)
+                if item is not None and item[0] >= oldest:
+                    self._entries.move_to_end(k)
+                    found[i] = item[1]
+                    continue
+                if item is not None:
+                    del self._entries[k]
+                    self.stats["expired"] += 1
+                missing.append(i)
+            self.stats["hits"] += len(keys) - len(missing)
+        if missing and self.shared_path is not None:
+            shared = self._shared_get([keys[i] for i in missing], oldest)
+            if shared:
+                still_missing = []
+                with self._lock:
+                    for i in missing:
+                        item = shared.get(keys[i])
+                        if item is None:
+                            still_missing.append(i)
+                            continue
+                        found[i] = item[1]
+                        self._insert(keys[i], item)
+                    self.stats["shared_hits"] += len(missing) - len(still_missing)
+                missing = still_missing
+        with self._lock:
+            self.stats["misses"] += len(missing)
+        return keys, found
+
+    def put_many(self, keys: Sequence[bytes], version: str, entries: Sequence[Entry]) -> None:
+        now = time.time()
+        with self._lock:
+            for k, e in zip(keys, entries):
+                self._insert(k, (now, e))
+        if self.shared_path is not None and keys:
+            self._shared_put(keys, version, entries, now)
+
+    def _insert(self, key: bytes, item: Tuple[float, Entry]) -> None:
+        self._entries[key] = item
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evicted"] += 1
+
+    def invalidate(self, keep_version: Optional[str] = None) -> None:
+        """
+        Drop the local tier. Without `keep_version` the shared tier is emptied too; with
+        it (a model swap) shared rows are kept, since other workers may still serve them.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.stats["invalidations"] += 1
+        if self.shared_path is not None and keep_version is None:
+            self._shared_execute("DELETE FROM results", ())
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.shared_path.parent.mkdir(parents=True, exist_ok=True)
+            # other workers hold the write lock briefly; wait for it instead of failing
+            conn = sqlite3.connect(str(self.shared_path), timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _shared_get(self, keys: List[bytes], oldest: float) -> Dict[bytes, Tuple[float, Entry]]:
+        out = {}
+        try:
+            with self._db_lock:
+                conn = self._connect()
+                for start in range(0, len(keys), _SQL_CHUNK):
+                    chunk = keys[start:start + _SQL_CHUNK]
+                    rows = conn.execute(
+                        "SELECT key, created, category, confidence, severity, cluster_id, x, y FROM results "
+                        f"WHERE key IN ({','.join('?' * len(chunk))}) AND created >= ?",
+                        (*chunk, oldest),
+                    ).fetchall()
+                    for key, created, *entry in rows:
+                        out[key] = (created, tuple(entry))
+        except sqlite3.Error as e:
+            self._shared_failed(e)
+        return out
+
+    def _shared_put(self, keys: Sequence[bytes], version: str, entries: Sequence[Entry], now: float) -> None:
+        try:
+            with self._db_lock:
+                conn = self._connect()
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [(k, version, now, *e) for k, e in zip(keys, entries)],
+                    )
+                self._since_prune += len(keys)
+                if self._since_prune >= _PRUNE_EVERY:
+                    self._since_prune = 0
+                    self._prune(conn, now, version)
+        except sqlite3.Error as e:
+            self._shared_failed(e)
+
+    def _prune(self, conn: sqlite3.Connection, now: float, version: str) -> None:
+        """Delete expired rows, then beyond shared_max_rows other versions' rows and the oldest."""
+        with conn:
+            conn.execute("DELETE FROM results WHERE created < ?", (now - self.ttl,))
+            excess = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.shared_max_rows
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM results WHERE key IN"
+                    " (SELECT key FROM results ORDER BY version = ?, created LIMIT ?)",
+                    (version, excess),
+                )
+
+    def _shared_execute(self, sql: str, params: tuple) -> None:
+        try:
+            with self._db_lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(sql, params)
+        except sqlite3.Error as e:
+            self._shared_failed(e)
+
+    def _shared_failed(self, e: Exception) -> None:
+        with self._lock:
+            self.stats["shared_errors"] += 1
+            self.stats["last_shared_error"] = str(e)
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["shared_hits"] + self.stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "shared_path": str(self.shared_path) if self.shared_path is not None else None,
+                "hit_rate": round((self.stats["hits"] + self.stats["shared_hits"]) / lookups, 4) if lookups else None,
+                **self.stats,
+            }
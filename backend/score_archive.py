@@ -0,0 +1,277 @@
+"""
+Bulk scorer for complaint archives: category, confidence, severity and cluster for
+every record of a CSV/JSONL file, without going through the HTTP API.
+
+The input is streamed in fixed-size chunks that are scored on a process pool (each
+worker loads the model set once); results are written in input order as they
+complete, with a bounded read-ahead so memory stays flat for any input size.
+After every chunk a checkpoint is saved next to the output, so an interrupted run
+continues where it stopped with --resume.
+
+Usage (from the project root):
+    python -m backend.score_archive complaints.jsonl -o scored.jsonl [--workers N] [--chunk-size N]
+    python -m backend.score_archive complaints.csv -o scored/ --format parquet --resume
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .config import SEVERITY_LEVELS
+from .corpus import iter_records, chunked
+from .preprocessing import preprocess_batch
+from .registry import LEGACY_VERSION, ModelNotAvailable, ModelSet, current_version, load_model_set
+from .severity import resolve_severity_batch
+
+DEFAULT_KEEP_FIELDS = ("id", "station", "train_number")
+PROGRESS_INTERVAL = 5.0  # seconds between progress lines
+
+_worker_models: Optional[ModelSet] = None
+
+
+def _init_worker(version: str) -> None:
+    global _worker_models
+    _worker_models = load_model_set(version)
+
+
+def score_texts(texts: List[str], m: ModelSet) -> List[Dict[str, Any]]:
+    """One preprocessing pass and one predict per model for a chunk of texts."""
+    if not texts:
+        return []
+    X = m.vectorizer.transform(preprocess_batch(texts))
+    proba = m.classifier.predict_proba(X)
+    best = np.argmax(proba, axis=1)
+    cats = m.classifier.classes_[best]
+    confs = proba[np.arange(len(texts)), best]
+    sevs = resolve_severity_batch([SEVERITY_LEVELS[int(i)] for i in m.severity_model.predict(X)], texts)
+    clusters = m.cluster_model.predict(X)
+    return [
+        {
+            "category": str(cats[i]),
+            "confidence": round(float(confs[i]), 4),
+            "severity": sevs[i],
+            "cluster_id": int(clusters[i]),
+        }
+        for i in range(len(texts))
+    ]
+
+
+def _score_chunk(texts: List[str]) -> List[Dict[str, Any]]:
+    return score_texts(texts, _worker_models)
+
+
+# ---- output sinks ----
+
+class JsonlSink:
+    """Appends one JSON object per line; resumable by truncating to the checkpointed size."""
+
+    def __init__(self, path: Path, resume: Optional[Dict[str, Any]]):
+        self.path = path
+        if resume is None:
+            self._f = open(path, "wb")
+        else:
+            size = path.stat().st_size if path.is_file() else None
+            if size is None or size < resume["output_bytes"]:
+                found = "is missing" if size is None else f"has {size} bytes"
+                raise SystemExit(
+                    f"Cannot resume: {path} {found}, the checkpoint expects at least {resume['output_bytes']}. "
+                    f"Restore the file, or delete {checkpoint_path(path)} to start over."
+                )
+            self._f = open(path, "r+b")
+            self._f.truncate(resume["output_bytes"])  # drop rows written after the last checkpoint
+            self._f.seek(resume["output_bytes"])
+
+    def write(self, rows: List[Dict[str, Any]], first_row: int) -> None:
+        self._f.write(b"".join(json.dumps(r, ensure_ascii=False).encode("utf-8") + b"\n" for r in rows))
+
+    def commit(self) -> Dict[str, Any]:
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        return {"output_bytes": self._f.tell()}
+
+    def close(self) -> None:
+        self._f.close()
+
+
+class ParquetSink:
+    """One Parquet part file per chunk in an output directory (readable as one dataset)."""
+
+    def __init__(self, path: Path, resume: Optional[Dict[str, Any]]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow (pip install pyarrow); use --format jsonl otherwise.")
+        self._pa, self._pq = pa, pq
+        self.path = path
+        path.mkdir(parents=True, exist_ok=True)
+        if resume is None:
+            for old in path.glob("part-*.parquet"):
+                old.unlink()
+
+    def write(self, rows: List[Dict[str, Any]], first_row: int) -> None:
+        # named by first input row, so a chunk rewritten after a crash replaces its old part
+        tmp = self.path / f".part-{first_row:012d}.parquet"
+        self._pq.write_table(self._pa.Table.from_pylist(rows), tmp)
+        os.replace(tmp, self.path / f"part-{first_row:012d}.parquet")
+
+    def commit(self) -> Dict[str, Any]:
+        return {}
+
+    def close(self) -> None:
+        pass
+
+
+SINKS = {"jsonl": JsonlSink, "parquet": ParquetSink}
+
+
+# ---- checkpoint ----
+
+def checkpoint_path(output: Path) -> Path:
+    return output.with_name(output.name + ".checkpoint.json")
+
+
+def _save_checkpoint(path: Path, state: Dict[str, Any]) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+# ---- main loop ----
+
+def score_archive(
+    input_path: Path,
+    output: Path,
+    fmt: str = "jsonl",
+    workers: Optional[int] = None,
+    chunk_size: int = 5000,
+    version: Optional[str] = None,
+    text_field: str = "text",
+    keep_fields=DEFAULT_KEEP_FIELDS,
+    resume: bool = False,
+) -> Dict[str, Any]:
+    workers = max(1, workers or os.cpu_count() or 1)
+    ckpt_path = checkpoint_path(output)
+    state = None
+    if ckpt_path.exists():
+        state = json.loads(ckpt_path.read_text(encoding="utf-8"))
+        if not resume and not state.get("done"):
+            raise SystemExit(f"Unfinished run found ({ckpt_path}); pass --resume to continue it or delete the checkpoint.")
+        if resume and state.get("input") != str(input_path):
+            raise SystemExit(f"Checkpoint {ckpt_path} belongs to input {state.get('input')!r}, not {str(input_path)!r}.")
+        if not resume:
+            state = None
+    if state is not None and state.get("done"):
+        print(f"Already complete: {state['rows_read']} rows scored into {output}.")
+        return state
+    if state is None:
+        version = version or current_version() or LEGACY_VERSION
+        state = {"input": str(input_path), "format": fmt, "model_version": version,
+                 "rows_read": 0, "rows_scored": 0, "skipped": 0, "output_bytes": None, "done": False}
+    elif version and version != state["model_version"]:
+        raise SystemExit(f"Run was started with model version {state['model_version']!r}; cannot resume with {version!r}.")
+    version, fmt = state["model_version"], state["format"]
+
+    m = load_model_set(version)
+    sink = SINKS[fmt](output, state if state["rows_read"] else None)
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(version,)) if workers > 1 else None
+
+    start_row = state["rows_read"]
+    records = islice(iter_records(input_path), start_row, None)  # skip what a previous run committed
+    pending = deque()  # (future, first row, rows in chunk, passthrough rows)
+    t0 = last_report = time.perf_counter()
+    scored_this_run = 0
+
+    def drain_one():
+        nonlocal scored_this_run, last_report
+        fut, first_row, n_rows, meta = pending.popleft()
+        results = fut.result()
+        out = [dict(info, **r, model_version=version) for info, r in zip(meta, results)]
+        if out:
+            sink.write(out, first_row)
+        state.update(sink.commit())
+        state["rows_read"] = first_row + n_rows
+        state["rows_scored"] += len(out)
+        state["skipped"] += n_rows - len(out)
+        _save_checkpoint(ckpt_path, state)
+        scored_this_run += len(out)
+        now = time.perf_counter()
+        if now - last_report >= PROGRESS_INTERVAL:
+            print(f"  {state['rows_read']:>12,} rows  {scored_this_run / (now - t0):>10,.0f} rows/s", file=sys.stderr)
+            last_report = now
+
+    try:
+        row = start_row
+        for chunk in chunked(records, chunk_size):
+            texts, meta = [], []
+            for i, rec in enumerate(chunk):
+                text = (rec.get(text_field) or "").strip()
+                if not text:
+                    continue
+                info = {"row": row + i}
+                info.update((k, rec[k]) for k in keep_fields if k in rec)
+                texts.append(text)
+                meta.append(info)
+            fut = pool.submit(_score_chunk, texts) if pool is not None else _done(score_texts(texts, m))
+            pending.append((fut, row, len(chunk), meta))
+            row += len(chunk)
+            # bounded read-ahead keeps memory flat on large archives
+            while len(pending) > 2 * workers:
+                drain_one()
+        while pending:
+            drain_one()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        sink.close()
+
+    elapsed = time.perf_counter() - t0
+    state["done"] = True
+    state["seconds"] = round(elapsed, 3)
+    state["rows_per_second"] = round(scored_this_run / elapsed, 1) if elapsed > 0 else None
+    _save_checkpoint(ckpt_path, state)
+    print(f"Scored {state['rows_scored']:,} rows ({state['skipped']:,} without text) with model {version} "
+          f"in {elapsed:.1f}s: {state['rows_per_second']} rows/s -> {output}")
+    return state
+
+
+def _done(value) -> Future:
+    fut = Future()
+    fut.set_result(value)
+    return fut
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a CSV/JSONL complaint archive with the trained models.")
+    parser.add_argument("input", type=Path, help="CSV (header row) or JSONL file with a text column")
+    parser.add_argument("-o", "--output", type=Path, required=True,
+                        help="Output .jsonl file, or a directory of part files for --format parquet")
+    parser.add_argument("--format", choices=sorted(SINKS), default=None,
+                        help="Output format (default: parquet if the output ends in .parquet or is a directory, else jsonl)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Records per scoring chunk")
+    parser.add_argument("--model-version", default=None, help="Model version to use (default: models/CURRENT)")
+    parser.add_argument("--text-field", default="text", help="Column/key holding the complaint text")
+    parser.add_argument("--keep", default=",".join(DEFAULT_KEEP_FIELDS),
+                        help="Comma-separated input fields copied to the output when present")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run from its checkpoint")
+    args = parser.parse_args()
+    fmt = args.format
+    if fmt is None:
+        fmt = "parquet" if args.output.suffix == ".parquet" or args.output.is_dir() else "jsonl"
+    try:
+        score_archive(
+            args.input, args.output, fmt=fmt, workers=args.workers, chunk_size=args.chunk_size,
+            version=args.model_version, text_field=args.text_field,
+            keep_fields=tuple(f for f in args.keep.split(",") if f), resume=args.resume,
+        )
+    except ModelNotAvailable as e:
+        raise SystemExit(f"{e}. Train first: cd backend && python train.py")
@@ -0,0 +1,317 @@
+"""
+Production launcher: one listening socket, N pre-forked uvicorn workers sharing one
+loaded model set.
+
+The parent pins the BLAS/OpenMP thread pools (before NumPy is imported), imports the
+app, loads the model set named in models/CURRENT and binds the socket, then forks the
+workers. Each worker installs the inherited set instead of reading the files again, so
+model arrays stay in pages shared copy-on-write with the parent (gc.freeze() keeps the
+collector from touching them). With one BLAS thread per worker, N workers on N cores
+run N requests at once without the thread pools oversubscribing the CPUs.
+
+The parent only supervises: it restarts workers that die, and on SIGHUP (sent by
+POST /api/models/reload from any worker) loads CURRENT again and replaces every worker.
+SIGTERM/SIGINT stop the workers gracefully.
+
+Shared state: the complaint store is one SQLite file, so trends and similar-complaint
+search cover all workers. With more than one worker, each worker's spike detector and
+live-feed totals follow that store (rows committed by any worker, read after each
+flush) instead of counting only their own requests, the prediction cache gets a shared
+SQLite tier, and /metrics series carry a worker="<pid>" label. Still per worker: the
+micro-batcher, the live feed's 2D points and the near-duplicate index, so a repeat
+complaint that reaches another worker opens a new incident there (the launcher warns).
+Online learning needs a single process and is refused with more than one worker.
+
+Without os.fork (Windows) this falls back to uvicorn's own worker processes, which
+each load the models; a memory-mapped bundle still shares its pages there.
+
+Usage (from the project root):
+    python -m backend.serve [--workers N] [--host 0.0.0.0] [--port 8000] [--blas-threads 1]
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+BLAS_THREAD_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+GRACEFUL_TIMEOUT = 30  # seconds a stopping worker gets for in-flight requests (and open SSE streams)
+STARTUP_GRACE = 10.0  # a worker exiting sooner than this after its start counts as a failed start
+MAX_FAILED_STARTS = 5  # consecutive failed starts before the launcher gives up
+BACKLOG = 2048
+# same file as config.DATA_DIR / "result_cache.db"; config reads the variable at import
+SHARED_RESULT_CACHE = Path(__file__).resolve().parent / "data" / "result_cache.db"
+
+
+def _log(msg: str) -> None:
+    print(f"[serve {os.getpid()}] {msg}", file=sys.stderr, flush=True)
+
+
+def default_workers() -> int:
+    """CPUs this process may run on (the affinity mask, e.g. a container's cpuset)."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+def pin_blas_threads(n: int) -> None:
+    """Size the BLAS/OpenMP pools of this process and its children. Must run before NumPy is imported."""
+    if "numpy" in sys.modules:
+        _log("warning: NumPy was imported before the BLAS thread count was pinned")
+    for var in BLAS_THREAD_VARS:
+        os.environ[var] = str(n)
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _exit_with_parent(parent: int) -> None:
+    """Stop this worker if the launcher dies without stopping it (e.g. SIGKILL)."""
+    while os.getppid() == parent:
+        time.sleep(1.0)
+    os.kill(os.getpid(), signal.SIGTERM)
+
+
+class Supervisor:
+    """Forks and watches the workers; runs in the parent only."""
+
+    def __init__(self, sock: socket.socket, n_workers: int, uvicorn_options: Dict):
+        self.sock = sock
+        self.n_workers = n_workers
+        self.uvicorn_options = uvicorn_options
+        self.model_set = None
+        self.workers: Dict[int, float] = {}  # pid -> start time (monotonic)
+        self.retiring: Dict[int, float] = {}  # pid -> when it was asked to stop
+        self.failed_starts = 0
+        self._stopping = False
+        self._reload = False
+
+    def load_models(self) -> bool:
+        from .registry import LEGACY_VERSION, ModelNotAvailable, current_version, load_model_set
+
+        version = current_version() or LEGACY_VERSION
+        try:
+            self.model_set = load_model_set(version)
+        except ModelNotAvailable as e:
+            _log(f"Model registry: {e}")
+            return False
+        _log(f"loaded model version {version} ({self.model_set.artifact_format}) "
+             f"in {self.model_set.load_seconds:.3f}s")
+        return True
+
+    def spawn(self) -> None:
+        # everything allocated so far (modules, models) is shared with the worker; keep
+        # the cyclic collector from writing to those objects and copying their pages
+        gc.collect()
+        gc.freeze()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_worker()
+            except BaseException as e:  # noqa: BLE001 - a forked child must never return into the launcher
+                _log(f"worker failed: {e!r}")
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers[pid] = time.monotonic()
+
+    def _run_worker(self) -> None:
+        for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, signal.SIG_DFL)
+        import uvicorn
+        from . import main as api
+
+        if self.model_set is not None:
+            api.registry.preload(self.model_set)
+        threading.Thread(target=_exit_with_parent, args=(os.getppid(),), name="parent-watch", daemon=True).start()
+        config = uvicorn.Config(api.app, lifespan="on", **self.uvicorn_options)
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+        for _ in range(self.n_workers):
+            self.spawn()
+        _log(f"{self.n_workers} worker(s) serving on {self.sock.getsockname()}")
+        code = 0
+        while not self._stopping:
+            if self._reload:
+                self._reload = False
+                self.rolling_restart()
+            if not self.reap():
+                code = 1
+                break
+            time.sleep(0.2)
+        self.stop()
+        return code
+
+    def _on_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _on_reload(self, signum, frame) -> None:
+        self._reload = True
+
+    def reap(self) -> bool:
+        """Collect exited children and replace dead workers. False once workers keep failing to start."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            self.retiring.pop(pid, None)
+            started = self.workers.pop(pid, None)
+            if started is None or self._stopping:
+                continue
+            _log(f"worker {pid} exited ({self._describe(status)}); starting a new one")
+            if time.monotonic() - started < STARTUP_GRACE:
+                self.failed_starts += 1
+                if self.failed_starts >= MAX_FAILED_STARTS:
+                    _log(f"{self.failed_starts} workers in a row failed to start; stopping")
+                    return False
+            else:
+                self.failed_starts = 0
+            self.spawn()
+        now = time.monotonic()
+        for pid, asked in list(self.retiring.items()):
+            if now - asked > GRACEFUL_TIMEOUT + 5:
+                self._signal(pid, signal.SIGKILL)
+        return True
+
+    @staticmethod
+    def _describe(status: int) -> str:
+        if os.WIFSIGNALED(status):
+            return f"signal {os.WTERMSIG(status)}"
+        return f"exit code {os.waitstatus_to_exitcode(status)}"
+
+    def rolling_restart(self) -> None:
+        """Load CURRENT again, start a new set of workers, then retire the old ones."""
+        gc.unfreeze()  # let the previous model set be collected once replaced
+        if not self.load_models():
+            return
+        old = self.workers
+        self.workers = {}
+        for _ in range(self.n_workers):
+            self.spawn()
+        # connections arriving while the new workers start wait in the shared backlog
+        for pid in old:
+            self._signal(pid, signal.SIGTERM)
+            self.retiring[pid] = time.monotonic()
+        _log(f"replaced {len(old)} worker(s)")
+
+    def stop(self) -> None:
+        pids = list(self.workers) + list(self.retiring)
+        for pid in pids:
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT + 5
+        remaining = set(pids)
+        while remaining and time.monotonic() < deadline:
+            for pid in list(remaining):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    remaining.discard(pid)
+            time.sleep(0.1)
+        for pid in remaining:
+            self._signal(pid, signal.SIGKILL)
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self.sock.close()
+
+    @staticmethod
+    def _signal(pid: int, sig: int) -> None:
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    workers: Optional[int] = None,
+    blas_threads: int = 1,
+    log_level: str = "info",
+    access_log: bool = True,
+) -> int:
+    workers = workers or default_workers()
+    pin_blas_threads(blas_threads)
+    os.environ["RAIL_SAARTHI_WORKERS"] = str(workers)
+    if workers > 1:
+        os.environ.setdefault("RAIL_SAARTHI_RESULT_CACHE_DB", str(SHARED_RESULT_CACHE))
+    # configuration is read at import time, so only import the app after the lines above
+    from .config import DEDUP_ENABLED, ONLINE_LEARNING
+
+    if ONLINE_LEARNING and workers > 1:
+        _log("online learning (RAIL_SAARTHI_ONLINE=1) needs a single worker; use --workers 1")
+        return 2
+    if DEDUP_ENABLED and workers > 1:
+        _log(f"warning: near-duplicate incidents are tracked per worker; with {workers} workers a repeat "
+             "complaint may open a new incident (RAIL_SAARTHI_DEDUP=0 turns dedup off)")
+    uvicorn_options = {
+        "log_level": log_level,
+        "access_log": access_log,
+        "timeout_graceful_shutdown": GRACEFUL_TIMEOUT,
+    }
+    if not hasattr(os, "fork"):
+        import uvicorn
+
+        _log(f"os.fork is not available; starting {workers} uvicorn worker process(es)")
+        uvicorn.run("backend.main:app", host=host, port=port, workers=workers, **uvicorn_options)
+        return 0
+
+    from . import main as api
+
+    api.supervisor_pid = os.getpid()
+    supervisor = Supervisor(bind_socket(host, port), workers, uvicorn_options)
+    supervisor.load_models()
+    return supervisor.run()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--blas-threads", type=int, default=1, help="BLAS/OpenMP threads per worker")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-access-log", action="store_true")
+    args = parser.parse_args()
+    sys.exit(serve(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        blas_threads=args.blas_threads,
+        log_level=args.log_level,
+        access_log=not args.no_access_log,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,31 @@
 """
 Severity tagging: combines keyword-based rules with ML for high-priority/critical flagging.
 """
-from typing import List, Optional
-from .config import SEVERITY_LEVELS, CRITICAL_KEYWORDS, HIGH_KEYWORDS
+import json
+from typing import Dict, List, Optional
+from .config import SEVERITY_LEVELS, CRITICAL_KEYWORDS, HIGH_KEYWORDS, SEVERITY_KEYWORDS_PATH
+from .keyword_matcher import KeywordMatch, KeywordMatcher
+
+
+def _build_matcher() -> KeywordMatcher:
+    """Compile configured keywords (plus the optional extra keywords file) once at import."""
+    tiers = {"critical": list(CRITICAL_KEYWORDS), "high": list(HIGH_KEYWORDS)}
+    if SEVERITY_KEYWORDS_PATH.exists():
+        with open(SEVERITY_KEYWORDS_PATH, encoding="utf-8") as f:
+            extra = json.load(f)
+        for tier in tiers:
+            tiers[tier].extend(extra.get(tier, []))
+    return KeywordMatcher.from_tiers(tiers)
+
+
+_MATCHER = _build_matcher()
+
+
+def get_severity_keyword_matches(text: str) -> List[KeywordMatch]:
+    """All severity keywords/phrases found in text, with their tier."""
+    if not text:
+        return []
+    return _MATCHER.find(text)
 
 
 def get_severity_keyword_score(text: str) -> Optional[str]:
@@ -10,25 +33,32 @@ def get_severity_keyword_score(text: str) -> Optional[str]:
     Rule-based severity hint. Returns 'critical', 'high', or None.
     Used to override or reinforce ML severity for urgent cases.
     """
-    if not text:
-        return None
-    t = text.lower()
-    for w in CRITICAL_KEYWORDS:
-        if w in t:
-            return "critical"
-    for w in HIGH_KEYWORDS:
-        if w in t:
-            return "high"
-    return None
+    return _MATCHER.best_tier(get_severity_keyword_matches(text))
 
 
-def resolve_severity(ml_severity: str, text: str) -> str:
-    """
-    Final severity: if keyword suggests critical/high, upgrade ML result.
-    """
-    kw = get_severity_keyword_score(text)
+def _apply_rule(ml_severity: str, kw: Optional[str]) -> str:
     if kw == "critical":
         return "critical"
     if kw == "high" and ml_severity in ("low", "medium"):
         return "high"
     return ml_severity
+
+
+def resolve_severity(ml_severity: str, text: str) -> str:
+    """
+    Final severity: if keyword suggests critical/high, upgrade ML result.
+    """
+    return _apply_rule(ml_severity, get_severity_keyword_score(text))
+
+
+def resolve_severity_batch(ml_severities: List[str], texts: List[str]) -> List[str]:
+    """resolve_severity over a whole batch with one automaton pass per text."""
+    return [
+        _apply_rule(sev, _MATCHER.best_tier(m))
+        for sev, m in zip(ml_severities, _MATCHER.find_batch(texts))
+    ]
+
+
+def matches_to_dicts(matches: List[KeywordMatch]) -> List[Dict[str, str]]:
+    """JSON-friendly view of keyword matches for API responses."""
+    return [{"keyword": m.keyword, "tier": m.tier} for m in matches]
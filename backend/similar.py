@@ -0,0 +1,267 @@
+"""
+Top-k similar past complaints: an inverted index over the L2-normalized TF-IDF rows
+that the serving vectorizer produces, so cosine similarity is a sparse dot product.
+
+Queries use MaxScore-style pruning. Query terms are visited in decreasing order of
+their score upper bound (query weight x largest posting weight of the term). Once the
+bound of the terms still to visit cannot lift an unseen complaint above the current
+k-th best score, the remaining (usually frequent, low-idf) terms only update existing
+candidates, and candidates that can no longer reach the top k are dropped.
+
+The index is fed from the complaint store: every flush appends the newly stored,
+non-duplicate complaints, and a model swap that changes the feature space rebuilds
+the index from the store in the background while the old one keeps serving.
+"""
+import hashlib
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+_INITIAL_CAPACITY = 8
+
+
+class InvertedIndex:
+    """
+    Append-only postings (internal doc id, weight) per term, ids increasing.
+    Not thread-safe: callers serialize add() and search() (SimilarComplaints holds a lock).
+    """
+
+    def __init__(self):
+        self._postings: Dict[int, list] = {}  # term -> [doc ids int32, weights float32, size]
+        self._max_weight: Dict[int, float] = {}
+        self.doc_keys = np.zeros(0, dtype=np.int64)  # internal id -> external key (store row id)
+        self.n_docs = 0
+        self.n_postings = 0
+        self._acc = np.zeros(0, dtype=np.float32)  # search scratch; all zeros between queries
+
+    def add(self, keys: List[int], X) -> None:
+        """Append rows of a CSR matrix (one per key; keys must increase)."""
+        n = X.shape[0]
+        if n == 0:
+            return
+        base = self.n_docs
+        if base + n > len(self.doc_keys):
+            grown = np.zeros(max(2 * len(self.doc_keys), base + n, _INITIAL_CAPACITY), dtype=np.int64)
+            grown[:base] = self.doc_keys[:base]
+            self.doc_keys = grown
+        self.doc_keys[base:base + n] = keys
+        Xc = X.tocsc()
+        Xc.sort_indices()
+        for term in np.flatnonzero(np.diff(Xc.indptr)):
+            start, end = Xc.indptr[term], Xc.indptr[term + 1]
+            docs = Xc.indices[start:end].astype(np.int32) + base
+            weights = Xc.data[start:end].astype(np.float32)
+            entry = self._postings.get(term)
+            if entry is None:
+                entry = self._postings[term] = [np.empty(_INITIAL_CAPACITY, np.int32), np.empty(_INITIAL_CAPACITY, np.float32), 0]
+            size = entry[2]
+            if size + len(docs) > len(entry[0]):
+                cap = max(2 * len(entry[0]), size + len(docs))
+                # reallocate (never resize in place: readers may hold views of the old arrays)
+                entry[0] = np.concatenate([entry[0][:size], np.empty(cap - size, np.int32)])
+                entry[1] = np.concatenate([entry[1][:size], np.empty(cap - size, np.float32)])
+            entry[0][size:size + len(docs)] = docs
+            entry[1][size:size + len(docs)] = weights
+            entry[2] = size + len(docs)
+            self._max_weight[term] = max(self._max_weight.get(term, 0.0), float(weights.max()))
+        self.n_docs += n
+        self.n_postings += X.nnz
+
+    def search(self, terms: np.ndarray, weights: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Top-k (keys, scores) for a sparse query vector; also returns postings scored."""
+        query = []
+        for t, w in zip(terms.tolist(), weights.tolist()):
+            entry = self._postings.get(t)
+            if entry is not None:
+                query.append((w * self._max_weight[t], w, entry[0][:entry[2]], entry[1][:entry[2]]))
+        query.sort(key=lambda q: -q[0])
+        remaining = sum(q[0] for q in query)
+        # sparse accumulator while unseen docs can still enter the top k: scores go into a
+        # scratch array kept across queries and only the touched entries are read and reset,
+        # so a query costs the postings it visits, not the size of the index. theta is a
+        # lower bound on the k-th best score (k-th best among one term's docs)
+        if len(self._acc) < self.n_docs:
+            self._acc = np.zeros(max(self.n_docs, 2 * len(self._acc)), dtype=np.float32)
+        acc = self._acc
+        touched: List[np.ndarray] = []
+        theta = 0.0
+        scored = 0
+        cand = None
+        try:
+            for bound, w, docs, post_w in query:
+                if cand is None:
+                    acc[docs] += w * post_w  # a term's postings hold each doc once
+                    touched.append(docs)
+                    scored += len(docs)
+                    remaining -= bound
+                    if len(docs) >= k:
+                        theta = max(theta, float(np.partition(acc[docs], -k)[-k]))
+                    if remaining < theta:
+                        # unseen docs cannot reach the top k any more: keep only viable candidates
+                        seen = np.concatenate(touched)
+                        cand = np.unique(seen[acc[seen] >= theta - remaining])
+                        scores = acc[cand]
+                else:
+                    pos = np.minimum(np.searchsorted(docs, cand), len(docs) - 1)
+                    hit = docs[pos] == cand
+                    scores[hit] += w * post_w[pos[hit]]
+                    scored += len(cand)
+                    remaining -= bound
+                    keep = scores + remaining >= theta
+                    cand, scores = cand[keep], scores[keep]
+            if cand is None:
+                cand = np.unique(np.concatenate(touched)) if touched else np.zeros(0, dtype=np.int32)
+                scores = acc[cand]
+        finally:
+            if scored > self.n_docs // 8:
+                acc[:self.n_docs] = 0.0  # a memset is cheaper than scattering that many zeros
+            else:
+                for docs in touched:
+                    acc[docs] = 0.0
+        if len(scores) > k:
+            top = np.argpartition(scores, -k)[-k:]
+            cand, scores = cand[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return self.doc_keys[cand[order]], scores[order], scored
+
+
+def feature_space_key(vectorizer) -> str:
+    """Identifies the vector space: same key, same vectors (so no rebuild is needed)."""
+    h = hashlib.sha1(type(vectorizer).__name__.encode())
+    params = vectorizer.get_params() if hasattr(vectorizer, "get_params") else vectorizer.params
+    h.update(repr(sorted((k, repr(v)) for k, v in params.items())).encode())
+    vocab = getattr(vectorizer, "vocabulary_", None)
+    if vocab is not None:
+        h.update(repr(sorted(vocab.items())).encode())
+    for name in ("_terms", "_columns", "idf_"):
+        arr = getattr(vectorizer, name, None)
+        if arr is not None:
+            h.update(np.ascontiguousarray(arr).tobytes())
+    return h.hexdigest()
+
+
+class SimilarComplaints:
+    """
+    Keeps an InvertedIndex over the complaint store in sync with the served model.
+    Thread-safe: appends and queries are serialized; rebuilds run in a background thread.
+    """
+
+    def __init__(self, store, preprocess, max_docs: int = 1_000_000, batch: int = 5000):
+        self.store = store
+        self.preprocess = preprocess
+        self.max_docs = max_docs
+        self.batch = batch
+        self._lock = threading.Lock()
+        self._vectorizer = None
+        self._version: Optional[str] = None
+        self._key: Optional[str] = None
+        self._index: Optional[InvertedIndex] = None
+        self._last_id = 0
+        self._rebuild: Optional[threading.Thread] = None
+        self._pending: Optional[Tuple[Any, str, str]] = None
+        self.stats = {"rebuilds": 0, "last_rebuild_s": None, "last_error": None, "queries": 0, "last_query_ms": None}
+
+    # ---- index maintenance ----
+
+    def attach(self, vectorizer, version: str, force: bool = False) -> None:
+        """Follow a model swap; rebuilds (in the background) only if the feature space changed."""
+        key = feature_space_key(vectorizer)
+        with self._lock:
+            if key == self._key and not force:
+                self._vectorizer, self._version = vectorizer, version
+                return
+            self._pending = (vectorizer, version, key)
+            if self._rebuild is not None:
+                return  # the running rebuild picks up the newest pending model when it finishes
+            self._rebuild = threading.Thread(target=self._rebuild_loop, name="similar-index-rebuild", daemon=True)
+            self._rebuild.start()
+
+    def _rebuild_loop(self) -> None:
+        while True:
+            with self._lock:
+                if self._pending is None:
+                    self._rebuild = None
+                    return
+                vectorizer, version, key = self._pending
+                self._pending = None
+            t0 = time.perf_counter()
+            try:
+                index = InvertedIndex()
+                last_id = self._fill(index, vectorizer, 0, limit=self.max_docs)
+                with self._lock:
+                    last_id = self._fill(index, vectorizer, last_id)  # rows stored while building
+                    self._vectorizer, self._version, self._key = vectorizer, version, key
+                    self._index, self._last_id = index, last_id
+            except Exception as e:
+                print("Similar-complaint index rebuild failed:", e)
+                self.stats["last_error"] = str(e)
+                continue
+            self.stats["rebuilds"] += 1
+            self.stats["last_rebuild_s"] = round(time.perf_counter() - t0, 3)
+
+    def _fill(self, index: InvertedIndex, vectorizer, after_id: int, limit: Optional[int] = None) -> int:
+        for rows in self.store.iter_unique(after_id, limit=limit, batch=self.batch):
+            ids = [r[0] for r in rows]
+            index.add(ids, vectorizer.transform(self.preprocess([r[1] for r in rows])))
+            after_id = ids[-1]
+        return after_id
+
+    def catch_up(self) -> None:
+        """Index complaints stored since the last call (store flush listener, on the flusher thread)."""
+        with self._lock:
+            if self._index is None:
+                return
+            self._last_id = self._fill(self._index, self._vectorizer, self._last_id)
+            oversized = self._index.n_docs > 1.25 * self.max_docs
+            rebuilding = self._rebuild is not None
+            vectorizer, version = self._vectorizer, self._version
+        if oversized and not rebuilding:
+            # rebuild from the newest max_docs complaints, so memory stays bounded
+            self.attach(vectorizer, version, force=True)
+
+    # ---- queries ----
+
+    def query(self, text: str, k: int = 10) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        with self._lock:
+            index, vectorizer, version = self._index, self._vectorizer, self._version
+            if index is None:
+                return {"ready": False, "results": [], "indexed": 0, "model_version": None}
+            q = vectorizer.transform(self.preprocess([text]))
+            keys, scores, scored = index.search(q.indices, q.data, k)
+            n_docs = index.n_docs
+        rows = self.store.get_many(keys.tolist())
+        results = []
+        for key, score in zip(keys.tolist(), scores.tolist()):
+            row = rows.get(key)
+            if row is not None and score > 0:
+                results.append(dict(row, score=round(score, 4)))
+        took_ms = round((time.perf_counter() - t0) * 1000, 3)
+        self.stats["queries"] += 1
+        self.stats["last_query_ms"] = took_ms
+        return {
+            "ready": True,
+            "results": results,
+            "indexed": n_docs,
+            "postings_scored": scored,
+            "took_ms": took_ms,
+            "model_version": version,
+        }
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            index = self._index
+            rebuilding = self._rebuild is not None
+            return {
+                "ready": index is not None,
+                "rebuilding": rebuilding,
+                "indexed": index.n_docs if index else 0,
+                "postings": index.n_postings if index else 0,
+                "terms": len(index._postings) if index else 0,
+                "max_docs": self.max_docs,
+                "model_version": self._version,
+                **self.stats,
+            }
+
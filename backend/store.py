@@ -0,0 +1,384 @@
+"""
+Persistent complaint store (SQLite, WAL mode) with incrementally maintained trend aggregates.
+
+Analyzed complaints are buffered and written in batches. Each flush also upserts
+pre-aggregated counters keyed by (scope, time bucket, dimension, value), so trend
+queries only sum a bounded number of counter rows (one per 5-minute bucket in the
+window) instead of rescanning complaints. A window covers its full length back from
+now, plus up to one bucket (5 minutes) before that. Near-duplicates of an already-open incident
+are stored but only counted under the "duplicates" dimension, so a burst of repeat
+complaints does not inflate the category/severity/cluster trends.
+"""
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+BUCKET_SECONDS = 300  # 5-minute buckets: granularity of the trend windows
+ALL_TIME_BUCKET = -1  # running total, so "all" is a single-bucket lookup
+WINDOWS = {"hour": 3600, "day": 24 * 3600, "week": 7 * 24 * 3600, "all": None}  # seconds
+_MAX_ROW_ID = 2**63 - 1  # largest SQLite rowid
+MAX_BUFFERED_BATCHES = 10  # buffered batches before writers flush themselves (backpressure)
+SCHEMA_VERSION = 1  # PRAGMA user_version; 0 = hourly buckets (converted on open)
+DIMENSIONS = ("category", "severity", "cluster", "duplicates")
+ROW_FIELDS = (
+    "ts", "text", "category", "severity", "cluster_id", "station", "train_number",
+    "model_version", "incident_id", "is_duplicate",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS complaints (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    text TEXT NOT NULL,
+    category TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    cluster_id INTEGER NOT NULL,
+    station TEXT,
+    train_number TEXT,
+    model_version TEXT,
+    incident_id TEXT,
+    is_duplicate INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS aggregates (
+    scope TEXT NOT NULL,
+    scope_key TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    dim TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (scope, scope_key, bucket, dim, key)
+) WITHOUT ROWID;
+"""
+
+
+def _counts(rows) -> Dict[str, Dict[str, int]]:
+    """(dim, key, count) aggregate rows -> {dim: {key: count}}."""
+    out: Dict[str, Dict[str, int]] = {d: {} for d in DIMENSIONS}
+    for dim, key, count in rows:
+        out[dim][key] = int(count)
+    return out
+
+
+class ComplaintStore:
+    """Thread-safe; records are buffered in memory and flushed in one transaction."""
+
+    def __init__(self, path: Path, batch_size: int = 500, flush_interval: float = 1.0):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._buf_lock = threading.Lock()
+        self._buffer: List[tuple] = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()  # set when the buffer fills, so the flusher writes it early
+        self._flusher: Optional[threading.Thread] = None
+        self._flush_listeners = []
+        self._add_listeners = []
+        self._written = threading.Event()  # rows written since the flush listeners last ran
+        self._followers = []
+        self.followed_id: Optional[int] = None  # last row id handed to follow() callbacks
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            # databases created before incident tracking
+            cols = {row[1] for row in conn.execute("PRAGMA table_info(complaints)")}
+            if "incident_id" not in cols:
+                conn.execute("ALTER TABLE complaints ADD COLUMN incident_id TEXT")
+                conn.execute("ALTER TABLE complaints ADD COLUMN is_duplicate INTEGER NOT NULL DEFAULT 0")
+            if conn.execute("PRAGMA user_version").fetchone()[0] < 1:
+                # databases written with hourly buckets: map each hour to its first 5-minute bucket
+                with conn:
+                    conn.execute(
+                        "UPDATE aggregates SET bucket = bucket * ? WHERE bucket != ?",
+                        (3600 // BUCKET_SECONDS, ALL_TIME_BUCKET),
+                    )
+                    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._conn = conn
+        return self._conn
+
+    def start(self) -> None:
+        """Start the background flusher (bounds how long a record waits in the buffer)."""
+        with self._db_lock:
+            conn = self._connect()
+            if self._followers and self.followed_id is None:
+                # followers see rows committed from now on (begin_following() was not called)
+                self.followed_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM complaints").fetchone()[0]
+        if self._flusher is None:
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, name="complaint-store-flush", daemon=True)
+            self._flusher.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+            self._flusher = None
+        self.flush()
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def on_flush(self, callback) -> None:
+        """
+        Register callback() run after flushes that wrote rows (e.g. incremental indexing).
+        Callbacks run on the flusher thread only, never in a request that happened to flush.
+        """
+        self._flush_listeners.append(callback)
+
+    def follow(self, callback) -> None:
+        """
+        Register callback(rows) for rows committed by any process sharing the database
+        (ROW_FIELDS order, in id order), read on the flusher thread after each flush. Unlike
+        on_add it sees every worker's complaints, up to one flush interval late. Register
+        before start().
+        """
+        self._followers.append(callback)
+
+    def begin_following(self) -> Dict[str, Dict[str, int]]:
+        """
+        All-time counts (as trends("all")) and, with followers, the follow() position, read
+        in one transaction: every committed row is either in the returned counts or
+        delivered to the followers later, never both. Call before start().
+        """
+        self.flush()
+        with self._db_lock:
+            conn = self._connect()
+            conn.execute("BEGIN")  # WAL: both reads below see the same snapshot of the database
+            try:
+                rows = conn.execute(
+                    "SELECT dim, key, SUM(count) FROM aggregates WHERE scope = 'all' AND scope_key = '' AND bucket = ?"
+                    " GROUP BY dim, key",
+                    (ALL_TIME_BUCKET,),
+                ).fetchall()
+                if self._followers:
+                    self.followed_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM complaints").fetchone()[0]
+            finally:
+                conn.execute("COMMIT")
+        return _counts(rows)
+
+    def on_add(self, callback) -> None:
+        """Register callback(rows) run for every recorded batch, before it is flushed (e.g. live detectors)."""
+        self._add_listeners.append(callback)
+
+    def _flush_loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            self._notify_flushed()
+            if self._followers:
+                self._read_followed()
+
+    def _notify_flushed(self) -> None:
+        if not self._written.is_set():
+            return
+        self._written.clear()
+        for cb in self._flush_listeners:
+            try:
+                cb()
+            except Exception as e:
+                print("Complaint store flush listener failed:", e)
+
+    def _read_followed(self) -> None:
+        # SQLite serializes writers, so row ids grow in commit order across processes
+        while True:
+            with self._db_lock:
+                rows = self._connect().execute(
+                    f"SELECT id, {', '.join(ROW_FIELDS)} FROM complaints WHERE id > ? ORDER BY id LIMIT ?",
+                    (self.followed_id or 0, self.batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            self.followed_id = rows[-1][0]
+            batch = [r[1:] for r in rows]
+            for cb in self._followers:
+                try:
+                    cb(batch)
+                except Exception as e:
+                    print("Complaint store follower failed:", e)
+
+    def add(
+        self,
+        text: str,
+        category: str,
+        severity: str,
+        cluster_id: int,
+        station: Optional[str] = None,
+        train_number: Optional[str] = None,
+        model_version: Optional[str] = None,
+        incident_id: Optional[str] = None,
+        is_duplicate: bool = False,
+        ts: Optional[float] = None,
+    ) -> None:
+        self.add_many([(
+            ts or time.time(), text, category, severity, int(cluster_id), station, train_number,
+            model_version, incident_id, int(is_duplicate),
+        )])
+
+    def add_many(self, rows: List[tuple]) -> None:
+        """
+        rows: tuples in ROW_FIELDS order. Only buffers them: a full buffer is written by
+        the flusher thread, so callers (e.g. the event loop) never wait for SQLite. The
+        caller flushes itself only without a flusher, or when the flusher falls far behind.
+        """
+        with self._buf_lock:
+            self._buffer.extend(rows)
+            pending = len(self._buffer)
+        for cb in self._add_listeners:
+            cb(rows)
+        if pending >= self.batch_size * MAX_BUFFERED_BATCHES or (pending >= self.batch_size and self._flusher is None):
+            self.flush()
+        elif pending >= self.batch_size:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write buffered complaints and their counter increments in one transaction."""
+        with self._buf_lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+        deltas: Counter = Counter()
+        for ts, _, category, severity, cluster_id, station, train_number, _, _, is_duplicate in rows:
+            bucket = int(ts // BUCKET_SECONDS)
+            scopes = [("all", "")]
+            if station:
+                scopes.append(("station", station))
+            if train_number:
+                scopes.append(("train", train_number))
+            for scope, scope_key in scopes:
+                for b in (bucket, ALL_TIME_BUCKET):
+                    if is_duplicate:
+                        deltas[(scope, scope_key, b, "duplicates", "all")] += 1
+                        continue
+                    deltas[(scope, scope_key, b, "category", category)] += 1
+                    deltas[(scope, scope_key, b, "severity", severity)] += 1
+                    deltas[(scope, scope_key, b, "cluster", str(cluster_id))] += 1
+        with self._db_lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    f"INSERT INTO complaints ({', '.join(ROW_FIELDS)}) VALUES ({', '.join('?' * len(ROW_FIELDS))})",
+                    rows,
+                )
+                conn.executemany(
+                    "INSERT INTO aggregates (scope, scope_key, bucket, dim, key, count) VALUES (?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (scope, scope_key, bucket, dim, key) DO UPDATE SET count = count + excluded.count",
+                    [k + (v,) for k, v in deltas.items()],
+                )
+        self._written.set()
+        if self._flusher is None:
+            self._notify_flushed()  # no flusher thread (e.g. scripts): run the listeners here
+        return len(rows)
+
+    def trends(
+        self,
+        window: str = "all",
+        station: Optional[str] = None,
+        train_number: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Counts by category/severity/cluster (+ duplicates) for a window ('hour', 'day',
+        'week', 'all'), for all complaints or one station or one train (not both).
+        """
+        if window not in WINDOWS:
+            raise ValueError(f"Unknown window {window!r}; expected one of {list(WINDOWS)}")
+        if station and train_number:
+            raise ValueError("Filter by station or by train_number, not both")
+        self.flush()
+        if train_number:
+            scope, scope_key = "train", train_number
+        elif station:
+            scope, scope_key = "station", station
+        else:
+            scope, scope_key = "all", ""
+        seconds = WINDOWS[window]
+        if seconds is None:
+            where, params = "bucket = ?", (ALL_TIME_BUCKET,)
+        else:
+            # the bucket holding (now - window) is included, so the whole window is covered
+            where, params = "bucket >= ?", (int(((now or time.time()) - seconds) // BUCKET_SECONDS),)
+        with self._db_lock:
+            conn = self._connect()
+            cur = conn.execute(
+                f"SELECT dim, key, SUM(count) FROM aggregates WHERE scope = ? AND scope_key = ? AND {where}"
+                " GROUP BY dim, key",
+                (scope, scope_key) + params,
+            )
+            rows = cur.fetchall()
+        return _counts(rows)
+
+    def count(self) -> int:
+        """Total stored complaints, duplicates included (all-time counters, no table scan)."""
+        counts = self.trends("all")
+        return sum(counts["category"].values()) + counts["duplicates"].get("all", 0)
+
+    def iter_unique(self, after_id: int = 0, limit: Optional[int] = None, batch: int = 5000) -> Iterator[List[tuple]]:
+        """
+        Yield batches of (id, text) for stored complaints that are not near-duplicates,
+        in id order, starting after `after_id`; with `limit`, only the newest `limit` of them.
+        Reads committed rows only (no flush), so it is safe to call from a flush listener.
+        """
+        if limit is not None:
+            with self._db_lock:
+                row = self._connect().execute(
+                    "SELECT id FROM complaints WHERE is_duplicate = 0 AND id > ? ORDER BY id DESC LIMIT 1 OFFSET ?",
+                    (after_id, limit),
+                ).fetchone()
+            if row is not None:
+                after_id = row[0]
+        while True:
+            with self._db_lock:
+                rows = self._connect().execute(
+                    "SELECT id, text FROM complaints WHERE is_duplicate = 0 AND id > ? ORDER BY id LIMIT ?",
+                    (after_id, batch),
+                ).fetchall()
+            if not rows:
+                return
+            yield rows
+            after_id = rows[-1][0]
+
+    def iter_since(self, since_ts: float, batch: int = 5000, until_id: Optional[int] = None) -> Iterator[List[tuple]]:
+        """
+        Yield batches of committed rows (ROW_FIELDS order) recorded at or after `since_ts`,
+        in id order, up to `until_id` if given. Walks back from the newest id, so only the
+        recent tail is read.
+        """
+        with self._db_lock:
+            row = self._connect().execute(
+                "SELECT id FROM complaints WHERE ts < ? ORDER BY id DESC LIMIT 1", (since_ts,)
+            ).fetchone()
+        after_id = row[0] if row is not None else 0
+        while True:
+            with self._db_lock:
+                rows = self._connect().execute(
+                    f"SELECT id, {', '.join(ROW_FIELDS)} FROM complaints WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+                    (after_id, until_id if until_id is not None else _MAX_ROW_ID, batch),
+                ).fetchall()
+            if not rows:
+                return
+            yield [r[1:] for r in rows]
+            after_id = rows[-1][0]
+
+    def get_many(self, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Stored complaints by id."""
+        if not ids:
+            return {}
+        fields = ("id", "ts", "text", "category", "severity", "station", "train_number", "incident_id")
+        with self._db_lock:
+            rows = self._connect().execute(
+                f"SELECT {', '.join(fields)} FROM complaints WHERE id IN ({', '.join('?' * len(ids))})",
+                [int(i) for i in ids],
+            ).fetchall()
+        return {row[0]: dict(zip(fields, row)) for row in rows}
@@ -1,15 +1,31 @@
 """
 Training script: Preprocessing pipeline, Classification, Clustering, Severity, Evaluation.
 Run once to generate models and metrics for the hackathon demo.
+
+Preprocessing runs in parallel chunks on a process pool, and the category CV,
+severity CV, clustering and projection stages run concurrently. Clustering uses
+MiniBatchKMeans with k chosen by silhouette score (see clustering.py). Wall-clock time
+and peak memory of every stage are saved under "training" in evaluation_metrics.json.
+The fitted models are also exported as a memory-mappable bundle (see bundle.py).
+
+Usage:
+    python train.py [--corpus complaints.jsonl|complaints.csv] [--workers N] [--chunk-size N]
+                    [--n-clusters K | --k-max K] [--profile-memory]
 """
+import argparse
 import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 import joblib
 import numpy as np
 from pathlib import Path
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.linear_model import SGDClassifier
-from sklearn.cluster import KMeans
 from sklearn.model_selection import cross_val_predict, cross_validate
 from sklearn.metrics import (
     accuracy_score,
@@ -22,89 +38,276 @@ from config import (
     MODELS_DIR,
     CATEGORIES,
     SEVERITY_LEVELS,
-    VECTORIZER_PATH,
-    CLASSIFIER_PATH,
-    CLUSTER_MODEL_PATH,
-    SEVERITY_MODEL_PATH,
-    METRICS_PATH,
+    VERSIONS_DIR,
+    CURRENT_VERSION_PATH,
+    VECTORIZER_FILE,
+    CLASSIFIER_FILE,
+    CLUSTER_MODEL_FILE,
+    SEVERITY_MODEL_FILE,
+    METRICS_FILE,
+    PROJECTION_FILE,
+    CLUSTER_VIZ_FILE,
+    BUNDLE_DIR,
 )
 from preprocessing import preprocess_batch
+from corpus import iter_records, chunked
+from viz import fit_projection, build_points
+from clustering import fit_clusters, K_MAX
+from bundle import export_bundle
 from data.sample_complaints import get_training_data
 
+VIZ_TEXT_CHARS = 80  # only a snippet of each text is kept (for the cluster viz tooltips)
 
-def main():
-    MODELS_DIR.mkdir(exist_ok=True)
-    data = get_training_data()
-    texts = [d["text"] for d in data]
-    categories = [d["category"] for d in data]
-    severities = [d["severity"] for d in data]
-
-    # 1) Preprocessing pipeline
-    X_processed = preprocess_batch(texts)
-    print("Preprocessing pipeline: done.")
-
-    # 2) TF-IDF Vectorizer
-    vectorizer = TfidfVectorizer(
-        max_features=5000,
-        ngram_range=(1, 2),
-        min_df=1,
-        max_df=0.95,
-        sublinear_tf=True,
-    )
-    X_tfidf = vectorizer.fit_transform(X_processed)
-    joblib.dump(vectorizer, VECTORIZER_PATH)
-    print("TF-IDF vectorizer: saved.")
 
-    # 3) Category classifier (Multinomial NB for text)
+def publish_version(version: str) -> None:
+    """Point models/CURRENT at `version` (atomic rename, so readers never see a partial file)."""
+    tmp = CURRENT_VERSION_PATH.with_suffix(".tmp")
+    tmp.write_text(version + "\n", encoding="utf-8")
+    os.replace(tmp, CURRENT_VERSION_PATH)
+
+
+def _peak_rss_mb():
+    """High-water resident memory of this process in MB (None where unsupported, e.g. Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def _measured(profile_memory, fn, *args):
+    """
+    Run fn(*args) and return (result, stats) measured in the executing process.
+    stats: seconds, peak_rss_mb (process high-water mark) and, with profile_memory,
+    peak_alloc_mb (tracemalloc peak of this stage alone; accurate but several times slower).
+    """
+    if profile_memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn(*args)
+    stats = {"seconds": round(time.perf_counter() - t0, 4), "peak_rss_mb": _peak_rss_mb()}
+    if profile_memory:
+        stats["peak_alloc_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        tracemalloc.stop()
+    return result, stats
+
+
+def _submit(pool, fn, *args) -> Future:
+    """pool.submit, or run inline when training single-process."""
+    if pool is not None:
+        return pool.submit(fn, *args)
+    fut = Future()
+    fut.set_result(fn(*args))
+    return fut
+
+
+# ---- Stage tasks (top-level so they can run in worker processes) ----
+
+def _category_task(X, y_cat, cv):
     clf = MultinomialNB(alpha=0.1)
-    y_cat = np.array(categories)
-    clf.fit(X_tfidf, y_cat)
-    joblib.dump(clf, CLASSIFIER_PATH)
+    clf.fit(X, y_cat)
     # Evaluation: accuracy & F1
-    pred_cat = cross_val_predict(MultinomialNB(alpha=0.1), X_tfidf, y_cat, cv=min(5, len(data) // 2))
-    acc = accuracy_score(y_cat, pred_cat)
-    f1 = f1_score(y_cat, pred_cat, average="weighted", zero_division=0)
-    report = classification_report(y_cat, pred_cat, output_dict=True, zero_division=0)
-    cm = confusion_matrix(y_cat, pred_cat)
-    print("Category classifier: saved. Accuracy =", round(acc, 4), "F1 =", round(f1, 4))
+    pred_cat = cross_val_predict(MultinomialNB(alpha=0.1), X, y_cat, cv=cv)
+    return clf, {
+        "accuracy": round(float(accuracy_score(y_cat, pred_cat)), 4),
+        "f1_weighted": round(float(f1_score(y_cat, pred_cat, average="weighted", zero_division=0)), 4),
+        "classification_report": classification_report(y_cat, pred_cat, output_dict=True, zero_division=0),
+        "confusion_matrix": confusion_matrix(y_cat, pred_cat).tolist(),
+    }
 
-    # 4) Severity model (same TF-IDF, different target)
-    sev_map = {s: i for i, s in enumerate(SEVERITY_LEVELS)}
-    y_sev = np.array([sev_map[s] for s in severities])
+
+def _severity_task(X, y_sev, cv):
     sev_clf = SGDClassifier(loss="log_loss", max_iter=1000, random_state=42)
-    sev_clf.fit(X_tfidf, y_sev)
-    joblib.dump(sev_clf, SEVERITY_MODEL_PATH)
-    pred_sev = cross_val_predict(SGDClassifier(loss="log_loss", max_iter=1000, random_state=42), X_tfidf, y_sev, cv=min(5, len(data) // 2))
-    sev_acc = accuracy_score(y_sev, pred_sev)
-    sev_f1 = f1_score(y_sev, pred_sev, average="weighted", zero_division=0)
-    print("Severity model: saved. Accuracy =", round(sev_acc, 4), "F1 =", round(sev_f1, 4))
-
-    # 5) Clustering (recurring issue clusters)
-    n_clusters = min(6, max(2, len(data) // 10))
-    km = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-    km.fit(X_tfidf)
-    joblib.dump(km, CLUSTER_MODEL_PATH)
-    print("Clustering model: saved. n_clusters =", n_clusters)
-
-    # 6) Persist evaluation metrics
+    sev_clf.fit(X, y_sev)
+    pred_sev = cross_val_predict(SGDClassifier(loss="log_loss", max_iter=1000, random_state=42), X, y_sev, cv=cv)
+    return sev_clf, {
+        "accuracy": round(float(accuracy_score(y_sev, pred_sev)), 4),
+        "f1_weighted": round(float(f1_score(y_sev, pred_sev, average="weighted", zero_division=0)), 4),
+    }
+
+
+def _cluster_task(X, feature_names, n_clusters, k_max):
+    return fit_clusters(X, feature_names, n_clusters=n_clusters, k_max=k_max)
+
+
+def _iter_training_records(corpus):
+    if corpus is None:
+        return iter(get_training_data())
+    return iter_records(corpus)
+
+
+def load_and_preprocess(corpus, pool, workers: int, chunk_size: int, profile_memory: bool = False):
+    """
+    Stream the corpus, preprocessing fixed-size chunks on the pool while reading ahead.
+    Returns (processed texts, text snippets, categories, severities, stage stats).
+    """
+    processed, snippets, categories, severities = [], [], [], []
+    skipped = 0
+    chunk_stats = []
+    pending = deque()
+
+    def collect(fut):
+        result, stats = fut.result()
+        processed.extend(result)
+        chunk_stats.append(stats)
+
+    t0 = time.perf_counter()
+    for chunk in chunked(_iter_training_records(corpus), chunk_size):
+        texts = []
+        for rec in chunk:
+            text, category, severity = rec.get("text"), rec.get("category"), rec.get("severity")
+            if not text or not category or severity not in SEVERITY_LEVELS:
+                skipped += 1
+                continue
+            texts.append(text)
+            snippets.append(text[:VIZ_TEXT_CHARS])
+            categories.append(category)
+            severities.append(severity)
+        pending.append(_submit(pool, _measured, profile_memory, preprocess_batch, texts))
+        # bounded read-ahead keeps memory flat on large archives
+        while len(pending) > 2 * workers:
+            collect(pending.popleft())
+    while pending:
+        collect(pending.popleft())
+    stats = {
+        "seconds": round(time.perf_counter() - t0, 4),
+        "peak_rss_mb": _peak_rss_mb(),
+        "worker_peak_rss_mb": max((c["peak_rss_mb"] or 0 for c in chunk_stats), default=0),
+        "chunks": len(chunk_stats),
+        "skipped_records": skipped,
+    }
+    if profile_memory:
+        stats["peak_alloc_mb"] = max((c["peak_alloc_mb"] for c in chunk_stats), default=0)
+    return processed, snippets, categories, severities, stats
+
+
+def main(corpus=None, workers=None, chunk_size=2000, profile_memory=False, n_clusters=None, k_max=K_MAX):
+    workers = max(1, workers or os.cpu_count() or 1)
+    MODELS_DIR.mkdir(exist_ok=True)
+    version = time.strftime("%Y%m%d-%H%M%S")
+    out_dir = VERSIONS_DIR / version
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stages = {}
+    t_start = time.perf_counter()
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        # 1) Preprocessing pipeline (parallel chunks, streamed from the corpus)
+        X_processed, texts, categories, severities, stages["preprocess"] = load_and_preprocess(
+            corpus, pool, workers, chunk_size, profile_memory
+        )
+        if len(X_processed) < 4:
+            raise SystemExit(f"Not enough training records ({len(X_processed)}); need at least 4.")
+        print("Preprocessing pipeline: done.", len(X_processed), "complaints in", stages["preprocess"]["chunks"], "chunks.")
+
+        # 2) TF-IDF Vectorizer
+        vectorizer = TfidfVectorizer(
+            max_features=5000,
+            ngram_range=(1, 2),
+            min_df=1,
+            max_df=0.95,
+            sublinear_tf=True,
+        )
+        X_tfidf, stages["vectorize"] = _measured(profile_memory, vectorizer.fit_transform, X_processed)
+        del X_processed
+        joblib.dump(vectorizer, out_dir / VECTORIZER_FILE)
+        print("TF-IDF vectorizer: saved.")
+
+        # 3-5) Category model, severity model, clustering and 2D projection run concurrently
+        cv = min(5, len(texts) // 2)
+        y_cat = np.array(categories)
+        sev_map = {s: i for i, s in enumerate(SEVERITY_LEVELS)}
+        y_sev = np.array([sev_map[s] for s in severities])
+        feature_names = vectorizer.get_feature_names_out()
+        futures = {
+            "category": _submit(pool, _measured, profile_memory, _category_task, X_tfidf, y_cat, cv),
+            "severity": _submit(pool, _measured, profile_memory, _severity_task, X_tfidf, y_sev, cv),
+            "clustering": _submit(
+                pool, _measured, profile_memory, _cluster_task, X_tfidf, feature_names, n_clusters, k_max
+            ),
+            "projection": _submit(pool, _measured, profile_memory, fit_projection, X_tfidf),
+        }
+        results = {}
+        for name, fut in futures.items():
+            results[name], stages[name] = fut.result()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # 3) Category classifier (Multinomial NB for text)
+    clf, cat_metrics = results["category"]
+    joblib.dump(clf, out_dir / CLASSIFIER_FILE)
+    print("Category classifier: saved. Accuracy =", cat_metrics["accuracy"], "F1 =", cat_metrics["f1_weighted"])
+
+    # 4) Severity model (same TF-IDF, different target)
+    sev_clf, sev_metrics = results["severity"]
+    joblib.dump(sev_clf, out_dir / SEVERITY_MODEL_FILE)
+    print("Severity model: saved. Accuracy =", sev_metrics["accuracy"], "F1 =", sev_metrics["f1_weighted"])
+
+    # 5) Clustering (recurring issue clusters, k chosen automatically unless --n-clusters)
+    km, cluster_metrics = results["clustering"]
+    n_clusters = cluster_metrics["n_clusters"]
+    joblib.dump(km, out_dir / CLUSTER_MODEL_FILE)
+    print("Clustering model: saved. n_clusters =", n_clusters, "silhouette =", cluster_metrics["silhouette"])
+    for label in cluster_metrics["labels"]:
+        print(f"  cluster {label['cluster'] + 1:>2} ({label['size']:>6}): {', '.join(label['terms'][:5])}")
+
+    # 5b) 2D projection for the dashboard (sparse TruncatedSVD, reused for new complaints)
+    projection, coords = results["projection"]
+    if projection is not None:
+        joblib.dump(projection, out_dir / PROJECTION_FILE)
+        viz = {"points": build_points(texts, coords, km.labels_), "n_clusters": int(n_clusters)}
+        with open(out_dir / CLUSTER_VIZ_FILE, "w") as f:
+            json.dump(viz, f)
+        print("Cluster visualization: saved", len(viz["points"]), "points.")
+
+    # 5c) Memory-mappable export of the same models (what the API maps; shared across workers)
+    _, stages["export_bundle"] = _measured(
+        profile_memory, export_bundle, out_dir / BUNDLE_DIR, vectorizer, clf, sev_clf, km, projection
+    )
+    print("Model bundle: saved to", out_dir / BUNDLE_DIR)
+
+    # 6) Persist evaluation metrics (+ training cost, to track it across runs)
     metrics = {
-        "category": {
-            "accuracy": round(float(acc), 4),
-            "f1_weighted": round(float(f1), 4),
-            "classification_report": report,
-            "confusion_matrix": cm.tolist(),
+        "category": cat_metrics,
+        "severity": sev_metrics,
+        "clustering": cluster_metrics,
+        "model_version": version,
+        "training": {
+            "n_samples": len(texts),
+            "corpus": str(Path(corpus).resolve()) if corpus else "sample_complaints",  # read by online.py
+            "workers": workers,
+            "chunk_size": chunk_size,
+            "profile_memory": profile_memory,
+            "total_seconds": round(time.perf_counter() - t_start, 4),
+            "stages": stages,
         },
-        "severity": {
-            "accuracy": round(float(sev_acc), 4),
-            "f1_weighted": round(float(sev_f1), 4),
-        },
-        "clustering": {"n_clusters": int(n_clusters)},
     }
-    with open(METRICS_PATH, "w") as f:
+    with open(out_dir / METRICS_FILE, "w") as f:
         json.dump(metrics, f, indent=2)
-    print("Evaluation metrics: saved to", METRICS_PATH)
+    print("Evaluation metrics: saved to", out_dir / METRICS_FILE)
+    for name, st in stages.items():
+        print(f"  {name:<12} {st['seconds']:>9.3f}s  peak RSS {st['peak_rss_mb']} MB")
+
+    # 7) Make this version the one the API serves
+    publish_version(version)
+    print("Model version", version, "published. A running API picks it up via POST /api/models/reload.")
     print("Training complete. Run the API and frontend to use the system.")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Train Rail Saarthi models.")
+    parser.add_argument("--corpus", type=Path, default=None,
+                        help="CSV/JSONL file with text, category, severity columns (default: built-in sample data)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Complaints per preprocessing chunk")
+    parser.add_argument("--n-clusters", type=int, default=None,
+                        help="Fixed number of clusters (default: chosen by silhouette score)")
+    parser.add_argument("--k-max", type=int, default=K_MAX, help="Largest k tried by the automatic selection")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="Also record per-stage allocation peaks with tracemalloc (slower)")
+    args = parser.parse_args()
+    main(corpus=args.corpus, workers=args.workers, chunk_size=args.chunk_size, profile_memory=args.profile_memory,
+         n_clusters=args.n_clusters, k_max=args.k_max)
@@ -0,0 +1,107 @@
+"""
+Clustering visualization: 2D projection computed once (at train time) and served from cache.
+TruncatedSVD works directly on the sparse TF-IDF matrix, so no dense copy of the corpus is made,
+and the fitted projection maps new complaints into the same plane without refitting.
+"""
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+def build_points(texts: List[str], coords: np.ndarray, labels: np.ndarray) -> List[Dict[str, Any]]:
+    return [
+        {"x": round(float(coords[i, 0]), 6), "y": round(float(coords[i, 1]), 6), "cluster": int(labels[i]), "text": texts[i][:80]}
+        for i in range(len(texts))
+    ]
+
+
+def fit_projection(X, random_state: int = 42):
+    """Fit a 2-component TruncatedSVD on sparse X. Returns (projection, coords) or (None, None) if X is too small."""
+    from sklearn.decomposition import TruncatedSVD
+
+    if X.shape[0] < 3 or X.shape[1] < 3:
+        return None, None
+    svd = TruncatedSVD(n_components=2, random_state=random_state)
+    coords = svd.fit_transform(X)
+    return svd, coords
+
+
+def project(projection, X) -> Optional[np.ndarray]:
+    """2D coordinates for already-vectorized complaints, or None when no projection is stored."""
+    if projection is None:
+        return None
+    return projection.transform(X)
+
+
+def downsample(points: List[Dict[str, Any]], max_points: int) -> List[Dict[str, Any]]:
+    """Stratified by cluster (every cluster keeps a proportional share), deterministic."""
+    n = len(points)
+    if max_points <= 0 or n <= max_points:
+        return points
+    by_cluster: Dict[int, List[int]] = {}
+    for i, p in enumerate(points):
+        by_cluster.setdefault(p["cluster"], []).append(i)
+    keep = []
+    for idx in by_cluster.values():
+        k = max(1, round(len(idx) * max_points / n))
+        keep.extend(idx[j] for j in np.linspace(0, len(idx) - 1, min(k, len(idx))).astype(int))
+    keep.sort()
+    return [points[i] for i in keep[:max_points]]
+
+
+def etag_for(version: str, *params) -> str:
+    key = "|".join([version] + [str(p) for p in params])
+    return '"' + hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+class VizCache:
+    """
+    Per-model-version visualization payloads. Versions trained before projections were
+    stored get theirs computed once (sparse SVD), in the background via warm(), never
+    inside a scoring request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_version: Dict[str, Dict[str, Any]] = {}
+        self._warming: Optional[str] = None  # version being computed by warm()
+
+    def get(self, models, compute) -> Dict[str, Any]:
+        """Cached {'points', 'n_clusters', 'projection'} for models.version; `compute(models)` fills misses."""
+        viz = self._by_version.get(models.version)
+        if viz is not None:
+            return viz
+        with self._lock:
+            viz = self._by_version.get(models.version)
+            if viz is None:
+                viz = compute(models)
+                # only the active version's payload is worth keeping
+                self._by_version = {models.version: viz}
+        return viz
+
+    def peek(self, models) -> Optional[Dict[str, Any]]:
+        """Payload for models.version if it is ready; never computes."""
+        return self._by_version.get(models.version)
+
+    def warm(self, models, compute) -> None:
+        """Compute the payload for models.version in a background thread (no-op if ready or running)."""
+        if models.version in self._by_version or self._warming == models.version:
+            return
+        self._warming = models.version
+
+        def run():
+            try:
+                self.get(models, compute)
+            except Exception as e:  # noqa: BLE001 - the viz is optional; scoring works without it
+                print("Clustering viz:", e)
+            finally:
+                if self._warming == models.version:
+                    self._warming = None
+
+        threading.Thread(target=run, name="viz-warm", daemon=True).start()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_version = {}
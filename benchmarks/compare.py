@@ -0,0 +1,68 @@
+"""
+Compare two result files of the same benchmark (micro, load or scaling) written with --json.
+
+Prints each metric for the baseline and the candidate and the relative change;
+changes beyond --threshold percent in the bad direction are marked "slower".
+
+Usage (from the project root):
+    python -m benchmarks.compare before.json after.json [--threshold 5]
+"""
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+# metric -> True if higher is better
+LOAD_METRICS = {"throughput_rps": True, "p50_ms": False, "p95_ms": False, "p99_ms": False}
+
+
+def _rows(results: Dict) -> Iterator[Tuple[str, str, Optional[float], bool]]:
+    if results.get("benchmark") == "micro":
+        for stage, r in results.get("stages", {}).items():
+            yield stage, "per_item_us", r.get("per_item_us"), False
+    elif results.get("benchmark") == "load":
+        for level in results.get("levels", []):
+            for metric, higher_better in LOAD_METRICS.items():
+                yield f"c={level['concurrency']}", metric, level.get(metric), higher_better
+    elif results.get("benchmark") == "scaling":
+        for level in results.get("levels", []):
+            for metric, higher_better in LOAD_METRICS.items():
+                yield f"workers={level['workers']}", metric, level.get(metric), higher_better
+    else:
+        raise SystemExit(f"Unknown benchmark type: {results.get('benchmark')!r}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("candidate", type=Path)
+    parser.add_argument("--threshold", type=float, default=5.0, help="Percent change reported as a regression")
+    args = parser.parse_args()
+
+    base = json.loads(args.baseline.read_text(encoding="utf-8"))
+    cand = json.loads(args.candidate.read_text(encoding="utf-8"))
+    if base.get("benchmark") != cand.get("benchmark"):
+        raise SystemExit("The two files come from different benchmarks")
+    for label, r in (("baseline", base), ("candidate", cand)):
+        env = r.get("environment", {})
+        print(f"{label:<10} {env.get('git_commit')}  {env.get('timestamp')}  {' '.join(env.get('argv', []))}")
+
+    candidate = {(name, metric): value for name, metric, value, _ in _rows(cand)}
+    regressions = 0
+    print(f"\n{'':<36} {'metric':<14} {'baseline':>10} {'candidate':>10} {'change':>9}")
+    for name, metric, before, higher_better in _rows(base):
+        after = candidate.get((name, metric))
+        if before is None or after is None:
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        worse = -change if higher_better else change
+        flag = ""
+        if worse > args.threshold:
+            flag = "  slower"
+            regressions += 1
+        print(f"{name:<36} {metric:<14} {before:>10} {after:>10} {change:>+8.1f}%{flag}")
+    print(f"\n{regressions} metric(s) more than {args.threshold:g}% worse")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+In-process load test of the FastAPI app: latency percentiles and throughput of an
+inference endpoint at several concurrency levels.
+
+The app runs in this process (its lifespan included: eager model load, micro-batcher,
+store) behind httpx's ASGI transport, so the numbers measure the application and not
+the network or uvicorn. Client and server share one event loop and CPU; treat the
+results as relative (before/after a change), not as capacity figures for a
+deployment. Requests use synthetic complaints, written to a throw-away database.
+
+Usage (from the project root, after `cd backend && python train.py`):
+    python -m benchmarks.load_test [--concurrency 1,8,32,64] [--requests 1000]
+        [--endpoint analyze] [--no-dedup] [--json load.json]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.common import environment, latency_summary, write_results
+from benchmarks.synthetic import generate
+
+ENDPOINTS = ("analyze", "classify", "severity", "analyze-batch")
+
+
+def make_payloads(endpoint: str, n: int, batch_size: int, seed: int) -> List[Dict[str, Any]]:
+    if endpoint == "analyze-batch":
+        corpus = generate(n * batch_size, seed)
+        return [
+            {"texts": [d["text"] for d in corpus[i:i + batch_size]]}
+            for i in range(0, len(corpus), batch_size)
+        ]
+    return [
+        {"text": d["text"], "station": d["station"], "train_number": d["train_number"]}
+        for d in generate(n, seed)
+    ]
+
+
+async def _run_level(client, endpoint: str, payloads: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    it = iter(payloads)
+
+    async def worker():
+        for body in it:  # shared iterator: each payload is sent once
+            t0 = time.perf_counter()
+            try:
+                r = await client.post(f"/api/{endpoint}", json=body)
+                status = r.status_code
+            except Exception as e:  # noqa: BLE001 - a benchmark records failures instead of stopping
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - t0)
+            if status != 200:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - t0
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 1),
+        "wall_s": round(wall, 3),
+        **latency_summary(latencies),
+    }
+
+
+async def run(args) -> Dict[str, Any]:
+    import httpx
+    from backend.main import app
+
+    levels = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            models = (await client.get("/api/models")).json().get("active") or {}
+            if not models:
+                raise SystemExit("No trained models. Run: cd backend && python train.py")
+            warmup = make_payloads(args.endpoint, args.warmup, args.batch_size, seed=1)
+            await _run_level(client, args.endpoint, warmup, min(8, max(args.concurrency)))
+            for i, c in enumerate(args.concurrency):
+                payloads = make_payloads(args.endpoint, args.requests, args.batch_size, seed=100 + i)
+                before = (await client.get("/api/batching")).json()
+                level = await _run_level(client, args.endpoint, payloads, c)
+                after = (await client.get("/api/batching")).json()
+                if after.get("enabled"):
+                    batches = after["batches"] - before["batches"]
+                    level["server_avg_batch_size"] = round((after["submitted"] - before["submitted"]) / max(batches, 1), 2)
+                levels.append(level)
+                print(f"c={c:<4} {level['throughput_rps']:>8} req/s  p50 {level.get('p50_ms')} ms  "
+                      f"p95 {level.get('p95_ms')} ms  p99 {level.get('p99_ms')} ms  errors {level['errors'] or 0}")
+    return {
+        "endpoint": args.endpoint,
+        "batch_size": args.batch_size if args.endpoint == "analyze-batch" else 1,
+        "model_version": models.get("version"),
+        "artifact_format": models.get("artifact_format"),
+        "levels": levels,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--endpoint", choices=ENDPOINTS, default="analyze")
+    parser.add_argument("--concurrency", type=lambda s: [int(x) for x in s.split(",")], default=[1, 8, 32, 64],
+                        help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=100, help="Untimed requests before the first level")
+    parser.add_argument("--batch-size", type=int, default=100, help="Texts per request for analyze-batch")
+    parser.add_argument("--no-dedup", action="store_true", help="Disable near-duplicate reuse (every request is scored)")
+    parser.add_argument("--json", type=Path, default=None, help="Also write results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # configuration is read at import time, so set it before the app is imported
+        os.environ["RAIL_SAARTHI_DB"] = str(Path(tmp) / "load_test.db")
+        if args.no_dedup:
+            os.environ["RAIL_SAARTHI_DEDUP"] = "0"
+        results = {
+            "benchmark": "load",
+            "environment": environment(),
+            "dedup": not args.no_dedup,
+            **asyncio.run(run(args)),
+        }
+    if args.json:
+        write_results(args.json, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Micro-benchmarks of the inference pipeline stages on a synthetic corpus.
+
+Times clean_text, tokenize and preprocess_batch (with a cold and a warm preprocessing
+cache), the vectorizer transform, each model's predict (category, severity, cluster,
+2D projection) and the severity keyword rules, for one complaint at a time and for
+the whole corpus as one batch. Uses the model set the API would serve (same
+RAIL_SAARTHI_MODEL_FORMAT), so results reflect the artifacts of the latest training.
+Each stage runs --repeat times; the median is reported.
+
+Usage (from the project root, after `cd backend && python train.py`):
+    python -m benchmarks.micro [-n 5000] [--repeat 5] [--json micro.json]
+"""
+import argparse
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from benchmarks.common import environment, write_results
+from benchmarks.synthetic import generate
+
+SINGLE_ITEMS = 500  # complaints scored one at a time for the batch-of-1 numbers
+
+
+def bench(fn: Callable[[], Any], n_items: int, repeat: int, setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    t = statistics.median(times)
+    return {
+        "per_item_us": round(t / n_items * 1e6, 3),
+        "items_per_s": round(n_items / t, 1) if t > 0 else None,
+        "total_ms": round(t * 1000, 3),
+        "items": n_items,
+    }
+
+
+def run(n: int, repeat: int) -> Dict[str, Any]:
+    from backend.preprocessing import clean_text, tokenize, preprocess_batch, clear_cache
+    from backend.registry import ModelRegistry
+    from backend.severity import resolve_severity, resolve_severity_batch
+    from backend.config import SEVERITY_LEVELS
+
+    m = ModelRegistry().load()
+    texts = [d["text"] for d in generate(n)]
+    single = texts[:SINGLE_ITEMS]
+    processed = preprocess_batch(texts)
+    X = m.vectorizer.transform(processed)
+    rows = [X[i] for i in range(len(single))]
+    ml_severities = [SEVERITY_LEVELS[int(i)] for i in m.severity_model.predict(X)]
+
+    stages: Dict[str, Dict[str, float]] = {}
+    stages["clean_text"] = bench(lambda: [clean_text(t) for t in texts], n, repeat)
+    stages["tokenize (cold cache)"] = bench(lambda: [tokenize(t) for t in texts], n, repeat, setup=clear_cache)
+    stages["tokenize (warm cache)"] = bench(lambda: [tokenize(t) for t in texts], n, repeat)
+    stages["preprocess_batch (cold cache)"] = bench(lambda: preprocess_batch(texts), n, repeat, setup=clear_cache)
+    stages["preprocess_batch (warm cache)"] = bench(lambda: preprocess_batch(texts), n, repeat)
+    stages["vectorizer.transform (batch)"] = bench(lambda: m.vectorizer.transform(processed), n, repeat)
+    stages["vectorizer.transform (single)"] = bench(
+        lambda: [m.vectorizer.transform([p]) for p in processed[:len(single)]], len(single), repeat
+    )
+    stages["category predict_proba (batch)"] = bench(lambda: m.classifier.predict_proba(X), n, repeat)
+    stages["category predict_proba (single)"] = bench(lambda: [m.classifier.predict_proba(r) for r in rows], len(rows), repeat)
+    stages["severity predict (batch)"] = bench(lambda: m.severity_model.predict(X), n, repeat)
+    stages["severity predict (single)"] = bench(lambda: [m.severity_model.predict(r) for r in rows], len(rows), repeat)
+    stages["cluster predict (batch)"] = bench(lambda: m.cluster_model.predict(X), n, repeat)
+    stages["cluster predict (single)"] = bench(lambda: [m.cluster_model.predict(r) for r in rows], len(rows), repeat)
+    if m.projection is not None:
+        stages["projection transform (batch)"] = bench(lambda: m.projection.transform(X), n, repeat)
+        stages["projection transform (single)"] = bench(lambda: [m.projection.transform(r) for r in rows], len(rows), repeat)
+    stages["resolve_severity (single)"] = bench(
+        lambda: [resolve_severity(s, t) for s, t in zip(ml_severities, texts)], n, repeat
+    )
+    stages["resolve_severity_batch"] = bench(lambda: resolve_severity_batch(ml_severities, texts), n, repeat)
+    return {
+        "model_version": m.version,
+        "artifact_format": m.artifact_format,
+        "n_features": int(X.shape[1]),
+        "corpus_size": n,
+        "stages": stages,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", type=int, default=5000, help="Synthetic complaints per batch stage")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per stage (median reported)")
+    parser.add_argument("--json", type=Path, default=None, help="Also write results to this file")
+    args = parser.parse_args()
+
+    results = {"benchmark": "micro", "environment": environment(), **run(args.n, args.repeat)}
+    print(f"model {results['model_version']} ({results['artifact_format']}), {results['n_features']:,} features, "
+          f"{args.n:,} complaints")
+    print(f"{'stage':<36} {'us/item':>10} {'items/s':>12}")
+    for name, r in results["stages"].items():
+        print(f"{name:<36} {r['per_item_us']:>10} {r['items_per_s']!s:>12}")
+    if args.json:
+        write_results(args.json, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Cold start and per-worker memory: joblib artifacts vs the memory-mapped bundle.
+
+Fits a model set with a large synthetic vocabulary (so the effect is visible; the demo
+models are tiny), saves it in both formats, then starts N worker processes per format
+the way uvicorn workers would start. Each worker imports what it needs, loads the
+models and scores one complaint; the parent records time-to-ready and reads the
+workers' RSS / PSS / private memory from /proc (Linux). Predictions of both formats
+are checked for agreement first.
+
+Usage (from the project root):
+    python -m benchmarks.model_load [--vocab 200000] [--workers 4] [--json results.json]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+ARTIFACTS = ("tfidf_vectorizer", "category_classifier", "severity_model", "cluster_model")
+PROBE = "train 12301 delayed by five hours at howrah no announcement"
+
+
+def build_models(out_dir: Path, vocab: int, n_docs: int, seed: int = 0) -> None:
+    """Fit TF-IDF/NB/SGD/KMeans/SVD on a synthetic corpus and save joblib files + bundle."""
+    import joblib
+    import numpy as np
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.naive_bayes import MultinomialNB
+
+    from backend.bundle import export_bundle
+    from backend.config import CATEGORIES
+    from backend.data.sample_complaints import get_training_data
+    from backend.preprocessing import preprocess_batch
+
+    rng = np.random.default_rng(seed)
+    samples = get_training_data()
+    base = preprocess_batch([d["text"] for d in samples])
+    words = np.array([f"w{i}" for i in range(vocab // 2)])
+    # Zipf-like word frequencies so bigrams spread over a large vocabulary
+    p = 1.0 / np.arange(1, len(words) + 1) ** 0.7
+    p /= p.sum()
+    docs, y_cat, y_sev = [], [], []
+    for i in range(n_docs):
+        j = i % len(base)
+        docs.append(base[j] + " " + " ".join(rng.choice(words, size=30, p=p)))
+        y_cat.append(samples[j]["category"])
+        y_sev.append(i % 4)
+    vectorizer = TfidfVectorizer(max_features=vocab, ngram_range=(1, 2), sublinear_tf=True)
+    X = vectorizer.fit_transform(docs)
+    models = [
+        vectorizer,
+        MultinomialNB(alpha=0.1).fit(X, y_cat),
+        SGDClassifier(loss="log_loss", max_iter=5, tol=None, random_state=42).fit(X, y_sev),
+        MiniBatchKMeans(n_clusters=len(CATEGORIES), n_init=1, random_state=42).fit(X),
+    ]
+    projection = TruncatedSVD(n_components=2, random_state=42).fit(X)
+    for name, model in zip(ARTIFACTS, models):
+        joblib.dump(model, out_dir / f"{name}.joblib")
+    joblib.dump(projection, out_dir / "projection_model.joblib")
+    export_bundle(out_dir / "bundle", *models, projection=projection)
+    print(f"Synthetic models: {len(vectorizer.vocabulary_):,} features, {n_docs:,} docs")
+
+
+def check_agreement(model_dir: Path, n: int = 500) -> None:
+    import joblib
+    import numpy as np
+    from backend.bundle import load_bundle
+    from backend.data.sample_complaints import get_training_data
+    from backend.preprocessing import preprocess_batch
+
+    texts = preprocess_batch([d["text"] for d in get_training_data()] * (n // 40 + 1))[:n]
+    vec, clf, sev, km = (joblib.load(model_dir / f"{a}.joblib") for a in ARTIFACTS)
+    b = load_bundle(model_dir / "bundle")
+    X, Xb = vec.transform(texts), b["vectorizer"].transform(texts)
+    assert abs(X - Xb).max() < 1e-9, "TF-IDF mismatch"
+    assert np.allclose(clf.predict_proba(X), b["classifier"].predict_proba(Xb)), "category mismatch"
+    assert (sev.predict(X) == b["severity_model"].predict(Xb)).all(), "severity mismatch"
+    assert (km.predict(X) == b["cluster_model"].predict(Xb)).all(), "cluster mismatch"
+    print(f"Agreement: joblib and bundle predictions identical on {n} complaints")
+
+
+def child(model_dir: str, fmt: str) -> None:
+    """Worker body: load, score one complaint, report, then stay alive until told to exit."""
+    t0 = time.perf_counter()
+    if fmt == "joblib":
+        import joblib
+        vec, clf, sev, km = (joblib.load(Path(model_dir) / f"{a}.joblib") for a in ARTIFACTS)
+    else:
+        from backend.bundle import load_bundle
+        b = load_bundle(Path(model_dir) / "bundle")
+        vec, clf, sev, km = b["vectorizer"], b["classifier"], b["severity_model"], b["cluster_model"]
+    t1 = time.perf_counter()
+    X = vec.transform([PROBE])
+    clf.predict_proba(X), sev.predict(X), km.predict(X)
+    t2 = time.perf_counter()
+    print(json.dumps({"load_s": round(t1 - t0, 4), "first_predict_ms": round((t2 - t1) * 1000, 3)}), flush=True)
+    sys.stdin.readline()
+
+
+def _memory_kb(pid: int) -> dict:
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        return {}
+    return {
+        "rss_mb": round(fields.get("Rss", 0) / 1024, 1),
+        "pss_mb": round(fields.get("Pss", 0) / 1024, 1),
+        "private_mb": round((fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)) / 1024, 1),
+    }
+
+
+def run_workers(model_dir: Path, fmt: str, n: int) -> dict:
+    procs, starts = [], []
+    for _ in range(n):
+        starts.append(time.perf_counter())
+        procs.append(subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.model_load", "--child", str(model_dir), fmt],
+            cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        ))
+    workers = []
+    for p, started in zip(procs, starts):
+        report = json.loads(p.stdout.readline())
+        report["ready_s"] = round(time.perf_counter() - started, 4)
+        workers.append(report)
+    # all workers are alive now, so shared pages are shared for real
+    for p, report in zip(procs, workers):
+        report.update(_memory_kb(p.pid))
+    for p in procs:
+        p.stdin.write("\n")
+        p.stdin.close()
+        p.wait()
+
+    def avg(key):
+        vals = [w[key] for w in workers if w.get(key) is not None]
+        return round(sum(vals) / len(vals), 3) if vals else None
+
+    summary = {k: avg(k) for k in ("ready_s", "load_s", "first_predict_ms", "rss_mb", "pss_mb", "private_mb")}
+    summary["workers"] = workers
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--vocab", type=int, default=200000, help="TF-IDF max_features of the synthetic model")
+    parser.add_argument("--docs", type=int, default=20000, help="Synthetic training documents")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes started per format")
+    parser.add_argument("--json", type=Path, default=None, help="Also write results to this file")
+    parser.add_argument("--child", nargs=2, metavar=("MODEL_DIR", "FORMAT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = Path(tmp)
+        build_models(model_dir, args.vocab, args.docs)
+        check_agreement(model_dir)
+        sizes = {
+            "joblib_mb": round(sum((model_dir / f"{a}.joblib").stat().st_size for a in ARTIFACTS) / 2**20, 2),
+            "bundle_mb": round(sum(p.stat().st_size for p in (model_dir / "bundle").iterdir()) / 2**20, 2),
+        }
+        results = {"vocab": args.vocab, "workers_per_format": args.workers, "artifact_size": sizes}
+        for fmt in ("joblib", "bundle"):
+            results[fmt] = run_workers(model_dir, fmt, args.workers)
+
+    print(f"Artifacts on disk: joblib {sizes['joblib_mb']} MB, bundle {sizes['bundle_mb']} MB")
+    print(f"{'format':<8} {'ready s':>9} {'load s':>9} {'1st pred ms':>12} {'RSS MB':>8} {'PSS MB':>8} {'private MB':>11}")
+    for fmt in ("joblib", "bundle"):
+        r = results[fmt]
+        print(f"{fmt:<8} {r['ready_s']:>9} {r['load_s']:>9} {r['first_predict_ms']:>12} "
+              f"{r['rss_mb']!s:>8} {r['pss_mb']!s:>8} {r['private_mb']!s:>11}")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print("Results written to", args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Multi-core scaling of the pre-fork server: throughput and latency per worker count.
+
+For each worker count the launcher (backend/serve.py) is started on a free local port,
+with a throw-away database. Near-duplicate reuse and the prediction cache are off by
+default, so every request runs the models. Client processes then send requests over
+HTTP at a fixed number of connections per worker for a fixed time. The
+report gives throughput, p50/p95/p99 latency, the speedup over one worker and the
+scaling efficiency (speedup / workers).
+
+The clients run on the same machine and take CPU from the server. Keep the largest
+worker count at or below the CPUs minus --clients (the default list does); beyond
+that, flat throughput shows the machine is full, not a limit of the server.
+
+Usage (from the project root, after `cd backend && python train.py`):
+    python -m benchmarks.scaling [--workers 1,2,4] [--duration 10] [--clients 2]
+        [--endpoint analyze] [--with-caches] [--json scaling.json]
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.common import ROOT, environment, latency_summary, write_results
+from benchmarks.load_test import ENDPOINTS, make_payloads
+
+
+def _cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _default_workers(clients: int) -> List[int]:
+    top = max(1, _cpus() - clients)
+    counts = [n for n in (2 ** i for i in range(8)) if n < top]
+    return counts + [top]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(workers: int, port: int, tmp: Path, with_caches: bool) -> subprocess.Popen:
+    env = dict(os.environ)
+    env["RAIL_SAARTHI_DB"] = str(tmp / f"scaling_{workers}.db")
+    env["RAIL_SAARTHI_RESULT_CACHE_DB"] = str(tmp / f"result_cache_{workers}.db")
+    if not with_caches:
+        env["RAIL_SAARTHI_DEDUP"] = "0"
+        env["RAIL_SAARTHI_RESULT_CACHE"] = "0"
+    return subprocess.Popen(
+        [sys.executable, "-m", "backend.serve", "--workers", str(workers), "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT, env=env,
+    )
+
+
+def _wait_ready(url: str, proc: subprocess.Popen, timeout: float = 60.0) -> Dict[str, Any]:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"Server exited with code {proc.returncode}")
+        try:
+            active = httpx.get(f"{url}/api/models", timeout=2).json().get("active")
+            if active:
+                return active
+            raise SystemExit("No trained models. Run: cd backend && python train.py")
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise SystemExit(f"Server not ready after {timeout:.0f}s")
+
+
+def _stop_server(proc: subprocess.Popen) -> None:
+    proc.send_signal(signal.SIGTERM)
+    try:
+        proc.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def _client(url: str, endpoint: str, payloads: List[Dict[str, Any]], connections: int, duration: float) -> Dict[str, Any]:
+    """One load-generating process: `connections` concurrent requests until `duration` has passed."""
+    import httpx
+
+    async def run():
+        latencies: List[float] = []
+        errors: Dict[str, int] = {}
+        bodies = itertools.cycle(payloads)
+        deadline = time.perf_counter() + duration
+        limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+            async def worker():
+                while time.perf_counter() < deadline:
+                    t0 = time.perf_counter()
+                    try:
+                        status = (await client.post(f"/api/{endpoint}", json=next(bodies))).status_code
+                    except Exception as e:  # noqa: BLE001 - a benchmark records failures instead of stopping
+                        status = type(e).__name__
+                    latencies.append(time.perf_counter() - t0)
+                    if status != 200:
+                        errors[str(status)] = errors.get(str(status), 0) + 1
+
+            t0 = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(connections)))
+            return {"latencies": latencies, "errors": errors, "wall_s": time.perf_counter() - t0}
+
+    return asyncio.run(run())
+
+
+def _run_level(pool, url: str, args, payloads: List[Dict[str, Any]], workers: int, duration: float) -> Dict[str, Any]:
+    connections = max(1, args.connections_per_worker * workers // args.clients)
+    futures = [
+        pool.submit(_client, url, args.endpoint, payloads[i::args.clients], connections, duration)
+        for i in range(args.clients)
+    ]
+    parts = [f.result() for f in futures]
+    latencies = [x for p in parts for x in p["latencies"]]
+    errors: Dict[str, int] = {}
+    for p in parts:
+        for k, v in p["errors"].items():
+            errors[k] = errors.get(k, 0) + v
+    wall = max(p["wall_s"] for p in parts)
+    return {
+        "workers": workers,
+        "connections": connections * args.clients,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 1),
+        "wall_s": round(wall, 3),
+        **latency_summary(latencies),
+    }
+
+
+def run(args, tmp: Path) -> Dict[str, Any]:
+    payloads = make_payloads(args.endpoint, 5000 // (args.batch_size if args.endpoint == "analyze-batch" else 1),
+                         args.batch_size, seed=7)
+    levels = []
+    models: Dict[str, Any] = {}
+    with ProcessPoolExecutor(max_workers=args.clients) as pool:
+        for n in args.workers:
+            port = _free_port()
+            url = f"http://127.0.0.1:{port}"
+            proc = _start_server(n, port, tmp, args.with_caches)
+            try:
+                models = _wait_ready(url, proc)
+                _run_level(pool, url, args, payloads, n, args.warmup)
+                level = _run_level(pool, url, args, payloads, n, args.duration)
+            finally:
+                _stop_server(proc)
+            base = levels[0]["throughput_rps"] / levels[0]["workers"] if levels else level["throughput_rps"] / n
+            level["speedup"] = round(level["throughput_rps"] / base, 2) if base else None
+            level["efficiency"] = round(level["speedup"] / n, 2) if level["speedup"] is not None else None
+            levels.append(level)
+            print(f"workers={n:<3} {level['throughput_rps']:>8} req/s  x{level['speedup']} "
+                  f"(efficiency {level['efficiency']})  p50 {level.get('p50_ms')} ms  "
+                  f"p99 {level.get('p99_ms')} ms  errors {level['errors'] or 0}")
+    return {
+        "endpoint": args.endpoint,
+        "batch_size": args.batch_size if args.endpoint == "analyze-batch" else 1,
+        "caches": args.with_caches,
+        "clients": args.clients,
+        "model_version": models.get("version"),
+        "artifact_format": models.get("artifact_format"),
+        "levels": levels,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=lambda s: [int(x) for x in s.split(",")], default=None,
+                        help="Comma-separated worker counts (default: powers of two up to CPUs - clients)")
+    parser.add_argument("--endpoint", choices=ENDPOINTS, default="analyze")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per worker count")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Untimed seconds before each measurement")
+    parser.add_argument("--clients", type=int, default=2, help="Load-generating processes")
+    parser.add_argument("--connections-per-worker", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=16, help="Texts per request for analyze-batch")
+    parser.add_argument("--with-caches", action="store_true",
+                        help="Keep near-duplicate reuse and the prediction cache on")
+    parser.add_argument("--json", type=Path, default=None, help="Also write results to this file")
+    args = parser.parse_args()
+    args.workers = args.workers or _default_workers(args.clients)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {"benchmark": "scaling", "environment": environment(), **run(args, Path(tmp))}
+    if args.json:
+        write_results(args.json, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Startup cost of the API: import time, model load (lifespan) and first-request latency,
+measured in fresh interpreters for the slim bundle path and the joblib path.
+
+Also records which heavy libraries each path loaded. With --check the script exits
+non-zero when the slim path imports any of them or exceeds the time budgets, so it
+can run as a regression gate (e.g. in CI after training).
+
+Usage (from the project root, after `cd backend && python train.py`):
+    python -m benchmarks.startup [--runs 5] [--check] [--json results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("sklearn", "nltk", "joblib", "pandas", "matplotlib", "scipy.stats")
+IMPORT_BUDGET_S = 2.0  # --check budget for importing backend.main
+FIRST_REQUEST_BUDGET_MS = 250.0  # --check budget for the first /api/analyze
+PROBE = {"text": "Train 12301 delayed by 5 hours at Howrah, no announcement made"}
+
+
+def child() -> None:
+    """One cold start: import the app, run its lifespan, send the first request."""
+    import time
+    t0 = time.perf_counter()
+    from backend.main import app
+    t1 = time.perf_counter()
+    imported = [m for m in HEAVY_MODULES if m in sys.modules]
+    from fastapi.testclient import TestClient
+    with TestClient(app) as client:  # runs the lifespan: eager model load
+        t2 = time.perf_counter()
+        resp = client.post("/api/analyze", json=PROBE)
+        t3 = time.perf_counter()
+        client.post("/api/analyze", json=dict(PROBE, text=PROBE["text"] + " again"))
+        t4 = time.perf_counter()
+        fmt = client.get("/api/models").json()["active"]
+    print(json.dumps({
+        "import_s": round(t1 - t0, 4),
+        "startup_s": round(t2 - t1, 4),
+        "first_request_ms": round((t3 - t2) * 1000, 3),
+        "second_request_ms": round((t4 - t3) * 1000, 3),
+        "status": resp.status_code,
+        "artifact_format": fmt["artifact_format"] if fmt else None,
+        "heavy_after_import": imported,
+        "heavy_after_request": [m for m in HEAVY_MODULES if m in sys.modules],
+    }))
+
+
+def cold_start(model_format: str, db_path: Path) -> dict:
+    """child() in a fresh interpreter; returns its measurements."""
+    env = dict(os.environ, RAIL_SAARTHI_MODEL_FORMAT=model_format, RAIL_SAARTHI_DB=str(db_path))
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def measure(model_format: str, runs: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        samples = [cold_start(model_format, Path(tmp) / "bench.db") for _ in range(runs)]
+    summary = {
+        k: round(statistics.median(s[k] for s in samples), 4)
+        for k in ("import_s", "startup_s", "first_request_ms", "second_request_ms")
+    }
+    summary["status"] = sorted({s["status"] for s in samples})
+    summary["artifact_format"] = samples[-1]["artifact_format"]
+    summary["heavy_after_import"] = sorted({m for s in samples for m in s["heavy_after_import"]})
+    summary["heavy_after_request"] = sorted({m for s in samples for m in s["heavy_after_request"]})
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per path (medians are reported)")
+    parser.add_argument("--check", action="store_true", help="Fail if the slim path regresses")
+    parser.add_argument("--max-import-s", type=float, default=IMPORT_BUDGET_S, help="--check budget for importing backend.main")
+    parser.add_argument("--max-first-request-ms", type=float, default=FIRST_REQUEST_BUDGET_MS,
+                        help="--check budget for the first request")
+    parser.add_argument("--json", type=Path, default=None, help="Also write results to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    results = {"slim (bundle)": measure("bundle", args.runs), "joblib": measure("joblib", args.runs)}
+    print(f"{'path':<14} {'import s':>9} {'startup s':>10} {'1st req ms':>11} {'2nd req ms':>11}  heavy modules loaded")
+    for name, r in results.items():
+        print(f"{name:<14} {r['import_s']:>9} {r['startup_s']:>10} {r['first_request_ms']:>11} "
+              f"{r['second_request_ms']:>11}  {', '.join(r['heavy_after_request']) or '-'}")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    if args.check:
+        slim = results["slim (bundle)"]
+        problems = []
+        if slim["status"] != [200]:
+            problems.append(f"first request returned {slim['status']} (is there a trained version with a bundle?)")
+        if slim["heavy_after_request"]:
+            problems.append(f"slim path imported {slim['heavy_after_request']}")
+        if slim["import_s"] > args.max_import_s:
+            problems.append(f"import took {slim['import_s']}s (budget {args.max_import_s}s)")
+        if slim["first_request_ms"] > args.max_first_request_ms:
+            problems.append(f"first request took {slim['first_request_ms']}ms (budget {args.max_first_request_ms}ms)")
+        if problems:
+            raise SystemExit("Startup regression: " + "; ".join(problems))
+        print("Startup check passed.")
+
+
+if __name__ == "__main__":
+    main()
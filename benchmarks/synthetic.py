@@ -0,0 +1,97 @@
+"""
+Synthetic complaint corpus of any size, generated from the SAMPLE_COMPLAINTS templates.
+
+Each complaint starts from a template of the chosen category and mixes in a second
+sentence (often from another template of the same category), a train number and
+station, numbers, casing and punctuation noise, and occasionally a transliterated
+Hindi phrase or a URL, so texts are varied enough to exercise the preprocessing cache,
+the vocabulary lookup and near-duplicate detection realistically. Labels come from
+the templates. Deterministic for a given seed.
+
+Usage (from the project root):
+    python -m benchmarks.synthetic -n 100000 -o corpus.jsonl [--seed 0]
+"""
+import argparse
+import json
+import random
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from backend.data.sample_complaints import SAMPLE_COMPLAINTS
+
+STATIONS = ["NDLS", "HWH", "CSMT", "MAS", "SBC", "PUNE", "LKO", "PNBE", "BBS", "ADI", "JP", "GHY"]
+PREFIXES = ["", "", "", "Sir, ", "Respected sir, ", "Please help. ", "URGENT: ", "Complaint: "]
+SUFFIXES = ["", "", "", " Please take action.", " Very disappointed.", " Kindly look into this!!", " pls check"]
+HINDI = ["bahut bura anubhav", "paani nahi tha", "khana nahi mila", "der se aayi", "koi sunvai nahi"]
+
+
+def _split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()]
+
+
+def _noise(text: str, rng: random.Random) -> str:
+    r = rng.random()
+    if r < 0.1:
+        return text.upper()
+    if r < 0.3:
+        return text.lower()
+    if r < 0.4:
+        return text.replace(".", "...")
+    return text
+
+
+def iter_corpus(n: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yield n complaint dicts: text, category, severity, station, train_number."""
+    rng = random.Random(seed)
+    by_category: Dict[str, List[Dict[str, Any]]] = {}
+    for sample in SAMPLE_COMPLAINTS:
+        by_category.setdefault(sample["category"], []).append(sample)
+    categories = sorted(by_category)
+    for _ in range(n):
+        category = rng.choice(categories)
+        base = rng.choice(by_category[category])
+        sentences = _split_sentences(base["text"])
+        if rng.random() < 0.6:
+            other = rng.choice(by_category[category] if rng.random() < 0.8 else SAMPLE_COMPLAINTS)
+            sentences.append(rng.choice(_split_sentences(other["text"])))
+        rng.shuffle(sentences)
+        train = str(rng.randint(12001, 22999))
+        station = rng.choice(STATIONS)
+        text = " ".join(sentences)
+        if rng.random() < 0.5:
+            text = f"Train {train}: {text}"
+        if rng.random() < 0.3:
+            text += f" Coach {rng.choice('ABS')}{rng.randint(1, 12)}, seat {rng.randint(1, 72)}."
+        if rng.random() < 0.1:
+            text += " " + rng.choice(HINDI)
+        if rng.random() < 0.03:
+            text += " see https://example.com/pnr/" + str(rng.randint(10**9, 10**10 - 1))
+        text = rng.choice(PREFIXES) + _noise(text, rng) + rng.choice(SUFFIXES)
+        yield {
+            "text": text,
+            "category": category,
+            "severity": base["severity"],
+            "station": station,
+            "train_number": train,
+        }
+
+
+def generate(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    return list(iter_corpus(n, seed))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", type=int, default=10000, help="Number of complaints")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="Output .jsonl file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    with open(args.output, "w", encoding="utf-8") as f:
+        for record in iter_corpus(args.n, args.seed):
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    print(f"Wrote {args.n:,} complaints to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
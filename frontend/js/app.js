@@ -9,6 +9,23 @@ const API_BASE = (() => {
 
 const $ = (id) => document.getElementById(id);
 
+const CHART_COLORS = [
+  '#1e3a5f', '#d4a853', '#0f172a', '#64748b', '#16a34a', '#b91c1c',
+  '#7c3aed', '#0891b2', '#ea580c', '#db2777', '#65a30d', '#92400e',
+];
+const SEVERITY_COLORS = { low: '#16a34a', medium: '#d97706', high: '#ea580c', critical: '#b91c1c' };
+const LIVE_POINTS_MAX = 1000; // live points kept on the cluster plot (oldest dropped first)
+
+// Dashboard state kept in sync by the /api/live event stream
+const live = { seq: 0, counts: null, source: null, modelVersion: null, points: [], alerts: new Map() };
+// Top terms of each cluster of the served model (from /api/clustering-viz)
+let clusterTerms = [];
+
+function clusterLabel(c) {
+  const terms = clusterTerms[c] || [];
+  return terms.length ? `Cluster ${c + 1}: ${terms.slice(0, 3).join(', ')}` : `Cluster ${c + 1}`;
+}
+
 async function checkApi() {
   const dot = $('api-status-dot');
   const status = $('api-status');
@@ -23,16 +40,19 @@ async function checkApi() {
   }
 }
 
+function renderMetrics(data) {
+  const cat = data.category || {};
+  const sev = data.severity || {};
+  $('metric-cat-acc').textContent = cat.accuracy != null ? (cat.accuracy * 100).toFixed(1) + '%' : '—';
+  $('metric-cat-f1').textContent = cat.f1_weighted != null ? (cat.f1_weighted * 100).toFixed(1) + '%' : '—';
+  $('metric-sev-acc').textContent = sev.accuracy != null ? (sev.accuracy * 100).toFixed(1) + '%' : '—';
+  $('metric-sev-f1').textContent = sev.f1_weighted != null ? (sev.f1_weighted * 100).toFixed(1) + '%' : '—';
+}
+
 async function loadMetrics() {
   try {
     const r = await fetch(`${API_BASE}/api/metrics`);
-    const data = await r.json();
-    const cat = data.category || {};
-    const sev = data.severity || {};
-    $('metric-cat-acc').textContent = cat.accuracy != null ? (cat.accuracy * 100).toFixed(1) + '%' : '—';
-    $('metric-cat-f1').textContent = cat.f1_weighted != null ? (cat.f1_weighted * 100).toFixed(1) + '%' : '—';
-    $('metric-sev-acc').textContent = sev.accuracy != null ? (sev.accuracy * 100).toFixed(1) + '%' : '—';
-    $('metric-sev-f1').textContent = sev.f1_weighted != null ? (sev.f1_weighted * 100).toFixed(1) + '%' : '—';
+    renderMetrics(await r.json());
   } catch (e) {
     $('metric-cat-acc').textContent = '—';
     $('metric-cat-f1').textContent = '—';
@@ -41,25 +61,26 @@ async function loadMetrics() {
   }
 }
 
-async function loadTrends() {
-  try {
-    const r = await fetch(`${API_BASE}/api/trends`);
-    const data = await r.json();
-    const byCat = data.by_category || [];
-    const bySev = data.by_severity || [];
-    const labelsCat = byCat.map((x) => x.category.replace(/_/g, ' '));
-    const valuesCat = byCat.map((x) => x.count);
-    const labelsSev = bySev.map((x) => x.severity);
-    const valuesSev = bySev.map((x) => x.count);
-    const colors = ['#1e3a5f', '#d4a853', '#0f172a', '#64748b', '#16a34a', '#b91c1c'];
-    const sevColors = { low: '#16a34a', medium: '#d97706', high: '#ea580c', critical: '#b91c1c' };
-
-    if (window.chartCategory) window.chartCategory.destroy();
+function renderTrends(data) {
+  const byCat = data.by_category || [];
+  const bySev = data.by_severity || [];
+  const labelsCat = byCat.map((x) => x.category.replace(/_/g, ' '));
+  const valuesCat = byCat.map((x) => x.count);
+  const labelsSev = bySev.map((x) => x.severity);
+  const valuesSev = bySev.map((x) => x.count);
+
+  // update in place once the charts exist (no re-creation on every change)
+  if (window.chartCategory) {
+    window.chartCategory.data.labels = labelsCat;
+    window.chartCategory.data.datasets[0].data = valuesCat;
+    window.chartCategory.data.datasets[0].backgroundColor = CHART_COLORS.slice(0, labelsCat.length);
+    window.chartCategory.update('none');
+  } else {
     window.chartCategory = new Chart($('chart-category'), {
       type: 'bar',
       data: {
         labels: labelsCat,
-        datasets: [{ label: 'Count', data: valuesCat, backgroundColor: colors.slice(0, labelsCat.length) }],
+        datasets: [{ label: 'Count', data: valuesCat, backgroundColor: CHART_COLORS.slice(0, labelsCat.length) }],
       },
       options: {
         responsive: true,
@@ -70,13 +91,19 @@ async function loadTrends() {
         },
       },
     });
+  }
 
-    if (window.chartSeverity) window.chartSeverity.destroy();
+  if (window.chartSeverity) {
+    window.chartSeverity.data.labels = labelsSev;
+    window.chartSeverity.data.datasets[0].data = valuesSev;
+    window.chartSeverity.data.datasets[0].backgroundColor = labelsSev.map((s) => SEVERITY_COLORS[s] || '#64748b');
+    window.chartSeverity.update('none');
+  } else {
     window.chartSeverity = new Chart($('chart-severity'), {
       type: 'doughnut',
       data: {
         labels: labelsSev,
-        datasets: [{ data: valuesSev, backgroundColor: labelsSev.map((s) => sevColors[s] || '#64748b') }],
+        datasets: [{ data: valuesSev, backgroundColor: labelsSev.map((s) => SEVERITY_COLORS[s] || '#64748b') }],
       },
       options: {
         responsive: true,
@@ -84,6 +111,13 @@ async function loadTrends() {
         plugins: { legend: { position: 'bottom' } },
       },
     });
+  }
+}
+
+async function loadTrends() {
+  try {
+    const r = await fetch(`${API_BASE}/api/trends`);
+    renderTrends(await r.json());
   } catch (e) {
     console.warn('Trends load failed', e);
   }
@@ -104,13 +138,14 @@ async function loadClusteringViz() {
       return;
     }
     const nClusters = data.n_clusters || 3;
-    const colors = ['#1e3a5f', '#d4a853', '#0f172a', '#64748b', '#16a34a', '#b91c1c'];
+    clusterTerms = data.cluster_terms || [];
+    const colors = CHART_COLORS;
     const datasets = [];
     for (let c = 0; c < nClusters; c++) {
       const clusterPoints = points.filter((p) => p.cluster === c);
       datasets.push({
-        label: `Cluster ${c + 1}`,
-        data: clusterPoints.map((p) => ({ x: p.x, y: p.y })),
+        label: clusterLabel(c),
+        data: clusterPoints.map((p) => ({ x: p.x, y: p.y, text: p.text })),
         backgroundColor: colors[c % colors.length] + '99',
         borderColor: colors[c % colors.length],
         borderWidth: 1,
@@ -129,22 +164,17 @@ async function loadClusteringViz() {
           legend: { position: 'bottom' },
           tooltip: {
             callbacks: {
-              label: (ctx) => {
-                const p = points.find((p, i) => {
-                  const d = ctx.raw;
-                  return Math.abs(p.x - d.x) < 1e-5 && Math.abs(p.y - d.y) < 1e-5;
-                });
-                return p ? p.text + '…' : '';
-              },
+              label: (ctx) => (ctx.raw.text ? ctx.raw.text + '…' : ''),
             },
           },
         },
         scales: {
-          x: { title: { display: true, text: 'PC1' } },
-          y: { title: { display: true, text: 'PC2' } },
+          x: { title: { display: true, text: 'Component 1' } },
+          y: { title: { display: true, text: 'Component 2' } },
         },
       },
     });
+    live.points = [];
   } catch (e) {
     placeholder.classList.remove('hidden');
     placeholder.textContent = 'Clustering viz failed. Is the API running?';
@@ -176,7 +206,7 @@ async function analyzeComplaint() {
     const sevEl = $('result-severity');
     sevEl.textContent = data.severity || '—';
     sevEl.className = 'inline-block px-2 py-0.5 rounded-full text-sm font-medium severity-' + (data.severity || 'low');
-    $('result-cluster').textContent = 'Cluster #' + (data.cluster_id + 1);
+    $('result-cluster').textContent = clusterLabel(data.cluster_id);
     resultEl.classList.remove('hidden');
   } catch (e) {
     errEl.textContent = e.message || 'Request failed.';
@@ -196,12 +226,116 @@ async function loadCategories() {
   }
 }
 
+// ---- live updates (server-sent events) ----
+
+function countsToTrends(counts) {
+  const entries = (dim) => Object.entries(counts[dim] || {}).sort(([a], [b]) => (a < b ? -1 : a > b ? 1 : 0));
+  return {
+    by_category: entries('category').map(([category, count]) => ({ category, count })),
+    by_severity: entries('severity').map(([severity, count]) => ({ severity, count })),
+  };
+}
+
+function trendsToCounts(trends) {
+  const counts = { category: {}, severity: {}, cluster: {}, duplicates: {} };
+  (trends.by_category || []).forEach((x) => { counts.category[x.category] = x.count; });
+  (trends.by_severity || []).forEach((x) => { counts.severity[x.severity] = x.count; });
+  (trends.by_cluster || []).forEach((x) => { counts.cluster[String(x.cluster)] = x.count; });
+  counts.duplicates.all = trends.duplicates || 0;
+  return counts;
+}
+
+function addLivePoints(points) {
+  const chart = window.chartCluster;
+  if (!chart || !points.length) return;
+  points.forEach(([x, y, cluster, text]) => {
+    const dataset = chart.data.datasets[cluster];
+    if (!dataset) return;
+    const point = { x, y, text };
+    dataset.data.push(point);
+    live.points.push([dataset, point]);
+  });
+  while (live.points.length > LIVE_POINTS_MAX) {
+    const [dataset, point] = live.points.shift();
+    const i = dataset.data.indexOf(point);
+    if (i >= 0) dataset.data.splice(i, 1);
+  }
+  chart.update('none');
+}
+
+function applyDelta(delta) {
+  if (delta.seq <= live.seq || !live.counts) return; // already included in the snapshot
+  live.seq = delta.seq;
+  if (live.source === 'sample') {
+    // first analyzed complaint: the sample data gives way to real counts
+    live.counts = { category: {}, severity: {}, cluster: {}, duplicates: {} };
+    live.source = 'store';
+  }
+  Object.entries(delta.counts || {}).forEach(([dim, changes]) => {
+    const target = live.counts[dim] || (live.counts[dim] = {});
+    Object.entries(changes).forEach(([key, n]) => { target[key] = (target[key] || 0) + n; });
+  });
+  renderTrends(countsToTrends(live.counts));
+  addLivePoints(delta.points || []);
+}
+
+function renderAlerts() {
+  const list = $('alerts-list');
+  const active = [...live.alerts.values()].filter((a) => a.status === 'active').sort((a, b) => b.id - a.id);
+  if (!active.length) {
+    list.innerHTML = '<li class="text-slate-500">No active alerts.</li>';
+    return;
+  }
+  list.innerHTML = active.map((a) => `
+    <li class="flex flex-wrap items-center gap-2 rounded-lg border px-3 py-2 severity-high">
+      <span class="font-medium">${escapeHtml(a.dimension)}: ${escapeHtml(String(a.key).replace(/_/g, ' '))}</span>
+      <span class="text-xs font-mono">${a.observed} in window vs ${a.expected} expected (z ${a.z})</span>
+    </li>`).join('');
+}
+
+function connectLive() {
+  if (!window.EventSource) return false;
+  const source = new EventSource(`${API_BASE}/api/live`);
+  source.addEventListener('snapshot', (e) => {
+    const snap = JSON.parse(e.data);
+    live.seq = snap.seq;
+    live.source = snap.trends.source;
+    live.counts = trendsToCounts(snap.trends);
+    renderTrends(snap.trends);
+    renderMetrics(snap.metrics || {});
+    if (live.modelVersion && snap.model_version !== live.modelVersion) loadClusteringViz();
+    live.modelVersion = snap.model_version;
+    live.alerts = new Map((snap.alerts || []).map((a) => [a.id, a]));
+    renderAlerts();
+  });
+  source.addEventListener('delta', (e) => applyDelta(JSON.parse(e.data)));
+  source.addEventListener('alert', (e) => {
+    const alert = JSON.parse(e.data);
+    live.alerts.set(alert.id, alert);
+    renderAlerts();
+  });
+  source.addEventListener('model', (e) => {
+    const m = JSON.parse(e.data);
+    renderMetrics(m.metrics || {});
+    if (m.model_version !== live.modelVersion) {
+      live.modelVersion = m.model_version;
+      loadClusteringViz();
+    }
+  });
+  source.onopen = () => { $('live-status').textContent = 'Live'; };
+  source.onerror = () => { $('live-status').textContent = 'Reconnecting…'; };
+  return true;
+}
+
 function init() {
   checkApi();
-  loadMetrics();
-  loadTrends();
   loadClusteringViz();
   loadCategories();
+  if (!connectLive()) {
+    // no EventSource: load once, as before
+    loadMetrics();
+    loadTrends();
+  }
   $('btn-analyze').addEventListener('click', analyzeComplaint);
   $('btn-clear').addEventListener('click', () => {
     $('complaint-input').value = '';
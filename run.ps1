@@ -1,10 +1,21 @@
 # Rail Saarthi - Start server (run after: pip install -r requirements.txt, then cd backend; python train.py)
+# Serves with one worker process per CPU (backend/serve.py); -Workers N to change, -Dev for a single auto-reloading process.
+param(
+    [int]$Workers = 0,
+    [switch]$Dev
+)
 Set-Location $PSScriptRoot
-if (-not (Test-Path "backend\models\category_classifier.joblib")) {
+if (-not ((Test-Path "backend\models\CURRENT") -or (Test-Path "backend\models\category_classifier.joblib"))) {
     Write-Host "Models not found. Training first..." -ForegroundColor Yellow
     Set-Location backend
     python train.py
     Set-Location ..
 }
 Write-Host "Starting Rail Saarthi at http://localhost:8000" -ForegroundColor Green
-uvicorn backend.main:app --reload --host 0.0.0.0 --port 8000
+if ($Dev) {
+    uvicorn backend.main:app --reload --host 0.0.0.0 --port 8000
+} elseif ($Workers -gt 0) {
+    python -m backend.serve --host 0.0.0.0 --port 8000 --workers $Workers
+} else {
+    python -m backend.serve --host 0.0.0.0 --port 8000
+}
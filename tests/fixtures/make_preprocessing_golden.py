@@ -0,0 +1,143 @@
+"""
+Regenerate preprocessing_golden.json from the pre-optimization preprocessing module.
+
+The module is read from git (backend/preprocessing.py at --rev, default: the root
+commit) and run as it was: NLTK word_tokenize and NLTK's English stopwords. Its
+clean_text, tokenize (with and without stopword removal) and preprocess_for_model
+outputs for a fixed corpus are written next to this script. tests/test_preprocessing.py
+checks the current module against them.
+
+Needs NLTK with its "stopwords" and "punkt" data. On a machine without them (offline),
+pass --stand-in-data: a temporary nltk_data is built from the English stopword list as
+published with NLTK 3.8 and an untrained punkt model. clean_text leaves no sentence
+punctuation, so sentence splitting never changes the tokens.
+
+Usage (from the project root):
+    python tests/fixtures/make_preprocessing_golden.py [--rev <commit>] [--stand-in-data]
+"""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+OUT = Path(__file__).resolve().parent / "preprocessing_golden.json"
+
+# corpora/stopwords/english of the NLTK data package (as shipped with NLTK 3.8)
+NLTK_ENGLISH_STOPWORDS = """
+i me my myself we our ours ourselves you you're you've you'll you'd your yours yourself
+yourselves he him his himself she she's her hers herself it it's its itself they them
+their theirs themselves what which who whom this that that'll these those am is are was
+were be been being have has had having do does did doing a an the and but if or because
+as until while of at by for with about against between into through during before after
+above below to from up down in out on off over under again further then once here there
+when where why how all any both each few more most other some such no nor not only own
+same so than too very s t can will just don don't should should've now d ll m o re ve y
+ain aren aren't couldn couldn't didn didn't doesn doesn't hadn hadn't hasn hasn't haven
+haven't isn isn't ma mightn mightn't mustn mustn't needn needn't shan shan't shouldn
+shouldn't wasn wasn't weren weren't won won't wouldn wouldn't
+""".split()
+
+# contractions, stopwords, URLs, e-mails, numbers, casing, whitespace, non-ASCII text
+EDGE_CASES = [
+    "",
+    "   ",
+    "!!! ??? ...",
+    "I cannot believe the train is late again",
+    "CANNOT board, can not board, cannotcannot",
+    "We are gonna miss the connecting train, gotta wait 5 hours",
+    "wanna go home. wanna",
+    "gimme my refund and lemme talk to the TTE",
+    "gonna_go wanna_eat cannot_",
+    "I don't know why it's so dirty; they've not cleaned it & won't reply",
+    "I'm stuck at the station, shouldn't they announce? You'll see, we'd complain",
+    "The coach's toilet at 5 o'clock, y'all",
+    "a b c x ok no ma ain mightn needn shan",
+    "See https://irctc.co.in/pnr?id=123 or www.indianrail.gov.in for status",
+    "Mail me at passenger.name@example.com about PNR 4567890123",
+    "Train 12301 at 5pm, coach B4 seat 32; refund Rs.500",
+    "PNR4567890 ABC123def 2nd AC",
+    "Tabs\tand\nnewlines\r\nand   spaces",
+    "Khana nahi mila, paani nahi hai, train der se aayi",
+    "paani_nahi khana_nahi",
+    "ट्रेन बहुत लेट है और शौचालय गंदा है",
+    "Café served naïve food; crème brûlée was cold",
+    "“Smart quotes” and ‘single’ quotes – dashes — ellipsis…",
+    "Staff was RUDE!!! Very very rude... NOT acceptable",
+    "AC not working in 3A, fan not working, light not working",
+    "Harassment by staff; no water, no food; stranded for hours",
+]
+
+
+def _baseline_module(rev: str) -> types.ModuleType:
+    source = subprocess.run(
+        ["git", "show", f"{rev}:backend/preprocessing.py"], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    module = types.ModuleType("baseline_preprocessing")
+    exec(compile(source, f"{rev}:backend/preprocessing.py", "exec"), module.__dict__)
+    if not module._HAS_NLTK:
+        raise SystemExit("NLTK is not importable; the baseline would use its fallback tokenizer")
+    return module
+
+
+def _stand_in_nltk_data(root: Path) -> None:
+    from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+    stopwords = root / "corpora" / "stopwords"
+    stopwords.mkdir(parents=True)
+    (stopwords / "english").write_text("\n".join(NLTK_ENGLISH_STOPWORDS) + "\n", encoding="utf-8")
+    for punkt in (root / "tokenizers" / "punkt", root / "tokenizers" / "punkt" / "PY3"):
+        punkt.mkdir(parents=True)
+        with open(punkt / "english.pickle", "wb") as f:
+            pickle.dump(PunktSentenceTokenizer(), f)
+
+
+def _corpus():
+    sys.path.insert(0, str(ROOT))
+    from backend.data.sample_complaints import get_training_data
+
+    return [d["text"] for d in get_training_data()] + EDGE_CASES
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rev", default=None, help="Commit holding the reference implementation (default: root commit)")
+    parser.add_argument("--stand-in-data", action="store_true", help="Build a temporary nltk_data (offline machines)")
+    args = parser.parse_args()
+    rev = args.rev or subprocess.run(
+        ["git", "rev-list", "--max-parents=0", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout.split()[0]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.stand_in_data:
+            _stand_in_nltk_data(Path(tmp))
+            os.environ["NLTK_DATA"] = tmp
+            import nltk
+
+            nltk.data.path.insert(0, tmp)
+        baseline = _baseline_module(rev)
+        cases = [
+            {
+                "text": text,
+                "clean": baseline.clean_text(text),
+                "tokens": baseline.tokenize(text),
+                "tokens_with_stopwords": baseline.tokenize(text, remove_stopwords=False),
+                "model_input": baseline.preprocess_for_model(text),
+            }
+            for text in _corpus()
+        ]
+    OUT.write_text(
+        json.dumps({"reference": f"backend/preprocessing.py at {rev[:7]}", "cases": cases}, ensure_ascii=False, indent=1)
+        + "\n",
+        encoding="utf-8",
+    )
+    print(f"{len(cases)} cases written to {OUT}")
+
+
+if __name__ == "__main__":
+    main()
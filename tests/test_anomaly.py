@@ -0,0 +1,180 @@
+"""
+SpikeDetector on explicit timestamps: complaints carry their own time and tick() takes
+`now`, so the ring of buckets, the warm-up and the z-score gates are deterministic.
+"""
+import numpy as np
+import pytest
+
+from backend import anomaly
+from backend.anomaly import SpikeDetector
+
+BUCKET = 60.0
+T0 = 100_000 * BUCKET  # start of a bucket
+
+
+def _row(ts, category="food"):
+    # ROW_FIELDS: ts, text, category, severity, cluster_id, station, train_number,
+    # model_version, incident_id, is_duplicate
+    return (ts, "complaint", category, "low", 0, "", "", "v1", None, 0)
+
+
+def _at(bucket, offset=30.0):
+    return T0 + bucket * BUCKET + offset
+
+
+def _detector(events=None, **kwargs):
+    params = dict(
+        bucket_seconds=BUCKET, n_buckets=10, recent_buckets=2, z_threshold=4.0,
+        min_count=5, min_baseline_seconds=300.0, sketch_width=64, sketch_depth=2,
+    )
+    params.update(kwargs)
+    on_alert = (lambda kind, alert: events.append((kind, alert))) if events is not None else None
+    return SpikeDetector(on_alert=on_alert, **params)
+
+
+def _windows(det, dim="category", key="food"):
+    """(recent, older) counts of one key."""
+    cells, _ = det._counts.cells([(dim, key)])
+    recent, older = det._counts.estimate(cells)
+    return int(recent[0]), int(older[0])
+
+
+def _baseline(det, buckets=range(6)):
+    """One "food" complaint per bucket."""
+    for b in buckets:
+        det.observe([_row(_at(b, 0.0))])
+
+
+def _food_alerts(det, **kwargs):
+    return [a for a in det.alerts(**kwargs) if (a["dimension"], a["key"]) == ("category", "food")]
+
+
+def test_ring_rollover():
+    det = _detector()
+    det.observe([_row(_at(0))] * 3)
+    assert _windows(det) == (3, 0)
+    det.tick(_at(1))
+    assert _windows(det) == (3, 0)  # the recent window is the last 2 buckets
+    det.tick(_at(2))
+    assert _windows(det) == (0, 3)
+    det.observe([_row(_at(2))])
+    det.tick(_at(9))
+    assert _windows(det) == (0, 4)  # buckets 0..9 still fit in the ring
+    det.tick(_at(10))
+    assert _windows(det) == (0, 1)  # bucket 0 expired, its slot reused by bucket 10
+    det.tick(_at(12))
+    assert _windows(det) == (0, 0)
+    counts = det._counts
+    assert not counts.ring.any() and not counts.recent.any() and not counts.older.any()
+
+
+def test_late_rows_count_in_current_bucket():
+    det = _detector()
+    det.observe([_row(_at(3))])
+    det.observe([_row(_at(0))])  # late: not placed in an expired/older bucket
+    assert _windows(det) == (2, 0)
+    det.tick(_at(4))
+    assert _windows(det) == (2, 0)
+
+
+def test_gap_longer_than_ring_restarts_warm_up():
+    det = _detector()
+    _baseline(det)
+    det.tick(_at(6))
+    assert not det.status()["warming_up"]
+    det.tick(_at(6 + 10))  # idle for the whole ring
+    assert _windows(det) == (0, 0)
+    assert det.status()["warming_up"]
+    det.observe([_row(_at(16))] * 20)
+    assert det.alerts() == []  # no baseline yet after the restart
+
+
+def test_spike_opens_alert_with_poisson_z():
+    det = _detector()
+    _baseline(det)
+    det.observe([_row(_at(8))] * 15)
+    (alert,) = _food_alerts(det)
+    # recent window: 1 full bucket + 30 s of the current one; baseline: the rest since T0
+    recent_span, baseline_span = 60.0 + 30.0, (8 * BUCKET + 30.0) - 90.0
+    expected = (6 + 0.5) * recent_span / baseline_span
+    assert alert["status"] == "active" and alert["observed"] == 15
+    assert alert["expected"] == pytest.approx(expected, abs=1e-3)
+    assert alert["z"] == pytest.approx(2 * (np.sqrt(15) - np.sqrt(expected)), abs=0.01)
+    # other categories are scored on their own baseline
+    det.observe([_row(_at(8), "security")])
+    assert all(a["key"] != "security" for a in det.alerts())
+
+
+def test_below_z_threshold_no_alert():
+    det = _detector()
+    _baseline(det)
+    det.observe([_row(_at(8))] * 9)  # z = 2 * (3 - 1.18) < 4
+    assert _food_alerts(det) == []
+    det.observe([_row(_at(8))] * 2)  # 11: z crosses 4
+    assert _food_alerts(det)[0]["observed"] == 11
+
+
+def test_min_count_gate():
+    det = _detector(min_count=15)
+    _baseline(det)
+    det.observe([_row(_at(8))] * 12)  # z > 4, but fewer than min_count complaints
+    assert _food_alerts(det) == []
+    det.observe([_row(_at(8))] * 3)
+    assert len(_food_alerts(det)) == 1
+
+
+def test_min_baseline_seconds_gate():
+    det = _detector(n_buckets=20, min_baseline_seconds=600.0)  # the baseline covers 420 s at bucket 8
+    _baseline(det)
+    det.observe([_row(_at(8))] * 20)
+    assert _food_alerts(det) == []
+    assert det.status()["warming_up"]
+    det.tick(_at(12))
+    assert not det.status()["warming_up"]  # 660 s of baseline by now
+    det.observe([_row(_at(12))] * 20)
+    assert len(_food_alerts(det)) == 1
+
+
+def test_alert_resolves_when_quiet(monkeypatch):
+    events = []
+    det = _detector(events)
+    _baseline(det)
+    det.observe([_row(_at(8))] * 15)
+    det.observe([_row(_at(8))] * 5)  # still active: updated, not reopened
+    opened = [a for k, a in events if k == "opened" and a["key"] == "food"]
+    assert len(opened) == 1
+
+    det.tick(_at(9))  # the spike bucket is still in the recent window
+    assert len(_food_alerts(det)) == 1
+
+    class _Clock:
+        @staticmethod
+        def time():
+            return _at(10)
+
+        perf_counter = staticmethod(anomaly.time.perf_counter)
+
+    monkeypatch.setattr(anomaly, "time", _Clock)
+    det.tick()  # without `now`: the wall clock
+    resolved = [a for k, a in events if k == "resolved" and a["key"] == "food"]
+    assert len(resolved) == 1 and resolved[0]["resolved_at"] == _at(10)
+    assert _food_alerts(det) == []
+    (alert,) = _food_alerts(det, include_resolved=True)
+    assert alert["status"] == "resolved" and alert["peak_z"] >= 4.0
+    assert det.stats["alerts_opened"] == det.stats["alerts_resolved"]
+
+
+def test_replay_places_rows_per_bucket_without_notifying():
+    rows = [_row(_at(b, 0.0)) for b in range(6)] + [_row(_at(8))] * 15
+    events = []
+    replayed = _detector(events)
+    assert replayed.replay([rows[:4], rows[4:]]) == len(rows)  # batches span several buckets
+    assert events == []
+    assert len(_food_alerts(replayed)) == 1  # state is rebuilt, alerts are only not announced
+
+    live = _detector()
+    for r in rows:
+        live.observe([r])
+    np.testing.assert_array_equal(replayed._counts.ring, live._counts.ring)
+    assert _windows(replayed) == _windows(live) == (15, 6)
+    assert replayed.stats["observed"] == len(rows)
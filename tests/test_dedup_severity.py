@@ -0,0 +1,63 @@
+"""
+Near-duplicates reuse the cached prediction of their incident, but severity keywords
+are matched on each complaint's own text: a keyword in the first complaint must not
+raise the severity of the duplicates that follow it.
+"""
+import importlib
+import os
+import sys
+
+import pytest
+
+FIRST = "urgent: coach S4 of train 12951 is very dirty, toilets not cleaned since morning and dustbins overflowing"
+REPEAT = "coach S4 of train 12951 is very dirty, toilets not cleaned since morning and dustbins overflowing"
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    from backend.registry import current_version
+
+    if current_version() is None:
+        pytest.skip("no trained models (cd backend && python train.py)")
+    if "backend.main" in sys.modules:
+        pytest.skip("backend.main was already imported with another configuration")
+    # configuration is read at import time: set it, then (re)load config before the app
+    env = {
+        "RAIL_SAARTHI_DB": str(tmp_path_factory.mktemp("store") / "complaints.db"),
+        "RAIL_SAARTHI_DEDUP": "1",
+        "RAIL_SAARTHI_RESULT_CACHE": "0",
+        "RAIL_SAARTHI_SIMILAR": "0",
+        "RAIL_SAARTHI_ONLINE": "0",
+    }
+    with pytest.MonkeyPatch.context() as mp:
+        for k, v in env.items():
+            mp.setenv(k, v)
+        from fastapi.testclient import TestClient
+
+        importlib.reload(importlib.import_module("backend.config"))  # may have been imported already
+        main = importlib.import_module("backend.main")
+        assert str(main.store.path) == env["RAIL_SAARTHI_DB"]
+        with TestClient(main.app) as c:
+            yield c
+
+
+def test_duplicate_severity_uses_its_own_keywords(client):
+    first = client.post("/api/analyze", json={"text": FIRST}).json()
+    repeat = client.post("/api/analyze", json={"text": REPEAT}).json()
+    expected = client.post("/api/severity", json={"text": REPEAT}).json()["severity"]
+
+    assert first["severity"] == "critical"  # "urgent" is a critical keyword
+    assert repeat["is_duplicate"] and repeat["incident_id"] == first["incident_id"]
+    assert repeat["severity"] == expected != "critical"
+
+
+def test_duplicate_keywords_still_raise_severity(client):
+    client.post("/api/analyze", json={"text": REPEAT.replace("S4", "B2")})
+    repeat = client.post("/api/analyze", json={"text": "urgent: " + REPEAT.replace("S4", "B2")}).json()
+    assert repeat["is_duplicate"]
+    assert repeat["severity"] == "critical"
+
+
+def test_batch_results_hide_model_severity(client):
+    results = client.post("/api/analyze-batch", json={"texts": [FIRST, REPEAT]}).json()["results"]
+    assert all("ml_severity" not in r for r in results)
@@ -0,0 +1,84 @@
+"""
+Severity keyword matching: keywords and phrases match whole words only (the substring
+checks it replaced flagged "lifeline" as "life"), and the most severe tier wins.
+"""
+import pytest
+
+from backend.keyword_matcher import KeywordMatch, KeywordMatcher, normalize
+from backend.severity import _MATCHER, get_severity_keyword_score, resolve_severity
+
+
+@pytest.fixture
+def matcher():
+    return KeywordMatcher.from_tiers({
+        "critical": ["life", "fire", "no water for hours"],
+        "high": ["no water", "water", "for hours", "stuck"],
+    })
+
+
+def _keywords(matches):
+    return [m.keyword for m in matches]
+
+
+@pytest.mark.parametrize("text", [
+    "Lifeline express was on time",
+    "afterlife",
+    "the staff were firefighters",
+    "waterproof bags",
+    "stuck2gether",
+])
+def test_no_match_inside_words(matcher, text):
+    assert matcher.find(text) == []
+    assert matcher.top_tier(text) is None
+
+
+@pytest.mark.parametrize("text", ["life", "Life!", "risk to LIFE.", "(life) at risk", "life-threatening"])
+def test_whole_word_matches(matcher, text):
+    assert _keywords(matcher.find(text)) == ["life"]
+
+
+def test_phrases_match_across_punctuation_and_spacing(matcher):
+    assert normalize("No  water,\tfor hours!!") == "no water for hours"
+    matches = matcher.find("We had NO   water -- for hours.")
+    assert "no water for hours" in _keywords(matches)
+    assert matcher.find("no waters") == []
+    assert matcher.find("know water")[0] == KeywordMatch("water", "high", 5, 10)
+
+
+def test_overlapping_matches(matcher):
+    matches = matcher.find("no water for hours")
+    assert matches == sorted(matches, key=lambda m: (m.start, m.end))
+    assert set(_keywords(matches)) == {"no water for hours", "no water", "water", "for hours"}
+    assert [(m.start, m.end) for m in matches if m.keyword == "water"] == [(3, 8)]
+    # the same keyword twice; positions are in the normalized text
+    assert [m.start for m in matcher.find("stuck, stuck again") if m.keyword == "stuck"] == [0, 6]
+
+
+def test_best_tier_highest_wins(matcher):
+    assert matcher.top_tier("stuck for hours") == "high"
+    assert matcher.top_tier("stuck for hours, risk to life") == "critical"
+    assert matcher.top_tier("no water for hours") == "critical"  # the longer phrase is critical
+    matches = matcher.find("fire! stuck")
+    assert matcher.best_tier(matches[::-1]) == "critical"  # not decided by position
+    assert matcher.best_tier([]) is None
+
+
+def test_duplicate_keyword_takes_higher_tier():
+    m = KeywordMatcher.from_tiers({"critical": ["smoke"], "high": ["smoke", "delay"]})
+    assert len(m) == 2
+    assert m.find("smoke") == [KeywordMatch("smoke", "critical", 0, 5)]
+
+
+def test_find_batch(matcher):
+    texts = ["life", "", "nothing here", "stuck"]
+    assert matcher.find_batch(texts) == [matcher.find(t) for t in texts]
+
+
+def test_configured_keywords():
+    assert get_severity_keyword_score("Lifeline express was late") is None
+    assert get_severity_keyword_score("danger to life") == "critical"
+    assert get_severity_keyword_score("there was no water for hours") == "high"
+    assert {"no water", "for hours"} <= set(_keywords(_MATCHER.find("there was no water for hours")))
+    assert get_severity_keyword_score("train delayed, fire in pantry") == "critical"
+    assert resolve_severity("low", "stranded at the station") == "high"
+    assert resolve_severity("critical", "stranded at the station") == "critical"
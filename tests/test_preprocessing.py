@@ -0,0 +1,48 @@
+"""
+Parity of backend/preprocessing.py with the original NLTK-based implementation.
+
+fixtures/preprocessing_golden.json holds the outputs of the pre-optimization module
+(NLTK word_tokenize + NLTK English stopwords) for a fixed corpus; regenerate it with
+fixtures/make_preprocessing_golden.py. Training and serving both depend on these tokens,
+so any difference changes what a trained model sees.
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+from backend import preprocessing
+
+GOLDEN = json.loads((Path(__file__).parent / "fixtures" / "preprocessing_golden.json").read_text(encoding="utf-8"))
+CASES = GOLDEN["cases"]
+
+
+@pytest.fixture(autouse=True)
+def _cold_cache():
+    preprocessing.clear_cache()
+    yield
+    preprocessing.clear_cache()
+
+
+@pytest.mark.parametrize("case", CASES, ids=[f"case{i}" for i in range(len(CASES))])
+def test_matches_reference(case):
+    text = case["text"]
+    assert preprocessing.clean_text(text) == case["clean"]
+    assert preprocessing.tokenize(text) == case["tokens"]
+    assert preprocessing.tokenize(text, remove_stopwords=False) == case["tokens_with_stopwords"]
+    assert preprocessing.preprocess_for_model(text) == case["model_input"]
+
+
+def test_cached_results_match_reference():
+    texts = [c["text"] for c in CASES]
+    expected = [c["model_input"] for c in CASES]
+    assert preprocessing.preprocess_batch(texts) == expected
+    # second pass is served from the LRU cache
+    assert list(preprocessing.iter_preprocess(texts)) == expected
+    assert preprocessing.cache_info()["hits"] >= len({t for t in texts if t})  # "" skips the cache
+
+
+def test_non_string_input():
+    assert preprocessing.clean_text(None) == ""
+    assert preprocessing.tokenize(None) == []
+    assert preprocessing.preprocess_for_model(None) == ""
@@ -0,0 +1,135 @@
+"""
+PredictionCache: LRU + TTL local tier, version keying and the SQLite tier shared by
+the workers of a host.
+"""
+import pytest
+
+from backend import result_cache
+from backend.result_cache import PredictionCache
+
+
+def _entry(i: int):
+    return ("cleanliness", 0.5 + i / 100, "low", i, None, None)
+
+
+class _Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = _Clock()
+    monkeypatch.setattr(result_cache, "time", c)
+    return c
+
+
+def _put(cache, texts, version="v1"):
+    keys = [PredictionCache.key(t, version) for t in texts]
+    cache.put_many(keys, version, [_entry(i) for i, _ in enumerate(texts)])
+
+
+def _cached(cache, texts, version="v1"):
+    return [e is not None for e in cache.get_many(texts, version)[1]]
+
+
+def test_hit_after_put(clock):
+    cache = PredictionCache(max_entries=10)
+    assert _cached(cache, ["a", "b"]) == [False, False]
+    _put(cache, ["a", "b"])
+    keys, entries = cache.get_many(["a", "b", "c"], "v1")
+    assert entries == [_entry(0), _entry(1), None]
+    assert keys[0] == PredictionCache.key("a", "v1")
+    assert cache.stats["hits"] == 2 and cache.stats["misses"] == 3
+
+
+def test_ttl_expiry(clock):
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    _put(cache, ["a"])
+    clock.now += 59
+    assert _cached(cache, ["a"]) == [True]
+    clock.now += 2
+    assert _cached(cache, ["a"]) == [False]
+    assert cache.stats["expired"] == 1
+    assert cache.status()["entries"] == 0
+
+
+def test_lru_eviction_order(clock):
+    cache = PredictionCache(max_entries=3)
+    _put(cache, ["a", "b", "c"])
+    assert _cached(cache, ["a"]) == [True]  # a becomes the most recently used
+    _put(cache, ["d"])
+    assert _cached(cache, ["b"]) == [False]
+    assert _cached(cache, ["a", "c", "d"]) == [True, True, True]
+    assert cache.stats["evicted"] == 1
+
+
+def test_other_version_misses(clock):
+    cache = PredictionCache(max_entries=10)
+    _put(cache, ["a"], version="v1")
+    assert _cached(cache, ["a"], version="v2") == [False]
+    assert PredictionCache.key("a", "v1") != PredictionCache.key("a", "v2")
+    cache.invalidate(keep_version="v2")
+    assert _cached(cache, ["a"], version="v1") == [False]
+    assert cache.stats["invalidations"] == 1
+
+
+def test_shared_tier_between_instances(clock, tmp_path):
+    path = tmp_path / "result_cache.db"
+    a = PredictionCache(max_entries=10, ttl_seconds=60, shared_path=path)
+    b = PredictionCache(max_entries=10, ttl_seconds=60, shared_path=path)
+    try:
+        _put(a, ["x", "y"])
+        assert b.get_many(["x", "y", "z"], "v1")[1] == [_entry(0), _entry(1), None]
+        assert b.stats["shared_hits"] == 2 and b.stats["misses"] == 1
+        assert _cached(b, ["x"]) == [True] and b.stats["hits"] == 1  # copied into b's local tier
+        assert _cached(b, ["x"], version="v2") == [False]
+
+        clock.now += 61  # shared rows expire too
+        assert _cached(PredictionCache(shared_path=path, ttl_seconds=60), ["y"]) == [False]
+    finally:
+        a.close()
+        b.close()
+
+
+def test_swap_keeps_shared_rows_of_other_versions(clock, tmp_path):
+    """A worker that swapped must not delete rows another worker still serves."""
+    path = tmp_path / "result_cache.db"
+    swapped = PredictionCache(shared_path=path)
+    old = PredictionCache(shared_path=path)
+    try:
+        _put(old, ["x"], version="v1")
+        swapped.invalidate(keep_version="v2")
+        fresh = PredictionCache(shared_path=path)
+        assert _cached(fresh, ["x"], version="v1") == [True]
+        assert fresh.stats["shared_hits"] == 1
+        fresh.close()
+
+        swapped.invalidate()  # an explicit full clear empties the shared tier
+        fresh = PredictionCache(shared_path=path)
+        assert _cached(fresh, ["x"], version="v1") == [False]
+        fresh.close()
+    finally:
+        swapped.close()
+        old.close()
+
+
+def test_shared_prune_drops_other_versions_first(clock, tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "_PRUNE_EVERY", 1)
+    path = tmp_path / "result_cache.db"
+    cache = PredictionCache(max_entries=1, shared_path=path, shared_max_rows=3)
+    try:
+        _put(cache, ["a"], version="v2")
+        clock.now += 1
+        _put(cache, ["other"], version="v1")  # newer than "a", but of another version
+        clock.now += 1
+        _put(cache, ["b", "c"], version="v2")  # 4 rows > 3: the v1 row goes, not the oldest
+        reader = PredictionCache(shared_path=path)
+        assert _cached(reader, ["other"], version="v1") == [False]
+        assert _cached(reader, ["a", "b", "c"], version="v2") == [True, True, True]
+        reader.close()
+    finally:
+        cache.close()
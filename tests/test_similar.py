@@ -0,0 +1,161 @@
+"""
+Similar-complaint search: the pruned inverted index must return the exact top k of a
+brute-force X @ q.T, query after query (its scratch accumulator is reused), and the
+index must follow the complaint store and model swaps.
+"""
+import time
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from backend.similar import InvertedIndex, SimilarComplaints
+from backend.store import ComplaintStore
+
+N_DOCS, N_TERMS = 3000, 400
+
+
+def _rows(n, seed):
+    rng = np.random.default_rng(seed)
+    p = 1.0 / np.arange(1, N_TERMS + 1)  # Zipf-like: frequent low-weight terms, a long tail
+    p /= p.sum()
+    rows = np.repeat(np.arange(n), 6)
+    cols = rng.choice(N_TERMS, size=len(rows), p=p)
+    X = sp.csr_matrix((rng.random(len(rows)) + 0.1, (rows, cols)), shape=(n, N_TERMS), dtype=np.float32)
+    X.sum_duplicates()
+    norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+    return sp.csr_matrix(sp.diags(1.0 / norms) @ X, dtype=np.float32)
+
+
+@pytest.fixture(scope="module")
+def indexed():
+    X = _rows(N_DOCS, seed=0)
+    keys = np.arange(N_DOCS) * 3 + 100  # external keys differ from internal ids
+    index = InvertedIndex()
+    for start in range(0, N_DOCS, 700):  # appended in batches, as on store flushes
+        index.add(keys[start:start + 700].tolist(), X[start:start + 700])
+    return index, X, keys
+
+
+def _brute_force(X, keys, q, k):
+    scores = (X @ q.T).toarray().ravel()
+    hits = np.flatnonzero(scores > 0)
+    top = hits[np.argsort(-scores[hits], kind="stable")][:k]
+    return keys[top], scores[top]
+
+
+def _query(seed, n_terms):
+    rng = np.random.default_rng(seed)
+    terms = np.sort(rng.choice(N_TERMS, size=n_terms, replace=False))
+    weights = rng.random(n_terms).astype(np.float32) + 0.1
+    weights /= np.linalg.norm(weights)
+    return sp.csr_matrix((weights, (np.zeros(n_terms, dtype=int), terms)), shape=(1, N_TERMS), dtype=np.float32)
+
+
+@pytest.mark.parametrize("k", [1, 10, 50, 5000])
+def test_matches_brute_force(indexed, k):
+    index, X, keys = indexed
+    for seed in range(40):  # repeated queries on one index: the scratch accumulator is reused
+        q = _query(seed, n_terms=1 + seed % 8)
+        got_keys, got_scores, scored = index.search(q.indices, q.data, k)
+        want_keys, want_scores = _brute_force(X, keys, q, k)
+        np.testing.assert_allclose(got_scores, want_scores, rtol=1e-5, atol=1e-6)
+        assert set(got_keys.tolist()) == set(want_keys.tolist())  # random weights: no ties
+        assert scored > 0
+        # cleared by a memset after heavy queries, entry by entry after light ones
+        assert not index._acc.any(), "scratch accumulator not cleared"
+
+
+def test_k_above_candidate_count(indexed):
+    index, X, keys = indexed
+    df = np.diff(X.tocsc().indptr).astype(float)
+    df[df == 0] = np.inf
+    rare = int(np.argmin(df))  # the indexed term with the fewest postings
+    q = sp.csr_matrix(([1.0], ([0], [rare])), shape=(1, N_TERMS), dtype=np.float32)
+    got_keys, got_scores, _ = index.search(q.indices, q.data, 100)
+    want_keys, want_scores = _brute_force(X, keys, q, 100)
+    assert 0 < len(got_keys) < 100
+    assert got_keys.tolist() == want_keys.tolist()
+    np.testing.assert_allclose(got_scores, want_scores, rtol=1e-5)
+
+
+def test_unknown_terms_and_repeats(indexed):
+    index, X, keys = indexed
+    keys_out, scores, scored = index.search(np.array([N_TERMS + 5]), np.array([1.0], np.float32), 10)
+    assert len(keys_out) == 0 and scored == 0
+    q = _query(7, n_terms=6)
+    first = index.search(q.indices, q.data, 10)
+    for _ in range(5):
+        again = index.search(q.indices, q.data, 10)
+        assert again[0].tolist() == first[0].tolist()
+        np.testing.assert_array_equal(again[1], first[1])
+
+
+class _Vectorizer:
+    """Word-count vectorizer with a fixed vocabulary; L2-normalized rows like TF-IDF."""
+
+    def __init__(self, vocab):
+        self.vocabulary_ = {w: i for i, w in enumerate(vocab)}
+        self.params = {"vocab": tuple(vocab)}
+
+    def transform(self, texts):
+        rows, cols = [], []
+        for i, text in enumerate(texts):
+            for w in text.split():
+                if w in self.vocabulary_:
+                    rows.append(i)
+                    cols.append(self.vocabulary_[w])
+        X = sp.csr_matrix((np.ones(len(rows), np.float32), (rows, cols)), shape=(len(texts), len(self.vocabulary_)))
+        X.sum_duplicates()
+        norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sp.csr_matrix(sp.diags(1.0 / norms) @ X, dtype=np.float32)
+
+
+def _wait_ready(similar, version, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        status = similar.status()
+        if status["ready"] and not status["rebuilding"] and status["model_version"] == version:
+            return status
+        assert time.monotonic() < deadline, f"index not rebuilt: {status}"
+        time.sleep(0.01)
+
+
+def test_catch_up_and_rebuild(tmp_path):
+    store = ComplaintStore(tmp_path / "complaints.db", batch_size=1000)
+    similar = SimilarComplaints(store, lambda texts: list(texts), max_docs=8, batch=3)
+    store.on_flush(similar.catch_up)  # no flusher thread: listeners run on flush()
+    try:
+        for text in ("toilet dirty", "fan broken", "food cold"):
+            store.add(text, "c", "low", 0)
+        store.add("toilet dirty again", "c", "low", 0, is_duplicate=True)  # duplicates are not indexed
+        store.flush()
+        similar.attach(_Vectorizer(["toilet", "dirty", "fan", "broken", "food", "cold", "water"]), "v1")
+        assert _wait_ready(similar, "v1")["indexed"] == 3
+
+        store.add("no water toilet", "c", "low", 0)
+        store.flush()  # catch_up indexes the new row
+        results = similar.query("water", k=5)["results"]
+        assert [r["text"] for r in results] == ["no water toilet"]
+
+        # same feature space: no rebuild; another vocabulary: rebuilt in the background
+        similar.attach(_Vectorizer(["toilet", "dirty", "fan", "broken", "food", "cold", "water"]), "v1b")
+        assert similar.status()["rebuilds"] == 1
+        similar.attach(_Vectorizer(["water", "toilet"]), "v2")
+        status = _wait_ready(similar, "v2")
+        assert status["rebuilds"] == 2 and status["indexed"] == 4
+        assert similar.query("fan", k=5)["results"] == []
+
+        # past 1.25 x max_docs the index is rebuilt from the newest max_docs complaints
+        for i in range(8):
+            store.add(f"water leak {i}", "c", "low", 0)
+        store.flush()
+        deadline = time.monotonic() + 10
+        while similar.status()["indexed"] != 8 or similar.status()["rebuilding"]:
+            assert time.monotonic() < deadline, similar.status()
+            time.sleep(0.01)
+        texts = {r["text"] for r in similar.query("water", k=20)["results"]}
+        assert texts == {f"water leak {i}" for i in range(8)}
+    finally:
+        store.close()
@@ -0,0 +1,39 @@
+"""
+Cold start of the API on the slim (bundle) path, in a fresh interpreter: importing
+backend.main and answering the first /api/analyze must not pull in the heavy
+libraries, and must stay within the budgets of `python -m benchmarks.startup --check`
+(with headroom here, since test machines vary).
+"""
+import pytest
+
+from benchmarks.startup import FIRST_REQUEST_BUDGET_MS, HEAVY_MODULES, IMPORT_BUDGET_S, cold_start
+
+HEADROOM = 3.0
+
+
+@pytest.fixture(scope="module")
+def start(tmp_path_factory):
+    from backend.bundle import has_bundle
+    from backend.config import BUNDLE_DIR
+    from backend.registry import current_version, version_dir
+
+    version = current_version()
+    if version is None or not has_bundle(version_dir(version) / BUNDLE_DIR):
+        pytest.skip("no trained version with a bundle (cd backend && python train.py)")
+    return cold_start("bundle", tmp_path_factory.mktemp("startup") / "complaints.db")
+
+
+def test_first_request_served_from_bundle(start):
+    assert start["status"] == 200
+    assert start["artifact_format"] == "bundle"
+
+
+def test_no_heavy_imports(start):
+    assert start["heavy_after_import"] == []
+    assert start["heavy_after_request"] == []
+    assert {"sklearn", "joblib", "nltk"} <= set(HEAVY_MODULES)
+
+
+def test_within_budgets(start):
+    assert start["import_s"] <= IMPORT_BUDGET_S * HEADROOM
+    assert start["first_request_ms"] <= FIRST_REQUEST_BUDGET_MS * HEADROOM
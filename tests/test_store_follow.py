@@ -0,0 +1,104 @@
+"""
+ComplaintStore.follow(): what pre-forked workers use to see each other's complaints.
+Two stores on one file stand in for two workers.
+"""
+import threading
+import time
+
+import pytest
+
+from backend.store import ComplaintStore
+
+
+def _wait_for(store: ComplaintStore, last_id: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while (store.followed_id or 0) < last_id:
+        assert time.monotonic() < deadline, "follower did not catch up"
+        time.sleep(0.01)
+
+
+def _max_id(store: ComplaintStore) -> int:
+    with store._db_lock:
+        return store._connect().execute("SELECT MAX(id) FROM complaints").fetchone()[0]
+
+
+@pytest.fixture
+def stores(tmp_path):
+    path = tmp_path / "complaints.db"
+    follower = ComplaintStore(path, batch_size=7, flush_interval=0.02)
+    writer = ComplaintStore(path, batch_size=5, flush_interval=0.02)
+    yield follower, writer
+    follower.close()
+    writer.close()
+
+
+def test_rows_of_other_stores_delivered_once(stores):
+    follower, writer = stores
+    delivered = []
+    follower.follow(delivered.extend)
+    for i in range(3):
+        writer.add(f"before {i}", "cleanliness", "low", 0)
+    writer.flush()
+    totals = follower.begin_following()
+    follower.start()
+    for i in range(40):
+        writer.add(f"after {i}", "food", "medium", 1, is_duplicate=i % 4 == 0)
+        follower.add(f"own {i}", "security", "high", 2)  # the follower's own rows come back too
+    writer.flush()
+    follower.flush()
+    _wait_for(follower, _max_id(writer))
+
+    texts = [r[1] for r in delivered]
+    assert sum(totals["category"].values()) == 3
+    assert sorted(texts) == sorted([f"after {i}" for i in range(40)] + [f"own {i}" for i in range(40)])
+    # in commit order, so each store's rows arrive in the order it wrote them
+    assert [t for t in texts if t.startswith("after")] == [f"after {i}" for i in range(40)]
+    assert [t for t in texts if t.startswith("own")] == [f"own {i}" for i in range(40)]
+
+
+def test_loaded_totals_and_deliveries_do_not_overlap(stores):
+    """Rows committed while the totals are read are counted exactly once."""
+    follower, writer = stores
+    delivered = []
+    follower.follow(delivered.extend)
+    stop = threading.Event()
+
+    def write():
+        i = 0
+        while not stop.is_set():
+            writer.add(f"row {i}", "cleanliness", "low", 0)
+            i += 1
+            if i % 5 == 0:
+                time.sleep(0.001)
+
+    t = threading.Thread(target=write)
+    t.start()
+    try:
+        time.sleep(0.05)
+        totals = follower.begin_following()
+        follower.start()
+        time.sleep(0.05)
+    finally:
+        stop.set()
+        t.join()
+    writer.flush()
+    _wait_for(follower, _max_id(writer))
+
+    loaded = totals["category"].get("cleanliness", 0)
+    texts = [r[1] for r in delivered]
+    assert len(texts) == len(set(texts))
+    assert loaded > 0 and texts
+    assert loaded + len(texts) == writer.trends("all")["category"]["cleanliness"]
+
+
+def test_replay_bound_matches_follow_position(stores):
+    follower, writer = stores
+    follower.follow(lambda rows: None)
+    for i in range(12):
+        writer.add(f"row {i}", "food", "low", 0)
+    writer.flush()
+    follower.begin_following()
+    writer.add("late", "food", "low", 0)
+    writer.flush()
+    replayed = [r for batch in follower.iter_since(0, until_id=follower.followed_id) for r in batch]
+    assert [r[1] for r in replayed] == [f"row {i}" for i in range(12)]